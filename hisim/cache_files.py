@@ -0,0 +1,435 @@
+"""Binary cache files for the precomputed component results.
+
+utils.get_cache_file gives every cached result a path with the extension .cache. The results are stored next
+to it as an uncompressed .npz file with one array per column, so floats are stored bit for bit as float64.
+The numeric columns are memory mapped when they are read: the arrays are backed by the file and only the
+timesteps that are used are loaded. Older caches were written as CSV files under the .cache path. They are
+converted to the binary format when they are read for the first time.
+
+Once read, the columns are kept in memory for further simulations of the process, see hisim.memo_cache.
+The CacheStore keeps an index of the cache files of every cache directory, limits their size and lets a
+simulation wait for another one that calculates the same result, see CacheStore.
+"""
+
+# clean
+import atexit
+import contextlib
+import json
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hisim import log
+from hisim import memo_cache
+
+BINARY_CACHE_EXTENSION = ".npz"
+CACHE_INDEX_FILE = "cache_indices.json"
+LOCK_EXTENSION = ".lock"
+
+
+def get_binary_cache_path(cache_filepath: str) -> str:
+    """Gets the path of the binary cache file for the path from utils.get_cache_file."""
+    return os.path.splitext(cache_filepath)[0] + BINARY_CACHE_EXTENSION
+
+
+def cache_file_exists(cache_filepath: str) -> bool:
+    """Checks if there is a binary cache file or an older cache file that can be converted."""
+    return os.path.isfile(get_binary_cache_path(cache_filepath)) or os.path.isfile(cache_filepath)
+
+
+def to_cache_column(values: Any) -> np.ndarray:
+    """Turns the values of a column into an array that can be stored without pickling."""
+    column = np.asarray(values)
+    if column.dtype == object:
+        column = column.astype(str)
+    return column
+
+
+def write_binary_cache_file(cache_filepath: str, columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """Writes the columns into the binary cache file and returns them as arrays.
+
+    The file is written under a temporary name first, so other simulations never read a partial file.
+    """
+    cache_columns = {column_name: to_cache_column(values) for column_name, values in columns.items()}
+    binary_cache_path = get_binary_cache_path(cache_filepath)
+    temporary_path = f"{binary_cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez(file, **cache_columns)
+    os.replace(temporary_path, binary_cache_path)
+    memo_cache.MEMO_CACHE.invalidate(os.path.abspath(cache_filepath))
+    return cache_columns
+
+
+def write_cache_columns(cache_filepath: str, columns: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """Publishes a calculated result in the cache and returns the columns as arrays."""
+    cache_columns = write_binary_cache_file(cache_filepath, columns)
+    CACHE_STORE.record_miss(cache_filepath)
+    return cache_columns
+
+
+def read_npz_member(npz_file: zipfile.ZipFile, file_path: str, member: zipfile.ZipInfo) -> np.ndarray:
+    """Reads an array from an npz file, memory mapped if it is stored uncompressed."""
+    with npz_file.open(member) as member_file:
+        version = np.lib.format.read_magic(member_file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(member_file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(member_file)
+        header_length = member_file.tell()
+    if member.compress_type != zipfile.ZIP_STORED or dtype.hasobject or int(np.prod(shape)) == 0:
+        with npz_file.open(member) as member_file:
+            array: np.ndarray = np.lib.format.read_array(member_file, allow_pickle=False)
+        return array
+    with open(file_path, "rb") as file:
+        # the local file header has a fixed size of 30 bytes plus the file name and the extra field
+        file.seek(member.header_offset + 26)
+        name_length = int.from_bytes(file.read(2), "little")
+        extra_length = int.from_bytes(file.read(2), "little")
+    data_offset = member.header_offset + 30 + name_length + extra_length + header_length
+    memory_map = np.memmap(
+        file_path, dtype=dtype, mode="r", offset=data_offset, shape=shape, order="F" if fortran_order else "C"
+    )
+    mapped_array: np.ndarray = memory_map.view(np.ndarray)
+    return mapped_array
+
+
+def read_binary_cache_columns(cache_filepath: str) -> Dict[str, np.ndarray]:
+    """Reads all columns of a binary cache file."""
+    binary_cache_path = get_binary_cache_path(cache_filepath)
+    with zipfile.ZipFile(binary_cache_path) as npz_file:
+        return {
+            os.path.splitext(member.filename)[0]: read_npz_member(npz_file, binary_cache_path, member)
+            for member in npz_file.infolist()
+        }
+
+
+def read_csv_cache_columns(cache_filepath: str) -> Dict[str, np.ndarray]:
+    """Reads the columns of an older CSV cache file. The written index is left out."""
+    dataframe = pd.read_csv(cache_filepath, sep=",", decimal=".", encoding="cp1252")
+    return {
+        column_name: dataframe[column_name].to_numpy()
+        for column_name in dataframe.columns
+        if not column_name.startswith("Unnamed:")
+    }
+
+
+def load_cache_columns(
+    cache_filepath: str,
+    read_older_cache_file: Callable[[str], Optional[Dict[str, Any]]] = read_csv_cache_columns,
+) -> Optional[Dict[str, np.ndarray]]:
+    """Reads the columns of a cache and converts an older cache file to the binary format.
+
+    Returns None if there is no cache or the older cache file cannot be used anymore, which is then deleted.
+    """
+    binary_cache_path = get_binary_cache_path(cache_filepath)
+    if not os.path.isfile(binary_cache_path):
+        if not os.path.isfile(cache_filepath):
+            return None
+        # other simulations that read the same older file wait until it is converted
+        with CACHE_STORE.claimed_key(cache_filepath):
+            if not os.path.isfile(binary_cache_path):
+                columns = read_older_cache_file(cache_filepath) if os.path.isfile(cache_filepath) else None
+                if columns is not None:
+                    log.information("Converting the cache file " + cache_filepath + " to the binary format.")
+                    write_binary_cache_file(cache_filepath, columns)
+                try:
+                    os.remove(cache_filepath)
+                except FileNotFoundError:
+                    pass
+                if columns is None:
+                    return None
+    CACHE_STORE.record_hit(cache_filepath)
+    # simulations in the same process read the columns from memory
+    cache_columns: Dict[str, np.ndarray] = memo_cache.MEMO_CACHE.get_or_load(
+        os.path.abspath(cache_filepath), lambda: read_binary_cache_columns(cache_filepath)
+    )
+    return cache_columns
+
+
+def read_cache_columns(cache_filepath: str) -> Dict[str, np.ndarray]:
+    """Reads the columns of a cache that exists."""
+    columns = load_cache_columns(cache_filepath)
+    if columns is None:
+        raise FileNotFoundError("The cache file " + cache_filepath + " could not be found.")
+    return columns
+
+
+def get_cache_key(cache_filepath: str) -> str:
+    """Gets the key of a cache file in the index, which is its file name without the extension."""
+    return os.path.splitext(os.path.basename(cache_filepath))[0]
+
+
+def get_producer(cache_key: str) -> str:
+    """Gets the component key that produced a cache file from the key, which is <component key>_<hash>."""
+    return cache_key.rsplit("_", 1)[0]
+
+
+def create_lock_file(lock_path: str, stale_lock_in_seconds: float) -> bool:
+    """Creates a lock file, unless it exists. Lock files older than stale_lock_in_seconds are removed first."""
+    try:
+        if time.time() - os.path.getmtime(lock_path) > stale_lock_in_seconds:
+            log.warning("Removing the lock file " + lock_path + ", which seems to be left from a crashed simulation.")
+            os.remove(lock_path)
+    except OSError:
+        pass
+    try:
+        file_descriptor = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    os.write(file_descriptor, str(os.getpid()).encode("utf-8"))
+    os.close(file_descriptor)
+    return True
+
+
+def remove_file(file_path: str) -> bool:
+    """Removes a file and returns if it was removed. Files that are in use on Windows are kept."""
+    try:
+        os.remove(file_path)
+        return True
+    except OSError:
+        return False
+
+
+@dataclass
+class CacheStatistics:
+    """Counts the cache accesses of a simulation."""
+
+    hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    evicted_files: int = 0
+    evicted_bytes: int = 0
+
+
+class CacheStore:
+    """Keeps an index of the cache files of every cache directory and limits their size.
+
+    The index cache_indices.json in the cache directory has an entry for every cache file with its size, the
+    time of the last access, the component that produced it and the number of hits. If a size limit is set for
+    the directory, the least recently used files are deleted whenever a new file is published. The index is
+    updated under a lock file, so simultaneous simulations do not lose their entries. Hits only lock the index
+    when they are written, with the next published file of the directory or at the end of the simulation.
+    Before a component calculates a result in the preparation of the simulation, it claims the key of the cache
+    file. Another simulation that needs the same result waits until the file is published instead of calculating
+    it again. The lock files of crashed simulations are removed after lock_timeout_in_seconds.
+    """
+
+    def __init__(self, lock_timeout_in_seconds: float = 3600.0, poll_interval_in_seconds: float = 0.2) -> None:
+        """Initializes the store without size limits."""
+        self.lock_timeout_in_seconds = lock_timeout_in_seconds
+        self.poll_interval_in_seconds = poll_interval_in_seconds
+        self.size_limits_in_bytes: Dict[str, int] = {}
+        self.claimed_lock_paths: Dict[str, str] = {}
+        # the hits and the last access of the cache files by cache directory that are not in the index yet
+        self.pending_hits: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        self.statistics = CacheStatistics()
+
+    def set_size_limit(self, cache_dir_path: str, size_limit_in_megabytes: Optional[float]) -> None:
+        """Sets the size limit of a cache directory, None for no limit."""
+        cache_dir_path = os.path.abspath(cache_dir_path)
+        if size_limit_in_megabytes is None:
+            self.size_limits_in_bytes.pop(cache_dir_path, None)
+        else:
+            self.size_limits_in_bytes[cache_dir_path] = int(size_limit_in_megabytes * 1024 * 1024)
+
+    def reset_statistics(self) -> None:
+        """Starts counting the cache accesses of a new simulation."""
+        self.statistics = CacheStatistics()
+
+    def log_statistics(self) -> None:
+        """Logs the cache accesses of the simulation."""
+        statistics = self.statistics
+        if statistics.hits + statistics.misses == 0:
+            return
+        log.information(
+            f"Cache: {statistics.hits} hits, {statistics.misses} misses, {statistics.waits} waits for other "
+            f"simulations, {statistics.evicted_files} files ({statistics.evicted_bytes / 1024 / 1024:.1f} MB) evicted"
+        )
+
+    def claim(self, cache_filepath: str) -> bool:
+        """Claims the key of a missing cache file before the result is calculated.
+
+        Returns True if another simulation published the file in the meantime, which can be read now. Otherwise
+        this simulation holds the lock of the key until it publishes the file with write_cache_columns.
+        """
+        lock_path = get_binary_cache_path(cache_filepath) + LOCK_EXTENSION
+        waited = False
+        while True:
+            if cache_file_exists(cache_filepath):
+                self.statistics.waits += int(waited)
+                return True
+            if create_lock_file(lock_path, self.lock_timeout_in_seconds):
+                if cache_file_exists(cache_filepath):
+                    remove_file(lock_path)
+                    return True
+                self.claimed_lock_paths[cache_filepath] = lock_path
+                return False
+            if not waited:
+                log.information("Waiting for another simulation to publish " + get_binary_cache_path(cache_filepath))
+                waited = True
+            time.sleep(self.poll_interval_in_seconds)
+
+    def release(self, cache_filepath: str) -> None:
+        """Releases the claim of a key."""
+        lock_path = self.claimed_lock_paths.pop(cache_filepath, None)
+        if lock_path is not None:
+            remove_file(lock_path)
+
+    def release_all(self) -> None:
+        """Releases all claims, for example if the simulation stopped before it published the results."""
+        for cache_filepath in list(self.claimed_lock_paths):
+            self.release(cache_filepath)
+
+    @contextlib.contextmanager
+    def claimed_key(self, cache_filepath: str) -> Iterator[None]:
+        """Holds the lock of a key, even if its file exists, for example while an older cache file is converted."""
+        lock_path = get_binary_cache_path(cache_filepath) + LOCK_EXTENSION
+        waited = False
+        while not create_lock_file(lock_path, self.lock_timeout_in_seconds):
+            waited = True
+            time.sleep(self.poll_interval_in_seconds)
+        self.statistics.waits += int(waited)
+        try:
+            yield
+        finally:
+            remove_file(lock_path)
+
+    def record_hit(self, cache_filepath: str) -> None:
+        """Counts a cache hit, the last access is written to the index later, see write_hits."""
+        self.statistics.hits += 1
+        cache_dir_path = os.path.dirname(os.path.abspath(cache_filepath))
+        pending_hits = self.pending_hits.setdefault(cache_dir_path, {})
+        hits, _ = pending_hits.get(get_cache_key(cache_filepath), (0, 0.0))
+        pending_hits[get_cache_key(cache_filepath)] = (hits + 1, time.time())
+
+    def record_miss(self, cache_filepath: str) -> None:
+        """Counts a calculated result, adds the published file to the index and releases the claim of its key."""
+        self.statistics.misses += 1
+        self.update_index(cache_filepath)
+        self.release(cache_filepath)
+
+    def write_hits(self) -> None:
+        """Writes the hits that were recorded since the last write into the indices.
+
+        Reading a cache does not lock the index, the hits are written at the end of a simulation and whenever a
+        file is published into the same directory, before the least recently used files are evicted.
+        """
+        for cache_dir_path in list(self.pending_hits):
+            with self.locked_index(cache_dir_path) as index:
+                self.add_pending_hits(cache_dir_path, index)
+
+    @contextlib.contextmanager
+    def locked_index(self, cache_dir_path: str) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Reads the index of a cache directory under its lock and writes it back afterwards."""
+        index_path = os.path.join(cache_dir_path, CACHE_INDEX_FILE)
+        lock_path = index_path + LOCK_EXTENSION
+        while not create_lock_file(lock_path, stale_lock_in_seconds=60):
+            time.sleep(self.poll_interval_in_seconds)
+        try:
+            index: Dict[str, Dict[str, Any]] = {}
+            if os.path.isfile(index_path):
+                try:
+                    with open(index_path, "r", encoding="utf-8") as file:
+                        index = json.load(file)
+                except ValueError:
+                    log.warning("The cache index " + index_path + " could not be read and is created again.")
+            yield index
+            temporary_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(index, file, indent=1)
+            os.replace(temporary_path, index_path)
+        finally:
+            remove_file(lock_path)
+
+    def add_pending_hits(self, cache_dir_path: str, index: Dict[str, Dict[str, Any]]) -> None:
+        """Adds the recorded hits of a cache directory to its index. Files that were deleted meanwhile are left out."""
+        for cache_key, (hits, last_access) in self.pending_hits.pop(cache_dir_path, {}).items():
+            binary_cache_path = get_binary_cache_path(os.path.join(cache_dir_path, cache_key + ".cache"))
+            if not os.path.isfile(binary_cache_path):
+                continue
+            entry = index.setdefault(
+                cache_key,
+                {"size": os.path.getsize(binary_cache_path), "producer": get_producer(cache_key), "hits": 0},
+            )
+            entry["hits"] = entry.get("hits", 0) + hits
+            entry["last_access"] = max(entry.get("last_access", 0.0), last_access)
+
+    def update_index(self, cache_filepath: str) -> None:
+        """Adds a published cache file to the index and evicts old files if it exceeds the size limit."""
+        cache_dir_path = os.path.dirname(os.path.abspath(cache_filepath))
+        cache_key = get_cache_key(cache_filepath)
+        with self.locked_index(cache_dir_path) as index:
+            # the hits of this process decide which files were used least recently
+            self.add_pending_hits(cache_dir_path, index)
+            binary_cache_path = get_binary_cache_path(cache_filepath)
+            index[cache_key] = {
+                "size": os.path.getsize(binary_cache_path) if os.path.isfile(binary_cache_path) else 0,
+                "producer": get_producer(cache_key),
+                "hits": 0,
+                "last_access": time.time(),
+            }
+            if cache_dir_path in self.size_limits_in_bytes:
+                self.evict_least_recently_used(
+                    cache_dir_path, index, self.size_limits_in_bytes[cache_dir_path], cache_key
+                )
+
+    def evict_least_recently_used(
+        self, cache_dir_path: str, index: Dict[str, Dict[str, Any]], size_limit_in_bytes: int, published_key: str
+    ) -> None:
+        """Deletes the least recently used cache files until the directory is within the size limit.
+
+        Files that are not in the index yet, for example from older versions, are added with their modification
+        time as last access. The published file and files whose key is claimed by a simulation are kept.
+        """
+        for cache_key in list(index):
+            cache_filepath = os.path.join(cache_dir_path, cache_key + ".cache")
+            if not cache_file_exists(cache_filepath):
+                del index[cache_key]
+        for file_name in os.listdir(cache_dir_path):
+            stem, extension = os.path.splitext(file_name)
+            if extension in (BINARY_CACHE_EXTENSION, ".cache") and stem not in index:
+                file_path = os.path.join(cache_dir_path, file_name)
+                index[stem] = {
+                    "size": os.path.getsize(file_path),
+                    "producer": get_producer(stem),
+                    "hits": 0,
+                    "last_access": os.path.getmtime(file_path),
+                }
+        total_size = sum(entry["size"] for entry in index.values())
+        for cache_key, entry in sorted(index.items(), key=lambda item: item[1]["last_access"]):
+            if total_size <= size_limit_in_bytes:
+                break
+            if cache_key == published_key:
+                continue
+            cache_filepath = os.path.join(cache_dir_path, cache_key + ".cache")
+            binary_cache_path = get_binary_cache_path(cache_filepath)
+            if os.path.exists(binary_cache_path + LOCK_EXTENSION):
+                continue
+            if os.path.isfile(binary_cache_path) and not remove_file(binary_cache_path):
+                continue
+            if os.path.isfile(cache_filepath):
+                remove_file(cache_filepath)
+            total_size -= entry["size"]
+            del index[cache_key]
+            self.statistics.evicted_files += 1
+            self.statistics.evicted_bytes += entry["size"]
+
+
+CACHE_STORE = CacheStore()
+
+
+def reset_claims_in_child_process() -> None:
+    """Forgets the claims and the hits of the parent process in a forked process, so the child does not write them."""
+    CACHE_STORE.claimed_lock_paths = {}
+    CACHE_STORE.pending_hits = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_claims_in_child_process)
+atexit.register(lambda: CACHE_STORE.release_all())  # pylint: disable=unnecessary-lambda
+atexit.register(lambda: CACHE_STORE.write_hits())  # pylint: disable=unnecessary-lambda
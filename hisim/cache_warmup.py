@@ -0,0 +1,293 @@
+"""Precomputes the component caches of many system setups in parallel before they are simulated.
+
+The weather, the PV systems and the buildings cache their precomputed values of the whole year by their configuration,
+the year and the seconds per timestep, the PV systems and the buildings also by their connected weather. The LPG
+connector caches its load profiles by the simulated period. For a batch of system setups, the warmup fills every
+distinct cache key once in a process pool, so the simulations only read the caches:
+
+1. Every system setup is built, but not simulated, to collect the keys of its WeatherConfig, PVSystemConfig,
+   BuildingConfig and UtspLpgConnectorConfig. The LPG connector retrieves its load profiles when it is created, so
+   the load profiles are built in this step. Setups that share a key wait for each other through the cache claims.
+2. The weather of every distinct key is prepared.
+3. The PV systems and buildings of every distinct key are calculated from the cached weather.
+
+Keys that are cached already are skipped. Run `python -m hisim.cache_warmup <JSON files>` with system setups in the
+format of `system_setup_starter`, or `python -m hisim.cache_warmup --grid <JSON file>` with a parameter grid like
+{"base": <system setup>, "grid": {"simulation_parameters.seconds_per_timestep": [900, 3600]}}, which warms up the
+system setups of all combinations of the values.
+"""
+
+# clean
+import argparse
+import concurrent.futures
+import copy
+import importlib
+import itertools
+import json
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from hisim import cache_files
+from hisim import log
+from hisim import sim_repository
+from hisim import simulator as sim
+from hisim.components.building import Building
+from hisim.components.generic_pv_system import PVSystem
+from hisim.components.loadprofilegenerator_utsp_connector import UtspLpgConnector
+from hisim.components.weather import Weather, WeatherConfig
+from hisim.simulationparameters import SimulationParameters
+from hisim.system_setup_starter import make_system_setup
+
+
+@dataclass
+class CacheEntry:
+    """A cache key of a system setup and what is needed to build it."""
+
+    cache_filepath: str
+    component_class: type
+    config: Any
+    simulation_parameters: SimulationParameters
+    #: the connected weather the PV systems and buildings are calculated from
+    weather_config: Optional[WeatherConfig] = None
+
+    def get_label(self) -> str:
+        """Gets the name of the cache key in the summary."""
+        return cache_files.get_cache_key(self.cache_filepath)
+
+
+@dataclass
+class SetupCacheEntries:
+    """The cache keys of a system setup."""
+
+    entries: List[CacheEntry] = field(default_factory=list)
+    #: the keys of the load profiles and if they were built while the setup was built
+    built_load_profiles: Dict[str, bool] = field(default_factory=dict)
+
+
+@dataclass
+class WarmupSummary:
+    """The cache keys that were built, skipped because they were cached and failed."""
+
+    built: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    def add_result(self, label: str, built: bool) -> None:
+        """Adds a key that was built or found in the cache."""
+        if built:
+            self.built.append(label)
+        else:
+            self.skipped.append(label)
+
+    def get_report(self) -> str:
+        """Gets the summary as text."""
+        lines = [f"Cache warmup: {len(self.built)} built, {len(self.skipped)} skipped, {len(self.failed)} failed"]
+        lines += [f"  built: {label}" for label in sorted(self.built)]
+        lines += [f"  skipped: {label}" for label in sorted(self.skipped)]
+        lines += [f"  failed: {label}: {error}" for label, error in sorted(self.failed.items())]
+        return "\n".join(lines)
+
+
+def expand_parameter_grid(base_setup: Dict[str, Any], grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Gets a system setup for every combination of the grid values.
+
+    The keys of the grid are the dotted paths of the values in the system setup, for example
+    "system_setup_config.pv_config.power_in_watt".
+    """
+    system_setups = []
+    for values in itertools.product(*grid.values()):
+        system_setup = copy.deepcopy(base_setup)
+        for path, value in zip(grid, values):
+            *parent_keys, key = path.split(".")
+            parent = system_setup
+            for parent_key in parent_keys:
+                parent = parent.setdefault(parent_key, {})
+            parent[key] = value
+        system_setups.append(system_setup)
+    return system_setups
+
+
+def collect_cache_entries(parameters_json: Dict[str, Any]) -> SetupCacheEntries:
+    """Builds a system setup without simulating it and collects its cache keys."""
+    with tempfile.TemporaryDirectory() as result_directory:
+        path_to_module, my_simulation_parameters, module_config_path = make_system_setup(
+            parameters_json=parameters_json, result_directory=result_directory
+        )
+        if my_simulation_parameters is None:
+            raise ValueError("No simulation parameters were created.")
+        # import the setup function like hisim_main does
+        path_obj = Path(path_to_module).with_suffix(".py").resolve()
+        if not path_obj.is_file():
+            raise ValueError(f"Python script {path_obj.name} could not be found at {path_obj}")
+        if str(path_obj.parent) not in sys.path:
+            sys.path.append(str(path_obj.parent))
+        targetmodule = importlib.import_module(path_obj.stem)
+        my_sim = sim.Simulator(
+            module_directory=str(path_obj.parent),
+            module_filename=path_obj.stem,
+            setup_function="setup_function",
+            my_simulation_parameters=my_simulation_parameters,
+            my_module_config=module_config_path,
+        )
+        targetmodule.setup_function(my_sim, my_simulation_parameters)
+
+    components = [wrapped_component.my_component for wrapped_component in my_sim.wrapped_components]
+    # the automatic connections are made like in the simulation, so the inputs know their weather
+    for wrapped_component in my_sim.wrapped_components:
+        if wrapped_component.connect_automatically is True:
+            my_sim.connect_everything_automatically(
+                source_component_list=components, target_component=wrapped_component.my_component
+            )
+    setup_cache_entries = SetupCacheEntries()
+    for component in components:
+        weather_config: Optional[WeatherConfig] = None
+        if isinstance(component, Weather):
+            cache_filepath = component.get_year_cache_file()[1]
+        elif isinstance(component, (PVSystem, Building)):
+            weather = component.get_connected_weather()
+            weather_config = weather.weather_config
+            cache_filepath = component.get_year_cache_file(weather)[1]
+        elif isinstance(component, UtspLpgConnector):
+            for file_exists, cache_filepath in component.list_of_file_exists_and_cache_files:
+                # predefined load profiles are not cached
+                if cache_files.cache_file_exists(cache_filepath):
+                    setup_cache_entries.built_load_profiles[cache_files.get_cache_key(cache_filepath)] = not file_exists
+            continue
+        else:
+            continue
+        setup_cache_entries.entries.append(
+            CacheEntry(
+                cache_filepath=cache_filepath,
+                component_class=type(component),
+                config=component.config,
+                simulation_parameters=my_simulation_parameters,
+                weather_config=weather_config,
+            )
+        )
+    return setup_cache_entries
+
+
+def prepare_weather(my_simulation_parameters: SimulationParameters, weather_config: WeatherConfig) -> Weather:
+    """Prepares the weather, which builds its cache entry if it is missing."""
+    weather: Weather = Weather(my_simulation_parameters, weather_config)
+    weather.set_sim_repo(sim_repository.SimRepository())
+    weather.prepare_year_values()
+    return weather
+
+
+def build_cache_entry(entry: CacheEntry) -> bool:
+    """Builds a cache entry and returns if it was built here rather than by another process."""
+    if entry.component_class is Weather:
+        misses = cache_files.CACHE_STORE.statistics.misses
+        prepare_weather(entry.simulation_parameters, entry.config)
+        return cache_files.CACHE_STORE.statistics.misses > misses
+    if entry.weather_config is None:
+        raise ValueError("The system setup has no weather to calculate the component from.")
+    weather = prepare_weather(entry.simulation_parameters, entry.weather_config)
+    # wait if a simulation calculates the same values
+    if cache_files.CACHE_STORE.claim(entry.cache_filepath):
+        return False
+    try:
+        component = entry.component_class(entry.simulation_parameters, entry.config)
+        component.precompute_cache(weather)
+    finally:
+        cache_files.CACHE_STORE.release(entry.cache_filepath)
+    return True
+
+
+def get_entries_to_build(
+    setup_cache_entries: List[SetupCacheEntries], summary: WarmupSummary
+) -> Tuple[List[CacheEntry], List[CacheEntry]]:
+    """Gets the distinct weather and component entries that are not cached and adds the cached ones as skipped."""
+    distinct_entries: Dict[str, CacheEntry] = {}
+    for setup_entries in setup_cache_entries:
+        for entry in setup_entries.entries:
+            distinct_entries.setdefault(entry.cache_filepath, entry)
+    weather_entries = []
+    component_entries = []
+    for cache_filepath, entry in distinct_entries.items():
+        if cache_files.cache_file_exists(cache_filepath):
+            summary.add_result(entry.get_label(), built=False)
+        elif entry.component_class is Weather:
+            weather_entries.append(entry)
+        else:
+            component_entries.append(entry)
+    return weather_entries, component_entries
+
+
+def build_in_pool(
+    executor: concurrent.futures.Executor, entries: List[CacheEntry], summary: WarmupSummary
+) -> None:
+    """Builds the entries in the process pool and adds the results to the summary."""
+    futures = {executor.submit(build_cache_entry, entry): entry for entry in entries}
+    for future in concurrent.futures.as_completed(futures):
+        label = futures[future].get_label()
+        try:
+            summary.add_result(label, future.result())
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error(f"Building the cache entry {label} failed: {exc}")
+            summary.failed[label] = str(exc)
+
+
+def warm_up_caches(system_setups: List[Dict[str, Any]], max_workers: Optional[int] = None) -> WarmupSummary:
+    """Builds all cache keys of the system setups that are not cached yet."""
+    summary = WarmupSummary()
+    setup_cache_entries = []
+    built_load_profiles: Dict[str, bool] = {}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(collect_cache_entries, system_setup): index
+            for index, system_setup in enumerate(system_setups)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                setup_entries = future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                label = f"system setup {index} ({system_setups[index].get('path_to_module')})"
+                log.error(f"Building the {label} failed: {exc}")
+                summary.failed[label] = str(exc)
+                continue
+            setup_cache_entries.append(setup_entries)
+            for label, built in setup_entries.built_load_profiles.items():
+                built_load_profiles[label] = built_load_profiles.get(label, False) or built
+        for label, built in built_load_profiles.items():
+            summary.add_result(label, built)
+
+        weather_entries, component_entries = get_entries_to_build(setup_cache_entries, summary)
+        # the PV systems and buildings are calculated from the cached weather
+        build_in_pool(executor, weather_entries, summary)
+        build_in_pool(executor, component_entries, summary)
+    return summary
+
+
+def main() -> None:
+    """Warms up the caches of the system setups given on the command line."""
+    parser = argparse.ArgumentParser(description="Precomputes the component caches of system setups.")
+    parser.add_argument("setup_files", nargs="*", help="system setup JSON files in the system_setup_starter format")
+    parser.add_argument("--grid", help="JSON file with a base system setup and a grid of values")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes, all cores by default")
+    arguments = parser.parse_args()
+
+    system_setups: List[Dict[str, Any]] = []
+    for setup_file in arguments.setup_files:
+        with open(setup_file, "r", encoding="utf8") as file:
+            system_setups.append(json.load(file))
+    if arguments.grid is not None:
+        with open(arguments.grid, "r", encoding="utf8") as file:
+            grid_json = json.load(file)
+        system_setups += expand_parameter_grid(grid_json["base"], grid_json["grid"])
+    if not system_setups:
+        parser.error("Please give system setup JSON files or a parameter grid.")
+
+    summary = warm_up_caches(system_setups, max_workers=arguments.workers)
+    print(summary.get_report())
+    if summary.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
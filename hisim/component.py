@@ -6,12 +6,11 @@ The component class is the base class for all other components.
 # clean
 
 from __future__ import annotations
-import os
-import dataclasses as dc
+import sys
 import typing
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
-import json
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
 import pandas as pd
 from dataclass_wizard import JSONWizard
 
@@ -59,18 +58,73 @@ class ConfigBase(JSONWizard):
         return my_list
 
 
-@dataclass
 class ComponentConnection:
-    """Used in the component class for defining a connection."""
+    """Used in the component class for defining a connection. Connections use slots like the inputs and outputs."""
+
+    __slots__ = ("target_input_name", "source_class_name", "source_output_name", "source_instance_name")
+
+    def __init__(
+        self,
+        target_input_name: str,
+        source_class_name: str,
+        source_output_name: str,
+        source_instance_name: Optional[str] = None,
+    ):
+        """Initializes a component connection."""
+        self.target_input_name: str = target_input_name
+        self.source_class_name: str = source_class_name
+        self.source_output_name: str = source_output_name
+        self.source_instance_name: Optional[str] = source_instance_name
+
+    def __repr__(self) -> str:
+        """Shows the fields of the connection."""
+        return (
+            f"ComponentConnection(target_input_name={self.target_input_name!r}, "
+            f"source_class_name={self.source_class_name!r}, source_output_name={self.source_output_name!r}, "
+            f"source_instance_name={self.source_instance_name!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """Compares the fields of two connections."""
+        if not isinstance(other, ComponentConnection):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def copy(self) -> ComponentConnection:
+        """Gets a copy of the connection."""
+        return ComponentConnection(
+            self.target_input_name, self.source_class_name, self.source_output_name, self.source_instance_name
+        )
 
-    target_input_name: str
-    source_class_name: str
-    source_output_name: str
-    source_instance_name: Optional[str] = None
+
+#: integer codes of the load types and units, which can be compared and indexed faster than the enums
+LOAD_TYPE_CODES: Dict[lt.LoadTypes, int] = {load_type: code for code, load_type in enumerate(lt.LoadTypes)}
+UNIT_CODES: Dict[lt.Units, int] = {unit: code for code, unit in enumerate(lt.Units)}
 
 
 class ComponentOutput:  # noqa: too-few-public-methods
-    """Used in the component class for defining an output."""
+    """Used in the component class for defining an output.
+
+    Outputs use slots and interned names, because large setups like districts have thousands of them.
+    The pretty name is built once and built again only if the display name changes.
+    """
+
+    __slots__ = (
+        "full_name",
+        "component_name",
+        "field_name",
+        "_display_name",
+        "_pretty_name",
+        "load_type",
+        "unit",
+        "load_type_code",
+        "unit_code",
+        "global_index",
+        "postprocessing_flag",
+        "sankey_flow_direction",
+        "output_description",
+        "source_component_class",
+    )
 
     def __init__(
         self,
@@ -84,25 +138,58 @@ class ComponentOutput:  # noqa: too-few-public-methods
         source_component_class: Optional[str] = None,
     ):
         """Defines a component output."""
-        self.full_name: str = object_name + " # " + field_name
-        self.component_name: str = object_name
-        self.field_name: str = field_name
-        self.display_name: str = field_name
+        self.full_name: str = sys.intern(object_name + " # " + field_name)
+        self.component_name: str = sys.intern(object_name)
+        self.field_name: str = sys.intern(field_name)
+        self._display_name: str = self.field_name
+        self._pretty_name: Optional[str] = None
         self.load_type: lt.LoadTypes = load_type
         self.unit: lt.Units = unit
+        self.load_type_code: int = LOAD_TYPE_CODES.get(load_type, -1)
+        self.unit_code: int = UNIT_CODES.get(unit, -1)
         self.global_index: int = -1
         self.postprocessing_flag: Optional[List[Any]] = postprocessing_flag
         self.sankey_flow_direction: Optional[bool] = sankey_flow_direction
         self.output_description: Optional[str] = output_description
         self.source_component_class: Optional[str] = source_component_class
 
+    @property
+    def display_name(self) -> str:
+        """Gets the name of the output in the pretty name."""
+        return self._display_name
+
+    @display_name.setter
+    def display_name(self, display_name: str) -> None:
+        """Sets the name of the output in the pretty name."""
+        self._display_name = display_name
+        self._pretty_name = None
+
     def get_pretty_name(self) -> str:
         """Gets a pretty name for a component output."""
-        return self.component_name + " - " + self.display_name + " [" + self.load_type + " - " + self.unit + "]"
+        if self._pretty_name is None:
+            self._pretty_name = (
+                self.component_name + " - " + self._display_name + " [" + self.load_type + " - " + self.unit + "]"
+            )
+        return self._pretty_name
 
 
 class ComponentInput:  # noqa: too-few-public-methods
-    """Used in the component class for defining an input."""
+    """Used in the component class for defining an input. Inputs use slots and interned names like the outputs."""
+
+    __slots__ = (
+        "fullname",
+        "component_name",
+        "field_name",
+        "loadtype",
+        "unit",
+        "load_type_code",
+        "unit_code",
+        "global_index",
+        "src_object_name",
+        "src_field_name",
+        "source_output",
+        "is_mandatory",
+    )
 
     def __init__(
         self,
@@ -113,11 +200,13 @@ class ComponentInput:  # noqa: too-few-public-methods
         mandatory: bool,
     ):
         """Initializes a component input."""
-        self.fullname: str = object_name + " # " + field_name
-        self.component_name: str = object_name
-        self.field_name: str = field_name
+        self.fullname: str = sys.intern(object_name + " # " + field_name)
+        self.component_name: str = sys.intern(object_name)
+        self.field_name: str = sys.intern(field_name)
         self.loadtype: lt.LoadTypes = load_type
         self.unit: lt.Units = unit
+        self.load_type_code: int = LOAD_TYPE_CODES.get(load_type, -1)
+        self.unit_code: int = UNIT_CODES.get(unit, -1)
         self.global_index: int = -1
         self.src_object_name: Optional[str] = None
         self.src_field_name: Optional[str] = None
@@ -125,56 +214,218 @@ class ComponentInput:  # noqa: too-few-public-methods
         self.is_mandatory = mandatory
 
 
+@dataclass
+class ValueDifferences:
+    """Values that differ between two single time step values by more than the tolerance."""
+
+    indices: np.ndarray
+    previous_values: np.ndarray
+    current_values: np.ndarray
+
+    @classmethod
+    def of_outputs(
+        cls,
+        output_indices: np.ndarray,
+        previous_values: np.ndarray,
+        current_values: np.ndarray,
+        tolerances: Union[float, np.ndarray] = 0.0001,
+    ) -> "ValueDifferences":
+        """Gets the differences of the values of some outputs, which are given by their global indices."""
+        differing = np.abs(previous_values - current_values) > tolerances
+        return cls(
+            indices=output_indices[differing],
+            previous_values=previous_values[differing],
+            current_values=current_values[differing],
+        )
+
+    def __len__(self) -> int:
+        """Gets the number of differing values."""
+        return len(self.indices)
+
+    def format(self, outputs: List[ComponentOutput]) -> str:
+        """Formats the differences as a single line with the names of the outputs."""
+        return "".join(
+            f"{outputs[index].get_pretty_name()} previously: {previous:4.2f} currently: {current:4.2f} | "
+            for index, previous, current in zip(
+                self.indices.tolist(), self.previous_values.tolist(), self.current_values.tolist()
+            )
+        )
+
+
+# number of values that are compared at once in the convergence check
+CONVERGENCE_CHECK_BLOCK_SIZE = 16384
+
+
 class SingleTimeStepValues:
-    """Contains the values for a single time step."""
+    """Contains the values for a single time step.
+
+    The values are stored in a float64 numpy array, which is indexed by the global index of the outputs.
+    In an ensemble, the array has the shape (variants, outputs) and holds the values of all variants.
+    """
 
     def __init__(self, number_of_values: int):
         """Initializes a new single time step values class."""
-        self.values = [0.0] * number_of_values
+        self.values: np.ndarray = np.zeros(number_of_values, dtype=np.float64)
 
-    def copy_values_from_other(self, other):
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> SingleTimeStepValues:
+        """Wraps an existing float64 array without copying it, for example a row of the result matrix."""
+        newstsv = cls.__new__(cls)
+        newstsv.values = values
+        return newstsv
+
+    def copy_values_from_other(self, other: SingleTimeStepValues) -> None:
         """Copy all values from a single time step values."""
-        self.values = other.values[:]
+        np.copyto(self.values, other.values)
 
-    def clone(self):
+    def clone(self) -> SingleTimeStepValues:
         """Makes a copy of the current object."""
-        newstsv = SingleTimeStepValues(len(self.values))
-        newstsv.values = self.values[:]
-        return newstsv
+        return SingleTimeStepValues.from_array(self.values.copy())
 
     def get_input_value(self, component_input: ComponentInput) -> float:
         """Gets a value for an input from the single time step values."""
         if component_input.source_output is None:
             return 0
-        return self.values[component_input.source_output.global_index]
+        return typing.cast(float, self.values.item(component_input.source_output.global_index))
 
     def set_output_value(self, output: ComponentOutput, value: float) -> None:
         """Sets a single output value in the single time step values array."""
         self.values[output.global_index] = value
 
-    def is_close_enough_to_previous(self, previous_values: "SingleTimeStepValues") -> bool:
-        """Checks if the values are sufficiently similar to another array."""
-        count = len(self.values)
-        for i in range(count):
-            if abs(previous_values.values[i] - self.values[i]) > 0.0001:
+    def get_variant(self, variant_index: int) -> SingleTimeStepValues:
+        """Gets the values of one variant of an ensemble without copying them."""
+        return SingleTimeStepValues.from_array(self.values[variant_index])
+
+    def get_input_values(self, component_input: ComponentInput) -> np.ndarray:
+        """Gets the values of an input in all variants of an ensemble."""
+        if component_input.source_output is None:
+            return np.zeros(self.values.shape[:-1], dtype=np.float64)
+        input_values: np.ndarray = self.values[..., component_input.source_output.global_index]
+        return input_values
+
+    def set_output_values(self, output: ComponentOutput, values: Union[float, np.ndarray]) -> None:
+        """Sets the values of an output in all variants of an ensemble."""
+        self.values[..., output.global_index] = values
+
+    def get_unconverged_variants(
+        self, previous_values: "SingleTimeStepValues", tolerances: Union[float, np.ndarray] = 0.0001
+    ) -> np.ndarray:
+        """Checks for every variant of an ensemble if any value changed by more than the tolerances."""
+        unconverged_variants: np.ndarray = np.any(np.abs(previous_values.values - self.values) > tolerances, axis=-1)
+        return unconverged_variants
+
+    def is_close_enough_to_previous(
+        self, previous_values: "SingleTimeStepValues", tolerances: Union[float, np.ndarray] = 0.0001
+    ) -> bool:
+        """Checks if the values are sufficiently similar to another array.
+
+        The tolerances are either one absolute tolerance or an array with the tolerance of each value.
+        Large arrays are compared in blocks, so the check stops at the first block with a difference.
+        """
+        values = self.values
+        other_values = previous_values.values
+        number_of_values = len(values)
+        if number_of_values <= CONVERGENCE_CHECK_BLOCK_SIZE:
+            return not np.any(np.abs(other_values - values) > tolerances)
+        for start in range(0, number_of_values, CONVERGENCE_CHECK_BLOCK_SIZE):
+            stop = start + CONVERGENCE_CHECK_BLOCK_SIZE
+            block_tolerances = tolerances[start:stop] if isinstance(tolerances, np.ndarray) else tolerances
+            if np.any(np.abs(other_values[start:stop] - values[start:stop]) > block_tolerances):
                 return False
         return True
 
+    def get_differences(
+        self, previous_values: "SingleTimeStepValues", tolerances: Union[float, np.ndarray] = 0.0001
+    ) -> ValueDifferences:
+        """Gets the values that differ from the previous values by more than the tolerances."""
+        indices = np.flatnonzero(np.abs(previous_values.values - self.values) > tolerances)
+        return ValueDifferences(
+            indices=indices, previous_values=previous_values.values[indices], current_values=self.values[indices]
+        )
+
     def get_differences_for_error_msg(self, previous_values: Any, outputs: List[ComponentOutput]) -> str:
         """Gets a pretty error message for the differences between two time steps."""
-        count = len(self.values)
-        error_msg = ""
-        for i in range(count):
-            if abs(previous_values.values[i] - self.values[i]) > 0.0001:
-                error_msg += (
-                    outputs[i].get_pretty_name()
-                    + " previously: "
-                    + f"{previous_values.values[i]:4.2f}"
-                    + " currently: "
-                    + f"{self.values[i]:4.2f}"
-                    + " | "
-                )
-        return error_msg
+        return self.get_differences(previous_values).format(outputs)
+
+
+class ArrayState:
+    """Base class for component states of floats, which are stored in an array instead of attributes.
+
+    Subclasses declare their fields as float annotations, which become properties on the array:
+
+        class StorageState(cp.ArrayState):
+            __slots__ = ()
+            temperature_in_celsius: float
+
+    A component registers its state with add_array_state. The simulator then keeps the states of all components
+    in one array, saves them with a single copy at the beginning of a timestep and restores the state of a
+    component with a slice copy, so no state objects are allocated while iterating.
+    """
+
+    __slots__ = ("values", "saved_values")
+    #: the names of the fields in the order of the array
+    FIELDS: typing.ClassVar[typing.Tuple[str, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Creates a property for every float field of the subclass."""
+        super().__init_subclass__(**kwargs)
+        field_names = [
+            field_name
+            for field_name, annotation in cls.__dict__.get("__annotations__", {}).items()
+            if "ClassVar" not in str(annotation)
+        ]
+        for index, field_name in enumerate(field_names, start=len(cls.FIELDS)):
+            setattr(cls, field_name, cls.create_field_property(index))
+        cls.FIELDS = cls.FIELDS + tuple(field_names)
+
+    @staticmethod
+    def create_field_property(index: int) -> property:
+        """Creates the property that reads and writes one value of the array as a Python float."""
+
+        def get_value(self: ArrayState) -> float:
+            value: float = self.values.item(index)
+            return value
+
+        def set_value(self: ArrayState, value: float) -> None:
+            self.values[index] = value
+
+        return property(get_value, set_value)
+
+    def __init__(self) -> None:
+        """Allocates the values and the saved values of all fields with zeros."""
+        values = np.zeros((2, len(self.FIELDS)), dtype=np.float64)
+        self.values: np.ndarray = values[0]
+        self.saved_values: np.ndarray = values[1]
+
+    def bind(self, values: np.ndarray, saved_values: np.ndarray) -> None:
+        """Moves the state into views of a larger array, for example the state array of the simulator."""
+        values[:] = self.values
+        saved_values[:] = self.saved_values
+        self.values = values
+        self.saved_values = saved_values
+
+    def save(self) -> None:
+        """Saves the current values."""
+        np.copyto(self.saved_values, self.values)
+
+    def restore(self) -> None:
+        """Restores the saved values."""
+        np.copyto(self.values, self.saved_values)
+
+    def self_copy(self) -> ArrayState:
+        """Copies the state into a new object with its own array."""
+        state_copy = self.__class__.__new__(self.__class__)
+        ArrayState.__init__(state_copy)
+        state_copy.values[:] = self.values
+        return state_copy
+
+    def __repr__(self) -> str:
+        """Shows the values of all fields."""
+        fields = ", ".join(f"{field_name}={value}" for field_name, value in zip(self.FIELDS, self.values.tolist()))
+        return f"{self.__class__.__name__}({fields})"
+
+
+ArrayStateType = typing.TypeVar("ArrayStateType", bound=ArrayState)
 
 
 @dataclass
@@ -193,6 +444,17 @@ class DisplayConfig:
 class Component:
     """Base class for all components."""
 
+    #: Opt-in contract: i_simulate only depends on the input values and the restored state, and sets all outputs.
+    #: The simulator may then skip restore_state and i_simulate within a timestep if the inputs did not change.
+    is_pure_within_timestep: bool = False
+    #: Opt-in: the component is only calculated every native_seconds_per_timestep seconds, which needs to be a multiple
+    #: of the simulation timestep. In between, the simulator holds its outputs. The component has to calculate
+    #: with get_native_seconds_per_timestep() instead of the seconds per timestep of the simulation.
+    native_seconds_per_timestep: Optional[int] = None
+    #: The state registered with add_array_state, which the simulator saves and restores without i_save_state and
+    #: i_restore_state. Components with an array state need to keep all of their iteration state in it.
+    array_state: Optional[ArrayState] = None
+
     @classmethod
     def get_classname(cls):
         """Gets the class name. Helper function for default connections."""
@@ -241,6 +503,18 @@ class Component:
             name = str(self.config.name)
         return name
 
+    def get_native_seconds_per_timestep(self) -> int:
+        """Gets the seconds between two calculations of the component."""
+        seconds_per_timestep = self.my_simulation_parameters.seconds_per_timestep
+        if self.native_seconds_per_timestep is None or self.native_seconds_per_timestep <= seconds_per_timestep:
+            return seconds_per_timestep
+        return self.native_seconds_per_timestep
+
+    def add_array_state(self, state: ArrayStateType) -> ArrayStateType:
+        """Registers the array state of the component and returns it."""
+        self.array_state = state
+        return state
+
     def add_default_connections(self, connections: List[ComponentConnection]) -> None:
         """Adds a default connection list definition."""
 
@@ -291,7 +565,7 @@ class Component:
         """Adds an output definition."""
         if output_description is None:
             raise ValueError("Missing an output description for " + object_name + " - " + field_name)
-        log.debug("adding output: " + field_name + " to component " + object_name)
+        log.debug("adding output: %s to component %s", field_name, object_name)
         outp = ComponentOutput(
             object_name,
             field_name,
@@ -326,22 +600,7 @@ class Component:
             raise ValueError("The component " + self.component_name + " has no input with the name " + input_fieldname)
         input_to_set.src_object_name = src_object_name
         input_to_set.src_field_name = src_field_name
-
-        # write input and output connection to json file
-        file_name = os.path.join(self.my_simulation_parameters.result_directory, "component_connections.json")
-
-        dict_with_connection_information = {
-            "From": {"Component": input_to_set.src_object_name, "Field": input_to_set.src_field_name},
-            "To": {"Component": input_to_set.component_name, "Field": input_to_set.field_name},
-        }
-
-        if os.path.exists(file_name):
-            with open(file_name, mode="r+", encoding="utf-8") as file:
-                file.seek(os.stat(file_name).st_size - 1)
-                file.write(f",{json.dumps(dict_with_connection_information)}]")
-        else:
-            with open(file_name, "a", encoding="utf-8") as file:
-                json.dump([dict_with_connection_information], file)
+        # the connections are written to component_connections.json by the simulator after connecting everything
 
     def connect_dynamic_input(self, input_fieldname: str, src_object: ComponentOutput) -> None:
         """For connecting an input to a dynamic output."""
@@ -383,7 +642,7 @@ class Component:
         connections = self.default_connections[source_classname]
         new_connections: List[ComponentConnection] = []
         for connection in connections:
-            connection_copy = dc.replace(connection)
+            connection_copy = connection.copy()
             connection_copy.source_instance_name = source_component.component_name
             new_connections.append(connection_copy)
         return new_connections
@@ -432,17 +691,76 @@ class Component:
         return maintenance_cost_per_simulated_period_in_euro
 
     def i_save_state(self) -> None:
-        """Abstract. Gets called at the beginning of a timestep to save the state."""
-        raise NotImplementedError()
+        """Abstract. Gets called at the beginning of a timestep to save the state.
+
+        Components with an array state do not need to implement it.
+        """
+        if self.array_state is None:
+            raise NotImplementedError()
+        self.array_state.save()
 
     def i_restore_state(self) -> None:
-        """Abstract. Restores the state of the component. Can be called many times while iterating."""
-        raise NotImplementedError()
+        """Abstract. Restores the state of the component. Can be called many times while iterating.
+
+        Components with an array state do not need to implement it.
+        """
+        if self.array_state is None:
+            raise NotImplementedError()
+        self.array_state.restore()
 
     def i_simulate(self, timestep: int, stsv: SingleTimeStepValues, force_convergence: bool) -> None:
         """Performs the actual calculation."""
         raise NotImplementedError()
 
+    @classmethod
+    def i_simulate_batch(
+        cls,
+        components: List[Component],
+        timestep: int,
+        stsv: SingleTimeStepValues,
+        force_convergence: bool,
+        variant_indices: np.ndarray,
+    ) -> None:
+        """Optional. Calculates the component in several variants of an ensemble at once.
+
+        The components are the instances of this component in all variants and the values of stsv have the shape
+        (variants, outputs). Only the variants in variant_indices need to be calculated, the others converged already.
+        The inputs and outputs have the same global index in all variants.
+        By default, the variants are calculated one by one with i_simulate. Components can override this with a
+        vectorised calculation.
+        """
+        for variant_index in variant_indices:
+            components[variant_index].i_simulate(timestep, stsv.get_variant(int(variant_index)), force_convergence)
+
+    def i_get_state(self) -> Any:
+        """Optional. Returns the state at the beginning of a timestep as a picklable object for checkpoints.
+
+        Only components in simulations with checkpoints need to implement this. Components without a state return None.
+        Components with an array state return a copy of its values by default.
+        """
+        if self.array_state is not None:
+            return self.array_state.values.copy()
+        raise NotImplementedError(
+            f"The component {self.component_name} does not support checkpoints, because i_get_state is not implemented."
+        )
+
+    def i_set_state(self, state: Any) -> None:
+        """Optional. Sets the state that was returned by i_get_state, when the simulation resumes from a checkpoint."""
+        if self.array_state is not None:
+            self.array_state.values[:] = state
+            return
+        raise NotImplementedError(
+            f"The component {self.component_name} does not support checkpoints, because i_set_state is not implemented."
+        )
+
+    def get_precomputed_outputs(self) -> Optional[Dict[ComponentOutput, np.ndarray]]:
+        """Optional. Returns the complete time series of all outputs, if they are known after i_prepare_simulation.
+
+        The simulator then writes these series directly into the results and never calls i_simulate of the component.
+        Components with inputs, states or side effects in i_simulate have to return None, which is the default.
+        """
+        return None
+
     def write_to_report(self) -> Any:
         """Abstract function for writing the report entry for this component."""
         raise NotImplementedError("In " + self.component_name)
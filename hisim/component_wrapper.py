@@ -1,13 +1,59 @@
 """Wraps components for use in the simulator."""
 
 # clean
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
 
 import hisim.component as cp
 import hisim.loadtypes as lt
 from hisim import log
 
 
+class ComponentOutputIndex:
+    """Index of the registered outputs and wrapped component classes of a simulation.
+
+    Used to look up outputs by name when registering and connecting, instead of scanning all outputs.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty index."""
+        self.outputs_by_name: Dict[Tuple[str, str], cp.ComponentOutput] = {}
+        self.outputs_by_full_name: Dict[str, cp.ComponentOutput] = {}
+        self.wrapped_class_names: Set[str] = set()
+
+    @classmethod
+    def from_outputs(
+        cls, all_outputs: List[cp.ComponentOutput], wrapped_components: Optional[List[Any]] = None
+    ) -> "ComponentOutputIndex":
+        """Builds the index from already registered outputs and wrapped components."""
+        output_index = cls()
+        for output in all_outputs:
+            output_index.add_output(output)
+        for wrapped_component in wrapped_components or []:
+            output_index.add_wrapped_component(wrapped_component)
+        return output_index
+
+    def add_wrapped_component(self, wrapped_component: Any) -> None:
+        """Adds the class of a wrapped component to the index."""
+        self.wrapped_class_names.add(wrapped_component.my_component.get_classname())
+
+    def add_output(self, output: cp.ComponentOutput) -> None:
+        """Adds a registered output to the index."""
+        self.outputs_by_name[(output.component_name, output.field_name)] = output
+        self.outputs_by_full_name[output.full_name] = output
+
+    def contains_full_name(self, full_name: str) -> bool:
+        """Checks if an output with this full name is registered."""
+        return full_name in self.outputs_by_full_name
+
+    def get_output(self, component_name: Optional[str], field_name: Optional[str]) -> Optional[cp.ComponentOutput]:
+        """Gets the registered output of a component by its field name, or None if there is none."""
+        if component_name is None or field_name is None:
+            return None
+        return self.outputs_by_name.get((component_name, field_name))
+
+
 class ComponentWrapper:
     """Wraps components for use."""
 
@@ -22,6 +68,22 @@ class ComponentWrapper:
         # self.cachedict: = {}
         self.is_cachable = is_cachable
         self.connect_automatically = connect_automatically
+        # dirty input tracking for components that are pure within a timestep
+        self.is_pure_within_timestep: bool = component.is_pure_within_timestep
+        self.input_global_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.last_input_values: np.ndarray = np.zeros(0, dtype=np.float64)
+        # the outputs of the last calculation, which are written again when the calculation is skipped,
+        # as a convergence accelerator may have replaced them since
+        self.last_output_values: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.skipped_calculations: int = 0
+        # components whose complete output series are written by the simulator instead of calculated
+        self.is_precomputed: bool = False
+        # components with a native timestep are only calculated every calculation_interval timesteps,
+        # on the other timesteps they are idle and their held outputs are written by the simulator
+        self.calculation_interval: int = 1
+        self.is_idle: bool = False
+        self.held_output_values: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.output_global_indices: np.ndarray = np.zeros(0, dtype=np.int64)
 
     def clear(self):
         """Clears properties to help with saving memory."""
@@ -30,13 +92,21 @@ class ComponentWrapper:
         del self.component_outputs
 
     def register_component_outputs(
-        self, all_outputs: List[cp.ComponentOutput], wrapped_components_so_far: List[Any]
+        self,
+        all_outputs: List[cp.ComponentOutput],
+        wrapped_components_so_far: List[Any],
+        output_index: Optional[ComponentOutputIndex] = None,
     ) -> None:
-        """Registers component outputs in the global list of components."""
+        """Registers component outputs in the global list of components.
+
+        The output index of the simulator is updated with the new outputs. Without an index, a temporary
+        one is built from the outputs and components so far.
+        """
         log.information("Registering component outputs on " + self.my_component.component_name)
 
-        # Collect classnames of already wrapped components once
-        wrapped_class_names_so_far = {component.my_component.get_classname() for component in wrapped_components_so_far}
+        if output_index is None:
+            output_index = ComponentOutputIndex.from_outputs(all_outputs, wrapped_components_so_far)
+        wrapped_class_names_so_far = output_index.wrapped_class_names
 
         # Filter dynamic outputs if present and remove those which do not have a corresponding source component
         if hasattr(self.my_component, "my_component_outputs"):
@@ -48,10 +118,11 @@ class ComponentWrapper:
                     and dynamic_output.source_component_class not in wrapped_class_names_so_far
                 ):
                     log.debug(
-                        f"Dynamic output {dynamic_output.source_output_field_name} cannot be registered because its source component "
-                        f"{dynamic_output.source_component_class} is not wrapped yet. "
-                        f"Wrapped components so far: {wrapped_class_names_so_far}. "
-                        "Therefore, this dynamic output will be skipped."
+                        "Dynamic output %s cannot be registered because its source component %s is not wrapped yet. "
+                        "Wrapped components so far: %s. Therefore, this dynamic output will be skipped.",
+                        dynamic_output.source_output_field_name,
+                        dynamic_output.source_component_class,
+                        wrapped_class_names_so_far,
                     )
                     continue
                 filtered_outputs.append(dynamic_output)
@@ -66,13 +137,14 @@ class ComponentWrapper:
                 and output.source_component_class not in wrapped_class_names_so_far
             ):
                 log.debug(
-                    f"Component output {output.full_name} cannot be registered because its source component "
-                    f"{output.source_component_class} is not wrapped yet. "
-                    f"Wrapped components so far: {wrapped_class_names_so_far}. "
-                    "Therefore, this output will be skipped."
+                    "Component output %s cannot be registered because its source component %s is not wrapped yet. "
+                    "Wrapped components so far: %s. Therefore, this output will be skipped.",
+                    output.full_name,
+                    output.source_component_class,
+                    wrapped_class_names_so_far,
                 )
                 continue  # skip this output, because the source component is not wrapped yet
-            if any(output.full_name == out.full_name for out in all_outputs):
+            if output_index.contains_full_name(output.full_name):
                 raise ValueError(
                     f"Trying to register the same key twice: {output.full_name}. "
                     "Check if more than one building is being modeled."
@@ -81,8 +153,12 @@ class ComponentWrapper:
             output.global_index = len(all_outputs)  # noqa
             # add the output column to the global list of outputs
             all_outputs.append(output)
+            output_index.add_output(output)
             self.component_outputs.append(output)
-            log.debug("Registered output " + output.full_name)
+            log.debug("Registered output %s", output.full_name)
+        self.output_global_indices = np.array(
+            [output.global_index for output in self.component_outputs], dtype=np.int64
+        )
 
     def register_component_inputs(self, global_column_dict: Dict[str, Any]) -> None:
         """Gets the inputs for the current component from the global column dict and puts them into component_inputs."""
@@ -98,8 +174,13 @@ class ComponentWrapper:
 
         This gets called at the beginning of a timestep and wraps the i_save_state
         i_save_state should always cache the current state at the beginning of a time step.
+        Array states are saved directly.
         """
-        self.my_component.i_save_state()
+        array_state = self.my_component.array_state
+        if array_state is None:
+            self.my_component.i_save_state()
+        else:
+            array_state.save()
 
     def doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues) -> None:
         """Wrapper for i_doublecheck.
@@ -113,20 +194,46 @@ class ComponentWrapper:
         """Wrapper for i_restore_state.
 
         Gets called at the beginning of every iteration to return to the state at the beginning of the iteration.
+        Array states are restored directly with a slice copy.
         """
-        self.my_component.i_restore_state()
+        array_state = self.my_component.array_state
+        if array_state is None:
+            self.my_component.i_restore_state()
+        else:
+            array_state.restore()
 
     def calculate_component(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
         """Wrapper for the core simulation function in each component."""
+        if self.is_pure_within_timestep:
+            self.last_input_values = stsv.values.take(self.input_global_indices)
+            self.my_component.i_simulate(timestep, stsv, force_convergence)
+            self.last_output_values = stsv.values.take(self.output_global_indices)
+            return
         self.my_component.i_simulate(timestep, stsv, force_convergence)
 
+    def restore_last_outputs(self, stsv: cp.SingleTimeStepValues) -> None:
+        """Writes the outputs of the last calculation of a component that is pure within a timestep."""
+        stsv.values[self.output_global_indices] = self.last_output_values
+
+    def inputs_changed_since_last_calculation(self, stsv: cp.SingleTimeStepValues) -> bool:
+        """Checks if any input value differs from the values the component was last calculated with."""
+        return not np.array_equal(stsv.values.take(self.input_global_indices), self.last_input_values)
+
     def prepare_calculation(self):
         """Wrapper for i_prepare_calculation."""
         log.information("Preparing " + self.my_component.component_name + " for simulation.")
         self.my_component.i_prepare_simulation()
 
-    def connect_inputs(self, all_outputs: List[cp.ComponentOutput]) -> None:
-        """Connects cp.ComponentOutputs to ComponentInputs of WrapperComponent."""
+    def connect_inputs(
+        self, all_outputs: List[cp.ComponentOutput], output_index: Optional[ComponentOutputIndex] = None
+    ) -> None:
+        """Connects cp.ComponentOutputs to ComponentInputs of WrapperComponent.
+
+        The source outputs are looked up in the output index of the simulator. Without an index,
+        a temporary one is built from all outputs.
+        """
+        if output_index is None:
+            output_index = ComponentOutputIndex.from_outputs(all_outputs)
 
         # Returns a List of ComponentInputs
         self.my_component.get_input_definitions()
@@ -136,40 +243,33 @@ class ComponentWrapper:
             # Adds to the ComponentInput List of ComponentWrapper
             self.component_inputs.append(cinput)
 
-            # Creates a ComponentOutput variable
-            global_output: cp.ComponentOutput
-
-            # Loop through all the existent component outputs in the current simulation
-            for global_output in all_outputs:
-                # Check if ComponentOutput and ComponentInput match
-                if (
-                    global_output.component_name == cinput.src_object_name
-                    and global_output.field_name == cinput.src_field_name
-                ):
-                    # Check if ComponentOutput and ComponentInput have the same units
-                    if cinput.unit != global_output.unit:
-                        # Check the use of "Units.Any"
-                        if (cinput.unit == lt.Units.ANY and global_output.unit != lt.Units.ANY) or (
-                            cinput.unit != lt.Units.ANY and global_output.unit == lt.Units.ANY
-                        ):
-                            log.warning(
-                                f"The input {cinput.field_name} (cp: {cinput.component_name}, unit: {cinput.unit}) "
-                                f"and output {global_output.field_name}(cp: {global_output.component_name}, unit: {global_output.unit}) "
-                                f"might not have compatible units."
-                            )  #
-                            # Connect, i.e, save ComponentOutput in ComponentInput
-                            cinput.source_output = global_output
-                            log.debug("Connected input '" + cinput.fullname + "' to '" + global_output.full_name + "'")
-                        else:
-                            raise SystemError(
-                                f"The input {cinput.field_name} (cp: {cinput.component_name}, unit: {cinput.unit}) and "
-                                f"output {global_output.field_name}(cp: {global_output.component_name}, unit: {global_output.unit}) "
-                                f"do not have the same unit!"
-                            )  #
-                    else:
+            # Looks up the matching ComponentOutput in the current simulation
+            global_output = output_index.get_output(cinput.src_object_name, cinput.src_field_name)
+            if global_output is not None:
+                # Check if ComponentOutput and ComponentInput have the same units
+                if cinput.unit != global_output.unit:
+                    # Check the use of "Units.Any"
+                    if (cinput.unit == lt.Units.ANY and global_output.unit != lt.Units.ANY) or (
+                        cinput.unit != lt.Units.ANY and global_output.unit == lt.Units.ANY
+                    ):
+                        log.warning(
+                            f"The input {cinput.field_name} (cp: {cinput.component_name}, unit: {cinput.unit}) "
+                            f"and output {global_output.field_name}(cp: {global_output.component_name}, unit: {global_output.unit}) "
+                            f"might not have compatible units."
+                        )  #
                         # Connect, i.e, save ComponentOutput in ComponentInput
                         cinput.source_output = global_output
-                        log.debug(f"connected input {cinput.fullname} to {global_output.full_name}")
+                        log.debug("Connected input '%s' to '%s'", cinput.fullname, global_output.full_name)
+                    else:
+                        raise SystemError(
+                            f"The input {cinput.field_name} (cp: {cinput.component_name}, unit: {cinput.unit}) and "
+                            f"output {global_output.field_name}(cp: {global_output.component_name}, unit: {global_output.unit}) "
+                            f"do not have the same unit!"
+                        )  #
+                else:
+                    # Connect, i.e, save ComponentOutput in ComponentInput
+                    cinput.source_output = global_output
+                    log.debug("connected input %s to %s", cinput.fullname, global_output.full_name)
 
             # Check if there are inputs that have been not connected
             if cinput.is_mandatory and cinput.source_output is None:
@@ -178,3 +278,8 @@ class ComponentWrapper:
                     f"unit: {cinput.unit}) is not connected to any ComponentOutput. "
                     "You could run debug mode (logging_level=4) to check all inputs, outputs and connections."
                 )  #
+
+        self.input_global_indices = np.array(
+            [cinput.source_output.global_index for cinput in self.component_inputs if cinput.source_output is not None],
+            dtype=np.int64,
+        )
@@ -45,17 +45,19 @@ import importlib
 import math
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import pvlib
 from dataclasses_json import dataclass_json
 
+from hisim import cache_files
 from hisim import component as cp
 from hisim import loadtypes as lt
-from hisim import log, utils
+from hisim import log, memo_cache, utils
 from hisim.components.loadprofilegenerator_utsp_connector import UtspLpgConnector
-from hisim.components.weather import Weather
+from hisim.components.weather import Weather, check_year_rows, get_connected_weather
 from hisim.loadtypes import OutputPostprocessingRules
 from hisim.sim_repository_singleton import SingletonDictKeyEnum, SingletonSimRepository
 from hisim.simulationparameters import SimulationParameters
@@ -170,20 +172,24 @@ class BuildingConfig(cp.ConfigBase):
         return config
 
 
-class BuildingState:
+class BuildingState(cp.ArrayState):
     """BuildingState class."""
 
+    __slots__ = ()
+    # this is labeled as t_m in the paper [1] (** Check header)
+    thermal_mass_temperature_in_celsius: float
+    # this is labeled as c_m in the paper [1] (** Check header)
+    thermal_capacitance_in_joule_per_kelvin: float
+
     def __init__(
         self,
         thermal_mass_temperature_in_celsius: float,
         thermal_capacitance_in_joule_per_kelvin: float,
     ):
         """Construct all the neccessary attributes for the BuildingState object."""
-        # this is labeled as t_m in the paper [1] (** Check header)
-        self.thermal_mass_temperature_in_celsius: float = thermal_mass_temperature_in_celsius
-
-        # this is labeled as c_m in the paper [1] (** Check header)
-        self.thermal_capacitance_in_joule_per_kelvin: float = thermal_capacitance_in_joule_per_kelvin
+        super().__init__()
+        self.thermal_mass_temperature_in_celsius = thermal_mass_temperature_in_celsius
+        self.thermal_capacitance_in_joule_per_kelvin = thermal_capacitance_in_joule_per_kelvin
 
     def calc_stored_thermal_power_in_watt(
         self,
@@ -191,15 +197,6 @@ class BuildingState:
         """Calculate the thermal power stored by the thermal mass per second."""
         return (self.thermal_mass_temperature_in_celsius * self.thermal_capacitance_in_joule_per_kelvin) / 3600
 
-    def self_copy(
-        self,
-    ):
-        """Copy the Building State."""
-        return BuildingState(
-            self.thermal_mass_temperature_in_celsius,
-            self.thermal_capacitance_in_joule_per_kelvin,
-        )
-
 
 # class Building(dynamic_component.DynamicComponent):
 class Building(cp.Component):
@@ -293,17 +290,9 @@ class Building(cp.Component):
         self.set_cooling_temperature_in_celsius = self.buildingconfig.set_cooling_temperature_in_celsius
         self.window_open: int = 0
 
-        (
-            self.is_in_cache,
-            self.cache_file_path,
-        ) = utils.get_cache_file(
-            self.config.name,
-            self.buildingconfig,
-            self.my_simulation_parameters,
-        )
-
-        self.cache: List[float]
-        self.solar_heat_gain_through_windows: List[float]
+        # the year entry of the solar gains, which is keyed by the building and the connected weather
+        self.cache_file_path: str
+        self.solar_heat_gain_through_windows: np.ndarray
 
         self.my_building_information = BuildingInformation(
             config=self.buildingconfig,
@@ -311,11 +300,12 @@ class Building(cp.Component):
 
         self.build()
 
-        self.state: BuildingState = BuildingState(
-            thermal_mass_temperature_in_celsius=config.initial_internal_temperature_in_celsius,
-            thermal_capacitance_in_joule_per_kelvin=self.my_building_information.thermal_capacity_of_building_thermal_mass_in_joule_per_kelvin,
+        self.state: BuildingState = self.add_array_state(
+            BuildingState(
+                thermal_mass_temperature_in_celsius=config.initial_internal_temperature_in_celsius,
+                thermal_capacitance_in_joule_per_kelvin=self.my_building_information.thermal_capacity_of_building_thermal_mass_in_joule_per_kelvin,
+            )
         )
-        self.previous_state = self.state.self_copy()
 
         # =================================================================================================================================
         # Input channels
@@ -676,14 +666,6 @@ class Building(cp.Component):
         """Simulate the thermal behaviour of the building."""
 
         # Gets inputs
-        if hasattr(self, "solar_gain_through_windows") is False:
-            azimuth = stsv.get_input_value(self.azimuth_channel)
-            direct_normal_irradiance = stsv.get_input_value(self.direct_normal_irradiance_channel)
-            direct_horizontal_irradiance = stsv.get_input_value(self.direct_horizontal_irradiance_channel)
-            global_horizontal_irradiance = stsv.get_input_value(self.global_horizontal_irradiance_channel)
-            direct_normal_irradiance_extra = stsv.get_input_value(self.direct_normal_irradiance_extra_channel)
-            apparent_zenith = stsv.get_input_value(self.apparent_zenith_channel)
-
         internal_heat_gains_through_occupancy_in_watt = stsv.get_input_value(self.occupancy_heat_gain_channel)
 
         internal_heat_gains_through_devices_in_watt = stsv.get_input_value(self.device_heat_gain_channel)
@@ -705,17 +687,8 @@ class Building(cp.Component):
         previous_thermal_mass_temperature_in_celsius = self.state.thermal_mass_temperature_in_celsius
 
         # Performs calculations
-        if hasattr(self, "solar_gain_through_windows") is False:
-            solar_heat_gain_through_windows_in_watt = self.get_solar_heat_gain_through_windows(
-                azimuth=azimuth,
-                direct_normal_irradiance=direct_normal_irradiance,
-                direct_horizontal_irradiance=direct_horizontal_irradiance,
-                global_horizontal_irradiance=global_horizontal_irradiance,
-                direct_normal_irradiance_extra=direct_normal_irradiance_extra,
-                apparent_zenith=apparent_zenith,
-            )
-        else:
-            solar_heat_gain_through_windows_in_watt = self.solar_heat_gain_through_windows[timestep]
+        # the solar gains of the whole year are calculated or read from the cache in i_prepare_simulation
+        solar_heat_gain_through_windows_in_watt = self.solar_heat_gain_through_windows[timestep]
 
         # calc total thermal power to building from all heat sources
 
@@ -863,33 +836,28 @@ class Building(cp.Component):
             self.window_open,
         )
 
-        # Saves solar gains cache
-        if not self.is_in_cache:
-            self.cache[timestep] = solar_heat_gain_through_windows_in_watt
-            if timestep + 1 == self.my_simulation_parameters.timesteps:
-                database = pd.DataFrame(
-                    self.cache,
-                    columns=["solar_gain_through_windows"],
-                )
-                database.to_csv(
-                    self.cache_file_path,
-                    sep=",",
-                    decimal=".",
-                    index=False,
-                )
-
     # =================================================================================================================================
 
-    def i_save_state(
-        self,
-    ) -> None:
-        """Save the current state."""
-        self.previous_state = self.state.self_copy()
-
     def i_prepare_simulation(
         self,
     ) -> None:
         """Prepare the simulation."""
+        weather = self.get_connected_weather()
+        weather_year_values = weather.prepare_year_values()
+        is_in_cache, self.cache_file_path = self.get_year_cache_file(weather)
+        if not is_in_cache:
+            # the solar gains of the whole year are calculated here, so wait if another simulation calculates them
+            is_in_cache = cache_files.CACHE_STORE.claim(self.cache_file_path)
+        if is_in_cache:
+            solar_gains_of_year = cache_files.read_cache_columns(self.cache_file_path)["solar_gain_through_windows"]
+            check_year_rows(self.cache_file_path, solar_gains_of_year, weather)
+        else:
+            solar_gains_of_year = self.calculate_year_cache(weather_year_values)
+        # the simulated period starts at the offset of the start date in the year
+        self.solar_heat_gain_through_windows = solar_gains_of_year[
+            utils.get_year_slice(self.my_simulation_parameters, len(solar_gains_of_year))
+        ]
+
         if self.buildingconfig.predictive:
             # get weather forecast to compute forecasted solar gains
 
@@ -910,18 +878,14 @@ class Building(cp.Component):
                 key=SingletonDictKeyEnum.WEATHERGLOBALHORIZONTALIRRADIANCEYEARLYFORECAST
             )
 
-            solar_gains_forecast = []
-            for i in range(self.my_simulation_parameters.timesteps):
-                solar_gains_forecast_yearly = self.get_solar_heat_gain_through_windows(
-                    azimuth=azimuth_forecast[i],
-                    direct_normal_irradiance=direct_normal_irradiance_forecast[i],
-                    direct_horizontal_irradiance=direct_horizontal_irradiance_forecast[i],
-                    global_horizontal_irradiance=global_horizontal_irradiance_forecast[i],
-                    direct_normal_irradiance_extra=direct_normal_irradiance_extra_forecast[i],
-                    apparent_zenith=apparent_zenith_forecast[i],
-                )
-
-                solar_gains_forecast.append(solar_gains_forecast_yearly)
+            solar_gains_forecast = self.calculate_solar_heat_gains_through_windows(
+                azimuth=azimuth_forecast,
+                direct_normal_irradiance=direct_normal_irradiance_forecast,
+                direct_horizontal_irradiance=direct_horizontal_irradiance_forecast,
+                global_horizontal_irradiance=global_horizontal_irradiance_forecast,
+                direct_normal_irradiance_extra=direct_normal_irradiance_extra_forecast,
+                apparent_zenith=apparent_zenith_forecast,
+            )
 
             # get internal gains forecast
             internal_gains_forecast = SingletonSimRepository().get_entry(
@@ -960,11 +924,60 @@ class Building(cp.Component):
                 entry=phi_ia_forecast,
             )
 
-    def i_restore_state(
+    def calculate_solar_heat_gains_through_windows(
         self,
-    ) -> None:
-        """Restore the previous state."""
-        self.state = self.previous_state.self_copy()
+        azimuth: Any,
+        direct_normal_irradiance: Any,
+        direct_horizontal_irradiance: Any,
+        global_horizontal_irradiance: Any,
+        direct_normal_irradiance_extra: Any,
+        apparent_zenith: Any,
+    ) -> List[float]:
+        """Calculates the solar heat gains through the windows of all timesteps from the weather of all timesteps."""
+        return [
+            self.get_solar_heat_gain_through_windows(
+                azimuth=azimuth[i],
+                direct_normal_irradiance=direct_normal_irradiance[i],
+                direct_horizontal_irradiance=direct_horizontal_irradiance[i],
+                global_horizontal_irradiance=global_horizontal_irradiance[i],
+                direct_normal_irradiance_extra=direct_normal_irradiance_extra[i],
+                apparent_zenith=apparent_zenith[i],
+            )
+            for i in range(len(azimuth))
+        ]
+
+    def calculate_year_cache(self, weather_year_values: Dict[str, np.ndarray]) -> np.ndarray:
+        """Calculates the solar heat gains of the whole year from the weather of the whole year and caches them."""
+        solar_heat_gains = self.calculate_solar_heat_gains_through_windows(
+            azimuth=weather_year_values["azimuth"],
+            direct_normal_irradiance=weather_year_values["DNI"],
+            direct_horizontal_irradiance=weather_year_values["DHI"],
+            global_horizontal_irradiance=weather_year_values["GHI"],
+            direct_normal_irradiance_extra=weather_year_values["DNIextra"],
+            apparent_zenith=weather_year_values["apparent_zenith"],
+        )
+        return cache_files.write_cache_columns(
+            self.cache_file_path, {"solar_gain_through_windows": solar_heat_gains}
+        )["solar_gain_through_windows"]
+
+    def precompute_cache(self, weather: Weather) -> None:
+        """Calculates the solar heat gains of the whole year from the prepared weather and caches them."""
+        _, self.cache_file_path = self.get_year_cache_file(weather)
+        self.calculate_year_cache(weather.prepare_year_values())
+
+    def get_year_cache_file(self, weather: Weather) -> Tuple[bool, str]:
+        """Gets the year entry of the solar gains, which is keyed by the building and the weather."""
+        _, weather_cache_filepath = weather.get_year_cache_file()
+        return utils.get_year_cache_file(
+            self.config.name,
+            self.buildingconfig,
+            self.my_simulation_parameters,
+            source_cache_key=cache_files.get_cache_key(weather_cache_filepath),
+        )
+
+    def get_connected_weather(self) -> Weather:
+        """Gets the weather that the building is connected to."""
+        return get_connected_weather(self, self.direct_normal_irradiance_channel)
 
     def i_doublecheck(
         self,
@@ -1092,15 +1105,6 @@ class Building(cp.Component):
             )
 
             total_windows_area += self.my_building_information.scaled_window_areas_in_m2[index]
-        # if nothing exists, initialize the empty arrays for caching, else read stuff
-        if not self.is_in_cache:  # cache_filepath is None or  (not os.path.isfile(cache_filepath)):
-            self.cache = [0] * self.my_simulation_parameters.timesteps
-        else:
-            self.solar_heat_gain_through_windows = pd.read_csv(
-                self.cache_file_path,
-                sep=",",
-                decimal=".",
-            )["solar_gain_through_windows"].tolist()
 
         return windows, total_windows_area
 
@@ -2394,12 +2398,15 @@ class BuildingInformation:
         self,
     ):
         """Get the building code from a TABULA building."""
-        d_f = pd.read_csv(
+        d_f = memo_cache.MEMO_CACHE.get_or_load(
             utils.HISIMPATH["housing"],
-            decimal=",",
-            sep=";",
-            encoding="cp1252",
-            low_memory=False,
+            lambda: pd.read_csv(
+                utils.HISIMPATH["housing"],
+                decimal=",",
+                sep=";",
+                encoding="cp1252",
+                low_memory=False,
+            ),
         )
 
         # Gets parameters from chosen building
@@ -102,9 +102,14 @@ class EMSConfig(cp.ConfigBase):
         return config
 
 
-class EMSState:
+class EMSState(cp.ArrayState):
     """Saves the state of the Energy Management System."""
 
+    __slots__ = ()
+    production_in_watt: float
+    consumption_uncontrolled_in_watt: float
+    consumption_ems_controlled_in_watt: float
+
     def __init__(
         self,
         production: float,
@@ -112,18 +117,11 @@ class EMSState:
         consumption_ems_controlled: float,
     ) -> None:
         """Initialize the heat pump controller state."""
+        super().__init__()
         self.production_in_watt = production
         self.consumption_uncontrolled_in_watt = consumption_uncontrolled
         self.consumption_ems_controlled_in_watt = consumption_ems_controlled
 
-    def clone(self) -> "EMSState":
-        """Copy EMSState efficiently."""
-        return EMSState(
-            production=self.production_in_watt,
-            consumption_uncontrolled=self.consumption_uncontrolled_in_watt,
-            consumption_ems_controlled=self.consumption_ems_controlled_in_watt,
-        )
-
 
 class L2GenericEnergyManagementSystem(dynamic_component.DynamicComponent):
     """Surplus electricity controller - time step based.
@@ -199,8 +197,9 @@ class L2GenericEnergyManagementSystem(dynamic_component.DynamicComponent):
             my_display_config=my_display_config,
         )
 
-        self.state = EMSState(production=0, consumption_uncontrolled=0, consumption_ems_controlled=0)
-        self.previous_state = self.state.clone()
+        self.state = self.add_array_state(
+            EMSState(production=0, consumption_uncontrolled=0, consumption_ems_controlled=0)
+        )
 
         self.component_types_sorted: List[lt.ComponentType] = []
         self.inputs_sorted: List[ComponentInput] = []
@@ -695,15 +694,6 @@ class L2GenericEnergyManagementSystem(dynamic_component.DynamicComponent):
         """Writes relevant information to report."""
         return self.ems_config.get_string_dict()
 
-    def i_save_state(self) -> None:
-        """Saves the state."""
-        # abändern, siehe Storage
-        self.previous_state = self.state
-
-    def i_restore_state(self) -> None:
-        """Restores the state."""
-        self.state = self.previous_state
-
     def i_prepare_simulation(self) -> None:
         """Prepares the simulation."""
         pass
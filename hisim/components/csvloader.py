@@ -3,9 +3,10 @@
 # clean
 
 import os
-from typing import List
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
+import numpy as np
 import pandas as pd
 
 
@@ -136,6 +137,12 @@ class CSVLoader(cp.Component):
         """Simulates the component."""
         stsv.set_output_value(self.output1_channel, float(self.column[timestep]) * self.multiplier)
 
+    def get_precomputed_outputs(self) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        """Returns the scaled csv column for all timesteps."""
+        return {
+            self.output1_channel: self.column[: self.my_simulation_parameters.timesteps, 0] * self.multiplier
+        }
+
     def i_prepare_simulation(self) -> None:
         """Prepare the simulation."""
         pass
@@ -144,6 +151,13 @@ class CSVLoader(cp.Component):
         """Saves the state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues) -> None:
         """Doublechecks."""
         pass
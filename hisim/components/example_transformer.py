@@ -69,6 +69,7 @@ class ExampleTransformer(Component):
     TransformerInput2 = "Optional Input1"
     TransformerOutput = "MyTransformerOutput"
     TransformerOutput2 = "MyTransformerOutput2"
+    is_pure_within_timestep = True
 
     def __init__(
         self,
@@ -128,6 +129,13 @@ class ExampleTransformer(Component):
         """Restores previous state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_prepare_simulation(self) -> None:
         """Prepares the simulation."""
         pass
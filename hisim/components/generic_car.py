@@ -16,7 +16,7 @@ from dataclasses_json import dataclass_json
 
 from hisim import component as cp
 from hisim import loadtypes as lt
-from hisim import utils, log
+from hisim import cache_files, utils, log
 from hisim.component import OpexCostDataClass, CapexCostDataClass
 from hisim.components.configuration import EmissionFactorsAndCostsForFuelsConfig
 from hisim.simulationparameters import SimulationParameters
@@ -495,12 +495,15 @@ class Car(cp.Component):
             parameter_class=config,
             my_simulation_parameters=self.my_simulation_parameters,
         )
+        if not file_exists:
+            # wait if another simulation transforms the same car data
+            file_exists = cache_files.CACHE_STORE.claim(cache_filepath)
         if file_exists:
             # load from cache
             log.information("Generic car data is taken from cache.")
-            dataframe = pd.read_csv(cache_filepath, sep=",", decimal=".", encoding="cp1252")
-            self.car_location = dataframe["car_location"].tolist()
-            self.meters_driven = dataframe["meters_driven"].tolist()
+            cached_columns = cache_files.read_cache_columns(cache_filepath)
+            self.car_location = cached_columns["car_location"]
+            self.meters_driven = cached_columns["meters_driven"]
 
         else:
             # compare time resolution of LPG to time resolution of hisim
@@ -558,9 +561,9 @@ class Car(cp.Component):
                 self.car_location = self.car_location
 
             # save data in cache
-            database = pd.DataFrame({"car_location": self.car_location, "meters_driven": self.meters_driven})
-            database.to_csv(cache_filepath)
-            del database
+            cache_files.write_cache_columns(
+                cache_filepath, {"car_location": self.car_location, "meters_driven": self.meters_driven}
+            )
 
     def resample_meters_driven(self, meters_driven: List, seconds_per_timestep: int) -> Any:
         """Resample meters driven according to simulation time resolution."""
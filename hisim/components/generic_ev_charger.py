@@ -17,6 +17,7 @@ import pandas as pd
 from hisim.simulationparameters import SimulationParameters
 from hisim import component as cp
 from hisim import loadtypes as lt
+from hisim import cache_files
 from hisim import utils
 
 
@@ -227,11 +228,13 @@ class VehiclePure(cp.Component):
         cache_file_exists, cache_filepath = utils.get_cache_file(
             self.config.name, self.evconfig, self.my_simulation_parameters
         )
+        if not cache_file_exists:
+            # wait if another simulation reads the same vehicle profile
+            cache_file_exists = cache_files.CACHE_STORE.claim(cache_filepath)
         if cache_file_exists:
-            self.car_in_charging_station = pd.read_csv(cache_filepath, sep=",", decimal=".")[
-                "CarInChargingStation"
-            ].tolist()
-            self.discharge = pd.read_csv(cache_filepath, sep=",", decimal=".")["Discharge"].tolist()
+            cached_columns = cache_files.read_cache_columns(cache_filepath)
+            self.car_in_charging_station = cached_columns["CarInChargingStation"]
+            self.discharge = cached_columns["Discharge"]
         else:
 
             def open_sql(path, table_name):
@@ -299,17 +302,11 @@ class VehiclePure(cp.Component):
                         else:
                             discharge_stats.append(0)
 
-            data: List = []
-            data.append(car_in_charging_station)
-            data.append(discharge_stats)
-            data = list(map(list, zip(*data)))
-
-            data_parameters = ["CarInChargingStation", "Discharge"]
-            database = pd.DataFrame(data, columns=data_parameters)
-
-            self.car_in_charging_station = car_in_charging_station
-            self.discharge = discharge_stats
-            database.to_csv(cache_filepath)
+            cached_columns = cache_files.write_cache_columns(
+                cache_filepath, {"CarInChargingStation": car_in_charging_station, "Discharge": discharge_stats}
+            )
+            self.car_in_charging_station = cached_columns["CarInChargingStation"]
+            self.discharge = cached_columns["Discharge"]
             # utils.save_cache("Vehicle", [self.evconfig.profile_name], database)
 
     def i_save_state(self) -> None:
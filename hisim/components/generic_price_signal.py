@@ -3,7 +3,7 @@
 # clean
 
 import os
-from typing import List, Any, Optional
+from typing import List, Any, Optional, Dict, Tuple
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
 import pandas as pd
@@ -147,12 +147,19 @@ class PriceSignal(cp.Component):
         """Restores the state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues) -> None:
         """Doublechecks."""
         pass
 
-    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
-        """Outputs price signal of time step."""
+    def get_price_forecasts(self) -> Tuple[List[float], List[float]]:
+        """Gets the injection and purchase price forecasts, which do not depend on the timestep."""
         priceinjectionforecast = [0.1]
         pricepurchaseforecast = [0.5]
         if self.config.predictive_control and self.config.prediction_horizon:
@@ -187,7 +194,10 @@ class PriceSignal(cp.Component):
         else:
             priceinjectionforecast = [0.1]
             pricepurchaseforecast = [0.5]
+        return priceinjectionforecast, pricepurchaseforecast
 
+    def publish_price_forecasts(self, priceinjectionforecast: List[float], pricepurchaseforecast: List[float]) -> None:
+        """Writes the price forecasts to the singleton sim repository."""
         SingletonSimRepository().set_entry(
             key=SingletonDictKeyEnum.PRICEINJECTIONFORECAST24H,
             entry=priceinjectionforecast,
@@ -196,9 +206,24 @@ class PriceSignal(cp.Component):
             key=SingletonDictKeyEnum.PRICEPURCHASEFORECAST24H,
             entry=pricepurchaseforecast,
         )
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Outputs price signal of time step."""
+        priceinjectionforecast, pricepurchaseforecast = self.get_price_forecasts()
+        self.publish_price_forecasts(priceinjectionforecast, pricepurchaseforecast)
         stsv.set_output_value(self.price_purchase_channel, pricepurchaseforecast[0])
         stsv.set_output_value(self.price_injection_channel, priceinjectionforecast[0])
 
+    def get_precomputed_outputs(self) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        """Returns the constant prices for all timesteps and publishes the forecasts once."""
+        priceinjectionforecast, pricepurchaseforecast = self.get_price_forecasts()
+        self.publish_price_forecasts(priceinjectionforecast, pricepurchaseforecast)
+        timesteps = self.my_simulation_parameters.timesteps
+        return {
+            self.price_purchase_channel: np.full(timesteps, pricepurchaseforecast[0], dtype=np.float64),
+            self.price_injection_channel: np.full(timesteps, priceinjectionforecast[0], dtype=np.float64),
+        }
+
     def build_dummy(self, start: int, end: int) -> None:
         """Initialization of information if step function is used for prices."""
         self.start = start
@@ -6,9 +6,8 @@
 import datetime
 import enum
 import math
-import os
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -16,12 +15,14 @@ import pvlib
 from dataclasses_json import dataclass_json
 
 # Owned
+from hisim import cache_files
 from hisim import component as cp
 from hisim import loadtypes as lt
 from hisim import log
+from hisim import memo_cache
 from hisim import utils
 from hisim.component import ConfigBase, OpexCostDataClass, CapexCostDataClass
-from hisim.components.weather import Weather
+from hisim.components.weather import Weather, check_year_rows, get_connected_weather
 from hisim.sim_repository_singleton import (
     SingletonSimRepository,
     SingletonDictKeyEnum,
@@ -62,6 +63,14 @@ https://github.com/NREL/SAM/tree/patch/deploy/libraries
 """
 
 
+def read_database(file_path: str, index_col: Optional[int] = None) -> pd.DataFrame:
+    """Reads a module or inverter database, which is kept in memory for the next PV systems of the process."""
+    database: pd.DataFrame = memo_cache.MEMO_CACHE.get_or_load(
+        file_path, lambda: pd.read_csv(file_path, index_col=index_col)
+    )
+    return database
+
+
 class PVLibModuleAndInverterEnum(enum.Enum):
     """Module and inverter database options.
 
@@ -311,15 +320,13 @@ class PVSystem(cp.Component):
         """Initialize the class."""
         self.my_simulation_parameters = my_simulation_parameters
         self.pvconfig = config
-        self.ac_power_ratios_for_all_timesteps_data: List = []
-        self.ac_power_ratios_for_all_timesteps_output: List = []
+        self.ac_power_ratios_for_all_timesteps_output: Union[List, np.ndarray] = []
         self.cache_filepath: str
         self.modules: Any
         self.inverter: Any
         self.inverters: Any
         self.module: Any
         self.coordinates: Any
-        self.data_length: int = self.my_simulation_parameters.timesteps
         self.temperature_model_parameters = (
             pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["pvsyst"]["freestanding"]
             if self.pvconfig.module_database == PVLibModuleAndInverterEnum.CEC_MODULE_DATABASE
@@ -581,88 +588,18 @@ class PVSystem(cp.Component):
     ) -> None:
         """Simulate the component."""
 
-        # check if results could be found in cache and if the lists have
-        # the right length
-        if (
-            hasattr(self, "ac_power_ratios_for_all_timesteps_output")
-            and len(self.ac_power_ratios_for_all_timesteps_output) == self.data_length
-        ):
-            stsv.set_output_value(
-                self.electricity_output_channel,
-                self.ac_power_ratios_for_all_timesteps_output[timestep] * self.pvconfig.power_in_watt,
-            )
-            stsv.set_output_value(
-                self.electricity_energy_output_channel,
-                self.ac_power_ratios_for_all_timesteps_output[timestep]
-                * self.pvconfig.power_in_watt
-                * self.my_simulation_parameters.seconds_per_timestep
-                / 3600,
-            )
-
-        # calculate pv system outputs with pvlib
-        else:
-            dni = stsv.get_input_value(self.dni_channel)
-            dni_extra = stsv.get_input_value(self.dni_extra_channel)
-            dhi = stsv.get_input_value(self.dhi_channel)
-            ghi = stsv.get_input_value(self.ghi_channel)
-            azimuth = stsv.get_input_value(self.azimuth_channel)
-            temperature = stsv.get_input_value(self.t_out_channel)
-            wind_speed = stsv.get_input_value(self.wind_speed_channel)
-            apparent_zenith = stsv.get_input_value(self.apparent_zenith_channel)
-
-            if self.config.module_database == PVLibModuleAndInverterEnum.CEC_MODULE_DATABASE:
-                simulate_fct = self.simulate_cec
-            elif self.config.module_database == PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE:
-                simulate_fct = self.simulate_sandia
-            else:
-                raise KeyError(
-                    f"""The module database '{self.config.module_database}'
-                    is not available."""
-                )
-
-            ac_power_ratio = simulate_fct(
-                dni_extra=dni_extra,
-                dni=dni,
-                dhi=dhi,
-                ghi=ghi,
-                azimuth=azimuth,
-                apparent_zenith=apparent_zenith,
-                temperature=temperature,
-                wind_speed=wind_speed,
-                surface_azimuth=self.pvconfig.azimuth,
-                surface_tilt=self.pvconfig.tilt,
-            )
-
-            ac_power_in_watt = ac_power_ratio * self.pvconfig.power_in_watt
-
-            # if you wanted to access the temperature forecast from the
-            # weather component:
-            # val = self.simulation_repository.get_entry(
-            #   Weather.Weather_Temperature_Forecast_24h
-            # )
-
-            stsv.set_output_value(self.electricity_output_channel, ac_power_in_watt)
-            stsv.set_output_value(
-                self.electricity_energy_output_channel,
-                ac_power_in_watt * self.my_simulation_parameters.seconds_per_timestep / 3600,
-            )
-
-            # cache results at the end of the simulation
-            self.ac_power_ratios_for_all_timesteps_data[timestep] = ac_power_ratio
-
-            if timestep + 1 == self.data_length:
-                dict_with_results = {
-                    "output_power": self.ac_power_ratios_for_all_timesteps_data,  # noqa: E501
-                }
-
-                database = pd.DataFrame(
-                    dict_with_results,
-                    columns=[
-                        "output_power",
-                    ],
-                )
-
-                database.to_csv(self.cache_filepath, sep=",", decimal=".", index=False)
+        # the pv results of the whole year are calculated or read from the cache in i_prepare_simulation
+        stsv.set_output_value(
+            self.electricity_output_channel,
+            self.ac_power_ratios_for_all_timesteps_output[timestep] * self.pvconfig.power_in_watt,
+        )
+        stsv.set_output_value(
+            self.electricity_energy_output_channel,
+            self.ac_power_ratios_for_all_timesteps_output[timestep]
+            * self.pvconfig.power_in_watt
+            * self.my_simulation_parameters.seconds_per_timestep
+            / 3600,
+        )
 
         if self.pvconfig.predictive_control and self.pvconfig.prediction_horizon is not None:
             last_forecast_timestep = int(
@@ -717,6 +654,14 @@ class PVSystem(cp.Component):
         """Restores the state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """The pv results are calculated before the simulation, so there is no state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """The pv results do not change during the simulation."""
+        pass
+
     def write_to_report(self):
         """Write to the report."""
         return self.pvconfig.get_string_dict()
@@ -725,122 +670,43 @@ class PVSystem(cp.Component):
         """Doublechecks."""
         pass
 
+    def get_precomputed_outputs(self) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        """Returns the cached pv outputs for all timesteps.
+
+        With predictive control the outputs are set in i_simulate, which also sets the pv forecast.
+        """
+        if self.pvconfig.predictive_control:
+            return None
+        ac_power_in_watt = (
+            np.array(self.ac_power_ratios_for_all_timesteps_output, dtype=np.float64) * self.pvconfig.power_in_watt
+        )
+        return {
+            self.electricity_output_channel: ac_power_in_watt,
+            self.electricity_energy_output_channel: ac_power_in_watt
+            * self.my_simulation_parameters.seconds_per_timestep
+            / 3600,
+        }
+
     def i_prepare_simulation(self) -> None:
         """Prepares the component for the simulation."""
-        file_exists, self.cache_filepath = utils.get_cache_file(
-            self.config.name, self.pvconfig, self.my_simulation_parameters
-        )
+        weather = self.get_connected_weather()
+        weather_year_values = weather.prepare_year_values()
+        file_exists, self.cache_filepath = self.get_year_cache_file(weather)
+        if not file_exists:
+            # the pv results of the whole year are calculated here, so wait if another simulation calculates them
+            file_exists = cache_files.CACHE_STORE.claim(self.cache_filepath)
 
         if file_exists:
             log.information("Get PV results from cache.")
-            self.ac_power_ratios_for_all_timesteps_output = pd.read_csv(self.cache_filepath, sep=",", decimal=".")[
-                "output_power"
-            ].tolist()
-
-            if len(self.ac_power_ratios_for_all_timesteps_output) != self.my_simulation_parameters.timesteps:
-                raise Exception(
-                    "Reading the cached PV values seems to have failed. "
-                    + "Expected "
-                    + str(self.my_simulation_parameters.timesteps)
-                    + " values, but got "
-                    + str(len(self.ac_power_ratios_for_all_timesteps_output))
-                )
+            ac_power_ratios_of_year = cache_files.read_cache_columns(self.cache_filepath)["output_power"]
+            check_year_rows(self.cache_filepath, ac_power_ratios_of_year, weather)
         else:
-            if SingletonSimRepository().exist_entry(key=SingletonDictKeyEnum.LOCATION):
-                SingletonSimRepository().get_entry(key=SingletonDictKeyEnum.LOCATION)
-            else:
-                raise KeyError(
-                    """The key weather_location was not found in the singleton
-                    sim repository. Please check in your system setup if
-                    the weather component was added to the simulator before
-                    the pv system."""
-                )
-
-            # read module from pvlib database online or read from csv files in
-            # hisim/inputs/photovoltaic/data_processed
-            self.module = self.get_modules_from_database(
-                module_database=self.pvconfig.module_database,
-                load_module_data=self.pvconfig.load_module_data,
-                module_name=self.pvconfig.module_name,
-            )
-
-            # read inverter from pvlib database online or read from csv files
-            # in hisim/inputs/photovoltaic/data_processed
-            self.inverter = self.get_inverters_from_database(
-                inverter_database=self.pvconfig.inverter_database,
-                load_module_data=self.pvconfig.load_module_data,
-                inverter_name=self.pvconfig.inverter_name,
-            )
-
-            # when predictive control is activated, the PV simulation is run
-            # beforhand to make forecasting easier
-            if self.pvconfig.predictive_control:
-                # get yearly weather data from dictionary
-                dni_extra = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERDIRECTNORMALIRRADIANCEEXTRAYEARLYFORECAST  # noqa: E501
-                )
-                dni = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERDIRECTNORMALIRRADIANCEYEARLYFORECAST  # noqa: E501
-                )
-                dhi = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERDIFFUSEHORIZONTALIRRADIANCEYEARLYFORECAST  # noqa: E501
-                )
-                ghi = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERGLOBALHORIZONTALIRRADIANCEYEARLYFORECAST  # noqa: E501
-                )
-                azimuth = SingletonSimRepository().get_entry(key=SingletonDictKeyEnum.WEATHERAZIMUTHYEARLYFORECAST)
-                apparent_zenith = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERAPPARENTZENITHYEARLYFORECAST  # noqa: E501
-                )
-                temperature = SingletonSimRepository().get_entry(
-                    key=SingletonDictKeyEnum.WEATHERTEMPERATUREOUTSIDEYEARLYFORECAST  # noqa: E501
-                )
-                wind_speed = SingletonSimRepository().get_entry(key=SingletonDictKeyEnum.WEATHERWINDSPEEDYEARLYFORECAST)
-
-                x_simplephotovoltaic = []
-                for i in range(self.my_simulation_parameters.timesteps):
-                    # calculate outputs
-                    if self.pvconfig.module_database == PVLibModuleAndInverterEnum.CEC_MODULE_DATABASE:
-                        simulate_fct = self.simulate_cec
-                    elif self.pvconfig.module_database == PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE:
-                        simulate_fct = self.simulate_sandia
-                    ac_power_ratio = simulate_fct(
-                        dni_extra=dni_extra[i],
-                        dni=dni[i],
-                        dhi=dhi[i],
-                        ghi=ghi[i],
-                        azimuth=azimuth[i],
-                        apparent_zenith=apparent_zenith[i],
-                        temperature=temperature[i],
-                        wind_speed=wind_speed[i],
-                        surface_azimuth=self.pvconfig.azimuth,
-                        surface_tilt=self.pvconfig.tilt,
-                    )
-
-                    # append lists
-                    x_simplephotovoltaic.append(ac_power_ratio)
-
-                self.ac_power_ratios_for_all_timesteps_output = x_simplephotovoltaic
-
-                # cache predictive control results
-                dict_with_results = {
-                    "output_power": self.ac_power_ratios_for_all_timesteps_output,  # noqa: E501
-                }
-
-                database = pd.DataFrame(
-                    dict_with_results,
-                    columns=[
-                        "output_power",
-                    ],
-                )
-
-                database.to_csv(self.cache_filepath, sep=",", decimal=".", index=False)
-
-            else:
-                # create empty result lists as a preparation for caching
-                # in i_simulate
-
-                self.ac_power_ratios_for_all_timesteps_data = [0] * self.my_simulation_parameters.timesteps
+            self.load_module_and_inverter()
+            ac_power_ratios_of_year = self.calculate_year_cache(weather_year_values)
+        # the simulated period starts at the offset of the start date in the year
+        self.ac_power_ratios_for_all_timesteps_output = ac_power_ratios_of_year[
+            utils.get_year_slice(self.my_simulation_parameters, len(ac_power_ratios_of_year))
+        ]
 
         if self.pvconfig.predictive:
             pv_forecast_yearly = [
@@ -852,6 +718,99 @@ class PVSystem(cp.Component):
                 entry=pv_forecast_yearly,
             )
 
+    def load_module_and_inverter(self) -> None:
+        """Loads the module and the inverter of the PV system."""
+        # read module from pvlib database online or read from csv files in
+        # hisim/inputs/photovoltaic/data_processed
+        self.module = self.get_modules_from_database(
+            module_database=self.pvconfig.module_database,
+            load_module_data=self.pvconfig.load_module_data,
+            module_name=self.pvconfig.module_name,
+        )
+
+        # read inverter from pvlib database online or read from csv files
+        # in hisim/inputs/photovoltaic/data_processed
+        self.inverter = self.get_inverters_from_database(
+            inverter_database=self.pvconfig.inverter_database,
+            load_module_data=self.pvconfig.load_module_data,
+            inverter_name=self.pvconfig.inverter_name,
+        )
+
+    def calculate_ac_power_ratios(
+        self,
+        dni_extra: Any,
+        dni: Any,
+        dhi: Any,
+        ghi: Any,
+        azimuth: Any,
+        apparent_zenith: Any,
+        temperature: Any,
+        wind_speed: Any,
+    ) -> List[float]:
+        """Calculates the AC power ratios of all timesteps from the weather of all timesteps."""
+        if self.pvconfig.module_database == PVLibModuleAndInverterEnum.CEC_MODULE_DATABASE:
+            simulate_fct = self.simulate_cec
+        elif self.pvconfig.module_database == PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE:
+            simulate_fct = self.simulate_sandia
+        else:
+            raise KeyError(
+                f"""The module database '{self.pvconfig.module_database}'
+                is not available."""
+            )
+        ac_power_ratios = []
+        for i in range(len(dni)):
+            ac_power_ratio = simulate_fct(
+                dni_extra=dni_extra[i],
+                dni=dni[i],
+                dhi=dhi[i],
+                ghi=ghi[i],
+                azimuth=azimuth[i],
+                apparent_zenith=apparent_zenith[i],
+                temperature=temperature[i],
+                wind_speed=wind_speed[i],
+                surface_azimuth=self.pvconfig.azimuth,
+                surface_tilt=self.pvconfig.tilt,
+            )
+            ac_power_ratios.append(ac_power_ratio)
+        return ac_power_ratios
+
+    def calculate_year_cache(self, weather_year_values: Dict[str, np.ndarray]) -> np.ndarray:
+        """Calculates the AC power ratios of the whole year from the weather of the whole year and caches them."""
+        ac_power_ratios = self.calculate_ac_power_ratios(
+            dni_extra=weather_year_values["DNIextra"],
+            dni=weather_year_values["DNI"],
+            dhi=weather_year_values["DHI"],
+            ghi=weather_year_values["GHI"],
+            azimuth=weather_year_values["azimuth"],
+            apparent_zenith=weather_year_values["apparent_zenith"],
+            temperature=weather_year_values["t_out"],
+            wind_speed=weather_year_values["Wspd"],
+        )
+        return cache_files.write_cache_columns(self.cache_filepath, {"output_power": ac_power_ratios})["output_power"]
+
+    def precompute_cache(self, weather: Weather) -> None:
+        """Calculates the AC power ratios of the whole year from the prepared weather and caches them.
+
+        This is what i_prepare_simulation calculates without a cache, so the simulation only reads the cache later.
+        """
+        _, self.cache_filepath = self.get_year_cache_file(weather)
+        self.load_module_and_inverter()
+        self.calculate_year_cache(weather.prepare_year_values())
+
+    def get_year_cache_file(self, weather: Weather) -> Tuple[bool, str]:
+        """Gets the year entry of the PV cache, which is keyed by the PV system and the weather."""
+        _, weather_cache_filepath = weather.get_year_cache_file()
+        return utils.get_year_cache_file(
+            self.config.name,
+            self.pvconfig,
+            self.my_simulation_parameters,
+            source_cache_key=cache_files.get_cache_key(weather_cache_filepath),
+        )
+
+    def get_connected_weather(self) -> Weather:
+        """Gets the weather that the PV system is connected to."""
+        return get_connected_weather(self, self.dni_channel)
+
     def interpolate(self, pd_database: Any, year: Any) -> Any:
         """Interpolates."""
         lastday = pd.Series(
@@ -885,12 +844,10 @@ class PVSystem(cp.Component):
         # get modules from input data csv files
         else:
             if module_database == PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE:
-                modules = pd.read_csv(
-                    os.path.join(utils.HISIMPATH["photovoltaic"]["sandia_modules_new"]),
-                )
+                modules = read_database(utils.HISIMPATH["photovoltaic"]["sandia_modules_new"])
 
             elif module_database == PVLibModuleAndInverterEnum.CEC_MODULE_DATABASE:
-                modules = pd.read_csv(os.path.join(utils.HISIMPATH["photovoltaic"]["cec_modules"]))
+                modules = read_database(utils.HISIMPATH["photovoltaic"]["cec_modules"])
             else:
                 raise KeyError(
                     f"""The module database {module_database} is not integrated
@@ -947,10 +904,7 @@ class PVSystem(cp.Component):
         else:
             # this is the old csv file used in hisim
             if inverter_database == PVLibModuleAndInverterEnum.SANDIA_INVERTER_DATABASE:
-                inverters = pd.read_csv(
-                    os.path.join(utils.HISIMPATH["photovoltaic"]["sandia_inverters"]),
-                    index_col=0,
-                )
+                inverters = read_database(utils.HISIMPATH["photovoltaic"]["sandia_inverters"], index_col=0)
                 # choose inverter from inverters database
                 inverter = inverters[inverter_name]
                 # transform to numeric types
@@ -958,9 +912,7 @@ class PVSystem(cp.Component):
 
             # this would be the new one, but not tested yet
             elif inverter_database == PVLibModuleAndInverterEnum.CEC_INVERTER_DATABASE:
-                inverters = pd.read_csv(
-                    os.path.join(utils.HISIMPATH["photovoltaic"]["cec_inverters"]),
-                )
+                inverters = read_database(utils.HISIMPATH["photovoltaic"]["cec_inverters"])
                 # choose inverter from inverters database
                 inverter = inverters.loc[inverters["Name"] == inverter_name]
 
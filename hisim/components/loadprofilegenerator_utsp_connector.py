@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union, Set
 import copy
 import enum
+import numpy as np
 import pandas as pd
 from dataclasses_json import dataclass_json
 
@@ -40,7 +41,7 @@ from hisim.components.configuration import EmissionFactorsAndCostsForFuelsConfig
 # Owned
 from hisim import component as cp
 from hisim import loadtypes as lt
-from hisim import log, utils
+from hisim import cache_files, log, utils
 from hisim.components.configuration import HouseholdWarmWaterDemandConfig, PhysicsConfig
 from hisim.simulationparameters import SimulationParameters
 from hisim.component import OpexCostDataClass
@@ -237,6 +238,13 @@ class UtspLpgConnector(cp.Component):
         """Empty method as component has no state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_prepare_simulation(self) -> None:
         """Prepares the simulation."""
         pass
@@ -310,6 +318,26 @@ class UtspLpgConnector(cp.Component):
             demandforecast = self.electricity_consumption[timestep:last_forecast_timestep]
             self.simulation_repository.set_entry(self.Electricity_Demand_Forecast_24h, demandforecast)
 
+    def get_precomputed_outputs(self) -> Optional[Dict[cp.ComponentOutput, np.ndarray]]:
+        """Returns the load profiles for all timesteps, unless the demand forecast is needed in i_simulate.
+
+        The warm water inputs do not change any of the outputs, so they are not needed for this.
+        """
+        if self.config.predictive_control:
+            return None
+        timesteps = self.my_simulation_parameters.timesteps
+        electricity_consumption = np.array(self.electricity_consumption[:timesteps], dtype=np.float64)
+        return {
+            self.number_of_residents_channel: np.array(self.number_of_residents[:timesteps], dtype=np.float64),
+            self.heating_by_residents_channel: np.array(self.heating_by_residents[:timesteps], dtype=np.float64),
+            self.heating_by_devices_channel: np.array(self.heating_by_devices[:timesteps], dtype=np.float64),
+            self.electricity_output_channel: electricity_consumption,
+            self.electricity_energy_output_channel: electricity_consumption
+            * self.my_simulation_parameters.seconds_per_timestep
+            / 3600,
+            self.water_consumption_channel: np.array(self.water_consumption[:timesteps], dtype=np.float64),
+        }
+
     def get_resolution(self) -> str:
         """Gets the temporal resolution of the simulation as a string in the format hh:mm:ss.
 
@@ -606,75 +634,63 @@ class UtspLpgConnector(cp.Component):
             cache_filepath = list_item[1]
             log.information("Lpg cache filepath " + cache_filepath)
 
+            # wait if another simulation requests the same profiles, predefined profiles are not cached
+            if not file_exists and self.utsp_config.data_acquisition_mode in (
+                LpgDataAcquisitionMode.USE_UTSP,
+                LpgDataAcquisitionMode.USE_LOCAL_LPG,
+            ):
+                file_exists = cache_files.CACHE_STORE.claim(cache_filepath)
+
             # a cache file exists
-            if file_exists:
-                with open(cache_filepath, "r", encoding="utf-8") as file:
-                    cache_content: Dict = json.load(file)
-                    cache_complete = True
-
-                # check if cache content has correct format, otherwise delete cache (because it is from older version) and run new request
-                if (
-                    not all(isinstance(values, str) for values in cache_content.values())
-                    and "saved_files" in cache_content.keys()
-                ):
-                    log.information(
-                        "An older LPG cache version was found but it's not usuable anymore. Therefore it will be deleted."
-                    )
-                    os.remove(cache_filepath)
-                    cache_complete = False
+            cache_content = (
+                cache_files.load_cache_columns(cache_filepath, self.read_older_cache_file) if file_exists else None
+            )
+            cache_complete = cache_content is not None
 
-            if cache_complete:
+            if cache_content is not None:
                 log.information("LPG data taken from cache. ")
-                for cache_key in cache_content.keys():
-                    # get dataframe from cache content
-                    cached_data = io.StringIO(cache_content[cache_key])
-                    dataframe = pd.read_csv(cached_data, sep=",", decimal=".", encoding="cp1252", index_col=0)
-
-                    if cache_key == "data":
-
-                        number_of_residents = dataframe["number_of_residents"].tolist()
-                        heating_by_residents = dataframe["heating_by_residents"].tolist()
-                        electricity_consumption = dataframe["electricity_consumption"].tolist()
-                        water_consumption = dataframe["water_consumption"].tolist()
-                        heating_by_devices = dataframe["heating_by_devices"].to_list()
-
-                        number_of_residents = dataframe["number_of_residents"].tolist()
-
-                        # write lists to dict
-                        value_dict["electricity_consumption"].append(electricity_consumption)
-                        value_dict["heating_by_devices"].append(heating_by_devices)
-                        value_dict["heating_by_residents"].append(heating_by_residents)
-                        value_dict["water_consumption"].append(water_consumption)
-                        value_dict["number_of_residents"].append(number_of_residents)
-
-                        # sum over all household profiles
-                        (
-                            self.electricity_consumption,
-                            self.heating_by_residents,
-                            self.water_consumption,
-                            self.heating_by_devices,
-                            self.number_of_residents,
-                        ) = self.get_result_lists_by_summing_over_value_dict(value_dict=value_dict)
-
-                        self.max_hot_water_demand = max(self.water_consumption)
-
-                    elif cache_key == "car_data":
-                        # process car data from cache
-                        for key, dict_values in self.car_data_dict.items():
-                            # transform dataframe column to dict, then get original types of dict values and lastly append to
-                            # car_data_dict
-                            transformed_data_dict = self.transform_dict_values(dataframe[key].to_dict())
-                            dict_values.append(transformed_data_dict)
-
-                    elif cache_key == "flexibility_data":
-                        # process flexibility data from cache
-                        # transform dataframe column to dict, then get original types of dict values and lastly append to
-                        # car_and_flexibility_dict
-                        transformed_data_dict = self.transform_dict_values(dataframe["flexibility"].to_dict())
-                        self.flexibility_data_dict["flexibility"].append(transformed_data_dict)
-
-                    else:
-                        raise KeyError(f"The cache content key {cache_key} could not be recognized.")
+                number_of_residents = cache_content["number_of_residents"].tolist()
+                heating_by_residents = cache_content["heating_by_residents"].tolist()
+                electricity_consumption = cache_content["electricity_consumption"].tolist()
+                water_consumption = cache_content["water_consumption"].tolist()
+                heating_by_devices = cache_content["heating_by_devices"].tolist()
+
+                # write lists to dict
+                value_dict["electricity_consumption"].append(electricity_consumption)
+                value_dict["heating_by_devices"].append(heating_by_devices)
+                value_dict["heating_by_residents"].append(heating_by_residents)
+                value_dict["water_consumption"].append(water_consumption)
+                value_dict["number_of_residents"].append(number_of_residents)
+
+                # sum over all household profiles
+                (
+                    self.electricity_consumption,
+                    self.heating_by_residents,
+                    self.water_consumption,
+                    self.heating_by_devices,
+                    self.number_of_residents,
+                ) = self.get_result_lists_by_summing_over_value_dict(value_dict=value_dict)
+
+                self.max_hot_water_demand = max(self.water_consumption)
+
+                # process car data from cache
+                car_dataframe = pd.read_csv(
+                    io.StringIO(cache_content["car_data"].item()), sep=",", decimal=".", index_col=0
+                )
+                for key, dict_values in self.car_data_dict.items():
+                    # transform dataframe column to dict, then get original types of dict values and lastly append to
+                    # car_data_dict
+                    transformed_data_dict = self.transform_dict_values(car_dataframe[key].to_dict())
+                    dict_values.append(transformed_data_dict)
+
+                # process flexibility data from cache
+                # transform dataframe column to dict, then get original types of dict values and lastly append to
+                # car_and_flexibility_dict
+                flexibility_dataframe = pd.read_csv(
+                    io.StringIO(cache_content["flexibility_data"].item()), sep=",", decimal=".", index_col=0
+                )
+                transformed_data_dict = self.transform_dict_values(flexibility_dataframe["flexibility"].to_dict())
+                self.flexibility_data_dict["flexibility"].append(transformed_data_dict)
 
             if not cache_complete or file_exists is False:
                 log.information(
@@ -937,6 +953,9 @@ class UtspLpgConnector(cp.Component):
                             entry=self.heating_by_residents,
                         )
 
+            # release the key if the profiles were not cached, for example because the request failed
+            cache_files.CACHE_STORE.release(cache_filepath)
+
     def get_result_lists_by_summing_over_value_dict(
         self, value_dict: Dict[Any, Any]
     ) -> Tuple[List, List, List, List, List]:
@@ -1758,27 +1777,61 @@ class UtspLpgConnector(cp.Component):
         car_dataframe = pd.DataFrame(car_data_dict)
         flexibility_dataframe = pd.DataFrame(flexibility_data_dict)
 
-        # dump the dataframe to str i the cache content dict
-        cache_content: Dict[str, Any] = {
-            "data": loadprofile_dataframe,
-            "car_data": car_dataframe,
-            "flexibility_data": flexibility_dataframe,
-        }
-
-        for key, d_f in cache_content.items():
-            cache_file = io.StringIO()
-            d_f.to_csv(cache_file)
-            d_f_str = cache_file.getvalue()
-            cache_content.update({key: d_f_str})
-
-        with open(cache_filepath, "w", encoding="utf-8") as file:
-            json.dump(cache_content, file)
+        cache_files.write_cache_columns(
+            cache_filepath,
+            self.get_cache_columns(
+                loadprofile_dataframe=loadprofile_dataframe,
+                car_dataframe=car_dataframe,
+                flexibility_dataframe=flexibility_dataframe,
+            ),
+        )
         del loadprofile_dataframe
         del car_dataframe
         del flexibility_dataframe
 
         log.information(f"Caching of lpg utsp results finished. Cache filepath is {cache_filepath}.")
 
+    def get_cache_columns(
+        self, loadprofile_dataframe: pd.DataFrame, car_dataframe: pd.DataFrame, flexibility_dataframe: pd.DataFrame
+    ) -> Dict[str, Any]:
+        """Get the columns of the cache file.
+
+        The load profiles are stored as columns, the car and flexibility data as csv strings.
+        """
+        cache_columns: Dict[str, Any] = {
+            column: loadprofile_dataframe[column].to_numpy() for column in loadprofile_dataframe.columns
+        }
+        for key, d_f in {"car_data": car_dataframe, "flexibility_data": flexibility_dataframe}.items():
+            cache_file = io.StringIO()
+            d_f.to_csv(cache_file)
+            cache_columns[key] = cache_file.getvalue()
+        return cache_columns
+
+    def read_older_cache_file(self, cache_filepath: str) -> Optional[Dict[str, Any]]:
+        """Read the columns of an older cache file, which contains the dataframes as csv strings in a json file."""
+        with open(cache_filepath, "r", encoding="utf-8") as file:
+            cache_content: Dict = json.load(file)
+
+        # check if cache content has correct format, otherwise the cache is from an older version and it will be deleted
+        if (
+            not all(isinstance(values, str) for values in cache_content.values())
+            and "saved_files" in cache_content.keys()
+        ):
+            log.information(
+                "An older LPG cache version was found but it's not usuable anymore. Therefore it will be deleted."
+            )
+            return None
+
+        dataframes = {
+            cache_key: pd.read_csv(io.StringIO(cached_data), sep=",", decimal=".", encoding="cp1252", index_col=0)
+            for cache_key, cached_data in cache_content.items()
+        }
+        return self.get_cache_columns(
+            loadprofile_dataframe=dataframes["data"],
+            car_dataframe=dataframes["car_data"],
+            flexibility_dataframe=dataframes["flexibility_data"],
+        )
+
     def load_results_and_transform_string_to_data(self, list_of_result_files: List[str]) -> List[Any]:
         """Transform a string of data into a data."""
         list_of_data = []
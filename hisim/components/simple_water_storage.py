@@ -273,21 +273,25 @@ class SimpleDHWStorageConfig(cp.ConfigBase):
         return config
 
 
-@dataclass
-class SimpleWaterStorageState:
+class SimpleWaterStorageState(cp.ArrayState):
     """SimpleHotWaterStorageState class."""
 
-    mean_water_temperature_in_celsius: float = 25.0
-    temperature_loss_in_celsius_per_timestep: float = 0.0
-    heat_loss_in_watt: float = 0.0
+    __slots__ = ()
+    mean_water_temperature_in_celsius: float
+    temperature_loss_in_celsius_per_timestep: float
+    heat_loss_in_watt: float
 
-    def self_copy(self):
-        """Copy the Simple Hot Water Storage State."""
-        return SimpleWaterStorageState(
-            self.mean_water_temperature_in_celsius,
-            self.temperature_loss_in_celsius_per_timestep,
-            self.heat_loss_in_watt,
-        )
+    def __init__(
+        self,
+        mean_water_temperature_in_celsius: float = 25.0,
+        temperature_loss_in_celsius_per_timestep: float = 0.0,
+        heat_loss_in_watt: float = 0.0,
+    ) -> None:
+        """Initializes the state."""
+        super().__init__()
+        self.mean_water_temperature_in_celsius = mean_water_temperature_in_celsius
+        self.temperature_loss_in_celsius_per_timestep = temperature_loss_in_celsius_per_timestep
+        self.heat_loss_in_watt = heat_loss_in_watt
 
 
 class SimpleWaterStorage(cp.Component):
@@ -589,11 +593,12 @@ class SimpleHotWaterStorage(SimpleWaterStorage):
         self.position_hot_water_storage_in_system = self.waterstorageconfig.position_hot_water_storage_in_system
         self.build(heat_exchanger_is_present=self.waterstorageconfig.heat_exchanger_is_present)
 
-        self.state: SimpleWaterStorageState = SimpleWaterStorageState(
-            mean_water_temperature_in_celsius=self.mean_water_temperature_in_water_storage_in_celsius,
-            temperature_loss_in_celsius_per_timestep=0,
+        self.state: SimpleWaterStorageState = self.add_array_state(
+            SimpleWaterStorageState(
+                mean_water_temperature_in_celsius=self.mean_water_temperature_in_water_storage_in_celsius,
+                temperature_loss_in_celsius_per_timestep=0,
+            )
         )
-        self.previous_state = self.state.self_copy()
 
         # =================================================================================================================================
         # Input channels
@@ -870,14 +875,6 @@ class SimpleHotWaterStorage(SimpleWaterStorage):
         """Write a report."""
         return self.waterstorageconfig.get_string_dict()
 
-    def i_save_state(self) -> None:
-        """Save the current state."""
-        self.previous_state = self.state.self_copy()
-
-    def i_restore_state(self) -> None:
-        """Restore the previous state."""
-        self.state = self.previous_state.self_copy()
-
     def i_doublecheck(self, timestep: int, stsv: SingleTimeStepValues) -> None:
         """Doublecheck."""
         pass
@@ -1467,12 +1464,13 @@ class SimpleDHWStorage(SimpleWaterStorage):
 
         self.build()
 
-        self.state: SimpleWaterStorageState = SimpleWaterStorageState(
-            mean_water_temperature_in_celsius=self.mean_water_temperature_in_water_storage_in_celsius,
-            temperature_loss_in_celsius_per_timestep=0,
-            heat_loss_in_watt=0,
+        self.state: SimpleWaterStorageState = self.add_array_state(
+            SimpleWaterStorageState(
+                mean_water_temperature_in_celsius=self.mean_water_temperature_in_water_storage_in_celsius,
+                temperature_loss_in_celsius_per_timestep=0,
+                heat_loss_in_watt=0,
+            )
         )
-        self.previous_state = self.state.self_copy()
 
         # =================================================================================================================================
         # Input channels
@@ -1845,14 +1843,6 @@ class SimpleDHWStorage(SimpleWaterStorage):
         """Write a report."""
         return self.waterstorageconfig.get_string_dict()
 
-    def i_save_state(self) -> None:
-        """Save the current state."""
-        self.previous_state = self.state.self_copy()
-
-    def i_restore_state(self) -> None:
-        """Restore the previous state."""
-        self.state = self.previous_state.self_copy()
-
     def i_doublecheck(self, timestep: int, stsv: SingleTimeStepValues) -> None:
         """Doublecheck."""
         pass
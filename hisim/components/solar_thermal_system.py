@@ -5,6 +5,7 @@ import datetime
 from typing import Any, List, Optional
 from dataclasses import dataclass
 from dataclasses_json import dataclass_json
+import numpy as np
 import pandas as pd
 from oemof.thermal.solar_thermal_collector import flat_plate_precalc
 from hisim.component import (
@@ -18,7 +19,7 @@ from hisim.component import (
     SingleTimeStepValues,
     DisplayConfig,
 )
-from hisim import loadtypes, log, utils
+from hisim import cache_files, loadtypes, log, utils
 from hisim.components.configuration import EmissionFactorsAndCostsForFuelsConfig, PhysicsConfig
 from hisim.components.simple_water_storage import SimpleDHWStorage
 from hisim.components.weather import Weather
@@ -214,7 +215,7 @@ class SolarThermalSystem(Component):
         # Initialized variables
         self.factor = 1.0
         self.precalc_data_for_all_timesteps_data: List = []
-        self.precalc_data_for_all_timesteps_output: List = []
+        self.collectors_heat_for_all_timesteps_output: np.ndarray = np.array([])
         self.cache_filepath: str
 
         # Add inputs
@@ -598,25 +599,25 @@ class SolarThermalSystem(Component):
 
     def i_prepare_simulation(self) -> None:
         """Prepare the simulation."""
+        # the collectors heat depends on the inlet temperature of the simulation, so it is cached by period
         file_exists, self.cache_filepath = utils.get_cache_file(
             self.config.name, self.config, self.my_simulation_parameters
         )
 
         if file_exists:
             log.information("Get solar thermal results from cache.")
-            df = pd.read_csv(self.cache_filepath, sep=",", decimal=".")
-            # Reconstruct list of DataFrames per timestep (if needed)
-            self.precalc_data_for_all_timesteps_output = [
-                group_df.drop(columns="timestep") for _, group_df in df.groupby("timestep", sort=True)
+            # the precalculated data has one row per timestep, only the collectors heat is used
+            self.collectors_heat_for_all_timesteps_output = cache_files.read_cache_columns(self.cache_filepath)[
+                "collectors_heat"
             ]
 
-            if len(self.precalc_data_for_all_timesteps_output) != self.my_simulation_parameters.timesteps:
+            if len(self.collectors_heat_for_all_timesteps_output) != self.my_simulation_parameters.timesteps:
                 raise Exception(
                     "Reading the cached solar thermal precalc values seems to have failed. "
                     + "Expected "
                     + str(self.my_simulation_parameters.timesteps)
                     + " values, but got "
-                    + str(len(self.precalc_data_for_all_timesteps_output))
+                    + str(len(self.collectors_heat_for_all_timesteps_output))
                 )
 
         # create empty result lists as a preparation for caching
@@ -638,11 +639,11 @@ class SolarThermalSystem(Component):
         temperature_collector_inlet_deg_c = stsv.get_input_value(self.water_temperature_input_channel)
         # check if results could be found in cache and if the list has
         # the right length
-        if (
-            hasattr(self, "precalc_data_for_all_timesteps_output")
-            and len(self.precalc_data_for_all_timesteps_output) == self.my_simulation_parameters.timesteps
-        ):
-            precalc_data = self.precalc_data_for_all_timesteps_output[timestep]  # use precalculated data from cache
+        timesteps = self.my_simulation_parameters.timesteps
+        results_from_cache = len(self.collectors_heat_for_all_timesteps_output) == timesteps
+        if results_from_cache:
+            # use precalculated data from cache
+            collectors_heat = self.collectors_heat_for_all_timesteps_output[timestep]
 
         # calculate outputs
         else:
@@ -669,8 +670,9 @@ class SolarThermalSystem(Component):
                 irradiance_diffuse=pd.Series(diffuse_horizontal_irradiance_w_m2, index=[time_ind]),
                 temp_amb=pd.Series(ambient_air_temperature_deg_c, index=[time_ind]),
             )
+            collectors_heat = precalc_data["collectors_heat"].iloc[0]
 
-        thermal_power_output_w = precalc_data["collectors_heat"].iloc[0] * self.config.area_m2
+        thermal_power_output_w = collectors_heat * self.config.area_m2
 
         thermal_energy_output_wh = thermal_power_output_w * self.my_simulation_parameters.seconds_per_timestep / 3.6e3
         required_mass_flow_output_kg_s = thermal_power_output_w / (
@@ -718,17 +720,22 @@ class SolarThermalSystem(Component):
             electric_power_demand_solar_pump_w,
         )
         # cache results at the end of the simulation
-        self.precalc_data_for_all_timesteps_data[timestep] = precalc_data
+        if not results_from_cache:
+            self.precalc_data_for_all_timesteps_data[timestep] = precalc_data
 
-        if timestep + 1 == self.my_simulation_parameters.timesteps:
-            for i, df in enumerate(self.precalc_data_for_all_timesteps_data):
-                df["timestep"] = i  # Add timestep column to each
+            if timestep + 1 == self.my_simulation_parameters.timesteps and utils.simulates_every_timestep(
+                self.my_simulation_parameters
+            ):
+                for i, df in enumerate(self.precalc_data_for_all_timesteps_data):
+                    df["timestep"] = i  # Add timestep column to each
 
-            # Combine all into one large DataFrame
-            full_df = pd.concat(self.precalc_data_for_all_timesteps_data, ignore_index=True)
+                # Combine all into one large DataFrame
+                full_df = pd.concat(self.precalc_data_for_all_timesteps_data, ignore_index=True)
 
-            # Save directly as flat CSV
-            full_df.to_csv(self.cache_filepath, sep=",", decimal=".", index=False)
+                # Save the columns of the flat DataFrame
+                cache_files.write_cache_columns(
+                    self.cache_filepath, {column: full_df[column].to_numpy() for column in full_df.columns}
+                )
 
 
 @dataclass
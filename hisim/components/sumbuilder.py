@@ -38,6 +38,7 @@ class CalculateOperation(cp.Component):
 
     operations_available = ["Sum", "Subtract", "Multiply", "Divide"]
     Output = "Output"
+    is_pure_within_timestep = True
 
     def __init__(
         self,
@@ -104,6 +105,13 @@ class CalculateOperation(cp.Component):
         """Restores the state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues) -> None:
         """Double checks the results."""
         pass
@@ -134,6 +142,7 @@ class SumBuilderForTwoInputs(Component):
     SumInput1 = "Input 1"
     SumInput2 = "Input 2"
     SumOutput = "Sum"
+    is_pure_within_timestep = True
 
     def __init__(
         self,
@@ -185,6 +194,13 @@ class SumBuilderForTwoInputs(Component):
         """Restores state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_prepare_simulation(self) -> None:
         """Prepares the simulation."""
         pass
@@ -211,6 +227,7 @@ class SumBuilderForThreeInputs(Component):
     SumInput2 = "Input 2"
     SumInput3 = "Input 3"
     SumOutput = "Sum"
+    is_pure_within_timestep = True
 
     def __init__(
         self,
@@ -267,6 +284,13 @@ class SumBuilderForThreeInputs(Component):
         """Restores a state."""
         pass
 
+    def i_get_state(self) -> Any:
+        """No state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state for checkpoints."""
+
     def i_doublecheck(self, timestep: int, stsv: cp.SingleTimeStepValues) -> None:
         """For double checking results."""
         pass
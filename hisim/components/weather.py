@@ -7,16 +7,17 @@ import math
 import os
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import pvlib
 
 from hisim import loadtypes as lt
-from hisim import log, utils
-from hisim.component import Component, ComponentOutput, ConfigBase, SingleTimeStepValues, DisplayConfig, OpexCostDataClass, CapexCostDataClass
+from hisim import cache_files, log, utils
+from hisim.component import Component, ComponentInput, ComponentOutput, ConfigBase, SingleTimeStepValues, DisplayConfig, OpexCostDataClass, CapexCostDataClass
 from hisim.simulationparameters import SimulationParameters
+from hisim.sim_repository import SimRepository
 from hisim.sim_repository_singleton import SingletonSimRepository, SingletonDictKeyEnum
 from hisim.postprocessing.kpi_computation.kpi_structure import KpiEntry
 
@@ -426,6 +427,9 @@ class WeatherConfig(ConfigBase):
 class Weather(Component):
     """Provide thermal and solar conditions of local weather."""
 
+    # the outputs only depend on the timestep
+    is_pure_within_timestep = True
+
     # Inputs
     # None
 
@@ -565,18 +569,22 @@ class Weather(Component):
             output_description=f"here a description for {self.DailyAverageOutsideTemperatures} will follow.",
         )
 
-        self.temperature_list: List[float]
-        self.dni_list: List[float]
-        self.dniextra_list: List[float]
-        self.altitude_list: List[float]
-        self.azimuth_list: List[float]
-        self.wind_speed_list: List[float]
-        self.pressure_list: List[float]
-        self.ghi_list: List[float]
-        self.apparent_zenith_list: List[float]
-        self.dhi_list: List[float]
-        self.dry_bulb_list: List[float]
-        self.daily_average_outside_temperature_list_in_celsius: List[float]
+        # the cached columns of the whole year, from which PV systems and buildings calculate their year caches
+        self.year_values: Optional[Dict[str, np.ndarray]] = None
+        self.location_dict: Dict[str, Any] = {}
+        # the values of the simulated period
+        self.temperature_list: Union[List[float], np.ndarray]
+        self.dni_list: Union[List[float], np.ndarray]
+        self.dniextra_list: Union[List[float], np.ndarray]
+        self.altitude_list: Union[List[float], np.ndarray]
+        self.azimuth_list: Union[List[float], np.ndarray]
+        self.wind_speed_list: Union[List[float], np.ndarray]
+        self.pressure_list: Union[List[float], np.ndarray]
+        self.ghi_list: Union[List[float], np.ndarray]
+        self.apparent_zenith_list: Union[List[float], np.ndarray]
+        self.dhi_list: Union[List[float], np.ndarray]
+        self.dry_bulb_list: Union[List[float], np.ndarray]
+        self.daily_average_outside_temperature_list_in_celsius: Union[List[float], np.ndarray]
 
     def write_to_report(self):
         """Write configuration to the report."""
@@ -594,6 +602,14 @@ class Weather(Component):
         """Double chekc."""
         pass
 
+    def i_get_state(self) -> Any:
+        """The weather data does not change, so there is no state for checkpoints."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """Makes sure the outputs are set in the next timestep."""
+        self.last_timestep_with_update = -1
+
     def i_simulate(self, timestep: int, stsv: SingleTimeStepValues, force_convergence: bool) -> None:
         """Performs the simulation."""
         if self.last_timestep_with_update == timestep:
@@ -630,145 +646,86 @@ class Weather(Component):
             self.simulation_repository.set_entry(self.Weather_Temperature_Forecast_24h, temperatureforecast)
         self.last_timestep_with_update = timestep
 
-    def i_prepare_simulation(self) -> None:
-        """Generates the lists to be used later."""
-        seconds_per_timestep = self.my_simulation_parameters.seconds_per_timestep
+    def get_precomputed_outputs(self) -> Optional[Dict[ComponentOutput, np.ndarray]]:
+        """Returns the weather data for all timesteps, unless the temperature forecast is needed in i_simulate."""
+        if self.weather_config.predictive_control:
+            return None
+        timesteps = self.my_simulation_parameters.timesteps
+        return {
+            self.air_temperature_output: np.array(self.temperature_list[:timesteps], dtype=np.float64),
+            self.dni_output: np.array(self.dni_list[:timesteps], dtype=np.float64),
+            self.dni_extra_output: np.array(self.dniextra_list[:timesteps], dtype=np.float64),
+            self.dhi_output: np.array(self.dhi_list[:timesteps], dtype=np.float64),
+            self.ghi_output: np.array(self.ghi_list[:timesteps], dtype=np.float64),
+            self.altitude_output: np.array(self.altitude_list[:timesteps], dtype=np.float64),
+            self.azimuth_output: np.array(self.azimuth_list[:timesteps], dtype=np.float64),
+            self.wind_speed_output: np.array(self.wind_speed_list[:timesteps], dtype=np.float64),
+            self.apparent_zenith_output: np.array(self.apparent_zenith_list[:timesteps], dtype=np.float64),
+            # *100 umrechnung von hPA bzw mbar in PA
+            self.pressure_output: np.array(self.pressure_list[:timesteps], dtype=np.float64) * 100,
+            self.daily_average_outside_temperature_output: np.array(
+                self.daily_average_outside_temperature_list_in_celsius[:timesteps], dtype=np.float64
+            ),
+        }
+
+    def set_sim_repo(self, simulation_repository: SimRepository) -> None:
+        """Sets the SimRepository and registers the weather in it, so the connected components find it."""
+        super().set_sim_repo(simulation_repository)
+        simulation_repository.set_entry(get_weather_repository_key(self.component_name), self)
+
+    def get_year_cache_file(self) -> Tuple[bool, str]:
+        """Gets the year entry of the weather cache."""
+        return utils.get_year_cache_file(self.config.name, self.weather_config, self.my_simulation_parameters)
+
+    def prepare_year_values(self) -> Dict[str, np.ndarray]:
+        """Gets the weather of the whole year, which is read from the year cache or calculated and cached.
+
+        The PV systems and buildings that are connected to the weather call this before the weather itself may be
+        prepared, so the year values are only read or calculated once per simulation.
+        """
+        if self.year_values is not None:
+            return self.year_values
         log.information("Weather config: " + self.weather_config.to_json())  # type: ignore
-        location_dict = get_coordinates(
+        self.location_dict = get_coordinates(
             filepath=self.weather_config.source_path,
             source_enum=self.weather_config.data_source,
         )
-        self.simulation_repository.set_entry("weather_location", location_dict)
-        cachefound, cache_filepath = utils.get_cache_file(self.config.name, self.weather_config, self.my_simulation_parameters)
+        # the weather is always calculated and cached for the whole year, so every period of the year uses one entry
+        cachefound, cache_filepath = self.get_year_cache_file()
+        if not cachefound:
+            # wait if another simulation calculates the same weather data
+            cachefound = cache_files.CACHE_STORE.claim(cache_filepath)
         if cachefound:
-            # read cached files
-            my_weather = pd.read_csv(cache_filepath, sep=",", decimal=".", encoding="cp1252")
-            self.temperature_list = my_weather["t_out"].tolist()
-            self.daily_average_outside_temperature_list_in_celsius = my_weather["t_out_daily_average"].tolist()
-            self.dry_bulb_list = self.temperature_list
-            self.dhi_list = my_weather["DHI"].tolist()
-            self.dni_list = my_weather["DNI"].tolist()  # self np.float64( maybe not needed? - Noah
-            self.dniextra_list = my_weather["DNIextra"].tolist()
-            self.ghi_list = my_weather["GHI"].tolist()
-            self.altitude_list = my_weather["altitude"].tolist()
-            self.azimuth_list = my_weather["azimuth"].tolist()
-            self.apparent_zenith_list = my_weather["apparent_zenith"].tolist()
-            self.wind_speed_list = my_weather["Wspd"].tolist()
-            try:
-                self.pressure_list = my_weather["Pressure"].tolist()
-            except Exception:
+            # read cached files, the columns are memory mapped arrays
+            self.year_values = dict(cache_files.read_cache_columns(cache_filepath))
+            if "Pressure" not in self.year_values:
                 log.information("Weather key Pressure could not be found.")
-                self.pressure_list = [0] * len(self.wind_speed_list)
+                self.year_values["Pressure"] = np.zeros(len(self.year_values["Wspd"]))
         else:
-            tmy_data = read_test_reference_year_data(
-                weatherconfig=self.weather_config,
-                simulation_parameters=self.my_simulation_parameters,
+            self.year_values = cache_files.write_cache_columns(
+                cache_filepath, self.calculate_year_values(self.location_dict)
             )
+        return self.year_values
 
-            if self.weather_config.data_source == WeatherDataSourceEnum.NSRDB_15MIN:
-                dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
-                temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
-                dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
-                ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
-                wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
-                pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
-            elif self.weather_config.data_source in (WeatherDataSourceEnum.DWD_10MIN, WeatherDataSourceEnum.DWD_15MIN):
-                dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
-                temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
-                dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
-                ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
-                wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
-                pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
-            elif self.weather_config.data_source == WeatherDataSourceEnum.ERA5:
-                dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
-                temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
-                dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
-                ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
-                wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
-                pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
-            else:
-                dni = self.interpolate(tmy_data["DNI"], self.my_simulation_parameters.year)
-                temperature = self.interpolate(tmy_data["T"], self.my_simulation_parameters.year)
-                dhi = self.interpolate(tmy_data["DHI"], self.my_simulation_parameters.year)
-                ghi = self.interpolate(tmy_data["GHI"], self.my_simulation_parameters.year)
-                wind_speed = self.interpolate(tmy_data["Wspd"], self.my_simulation_parameters.year)
-                pressure = self.interpolate(tmy_data["Pressure"], self.my_simulation_parameters.year)
-            # calculate extra terrestrial radiation- n eeded for perez array diffuse irradiance models
-            dni_extra = pd.Series(pvlib.irradiance.get_extra_radiation(dni.index), index=dni.index)  # type: ignore
-
-            solpos = pvlib.solarposition.get_solarposition(dni.index, location_dict["latitude"], location_dict["longitude"])  # type: ignore
-            altitude = solpos["elevation"]
-            azimuth = solpos["azimuth"]
-            apparent_zenith = solpos["apparent_zenith"]
-
-            if seconds_per_timestep != 60:
-                self.temperature_list = temperature.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.dry_bulb_list = temperature.resample(str(seconds_per_timestep) + "S").mean().to_list()
-                self.calculate_daily_average_outside_temperature(
-                    temperaturelist=self.temperature_list,
-                    seconds_per_timestep=seconds_per_timestep,
-                )
-
-                self.dhi_list = dhi.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                # np.float64( ## not sure what this is fore. python float and npfloat 64 are the same.
-                self.dni_list = dni.resample(str(seconds_per_timestep) + "S").mean().tolist()  # )  # type: ignore
-                self.dniextra_list = dni_extra.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.ghi_list = ghi.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.altitude_list = altitude.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.azimuth_list = azimuth.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.apparent_zenith_list = apparent_zenith.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.wind_speed_list = wind_speed.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.pressure_list = pressure.resample(str(seconds_per_timestep) + "S").mean().tolist()
-            else:
-                self.temperature_list = temperature.tolist()
-                self.dry_bulb_list = temperature.to_list()
-                self.calculate_daily_average_outside_temperature(
-                    temperaturelist=self.temperature_list,
-                    seconds_per_timestep=seconds_per_timestep,
-                )
-                self.dhi_list = dhi.tolist()
-                self.dni_list = dni.tolist()
-                self.dniextra_list = dni_extra.tolist()
-                self.ghi_list = ghi.tolist()
-                self.altitude_list = altitude.tolist()
-                self.azimuth_list = azimuth.tolist()
-                self.apparent_zenith_list = apparent_zenith.tolist()
-                self.wind_speed_list = wind_speed.resample(str(seconds_per_timestep) + "S").mean().tolist()
-                self.pressure_list = pressure.tolist()
-
-            solardata = [
-                self.dni_list,
-                self.dhi_list,
-                self.ghi_list,
-                self.temperature_list,
-                self.altitude_list,
-                self.azimuth_list,
-                self.apparent_zenith_list,
-                self.dry_bulb_list,
-                self.wind_speed_list,
-                self.pressure_list,
-                self.dniextra_list,
-                self.daily_average_outside_temperature_list_in_celsius,
-            ]
-
-            database = pd.DataFrame(
-                np.transpose(solardata),
-                columns=[
-                    "DNI",
-                    "DHI",
-                    "GHI",
-                    "t_out",
-                    "altitude",
-                    "azimuth",
-                    "apparent_zenith",
-                    "DryBulb",
-                    "Wspd",
-                    "Pressure",
-                    "DNIextra",
-                    "t_out_daily_average",
-                ],
-            )
-            database.to_csv(cache_filepath)
+    def i_prepare_simulation(self) -> None:
+        """Generates the lists to be used later."""
+        year_values = self.prepare_year_values()
+        self.simulation_repository.set_entry("weather_location", self.location_dict)
+
+        # the simulated period starts at the offset of the start date in the year
+        year_rows = utils.get_year_slice(self.my_simulation_parameters, len(year_values["t_out"]))
+        self.temperature_list = year_values["t_out"][year_rows]
+        self.daily_average_outside_temperature_list_in_celsius = year_values["t_out_daily_average"][year_rows]
+        self.dry_bulb_list = self.temperature_list
+        self.dhi_list = year_values["DHI"][year_rows]
+        self.dni_list = year_values["DNI"][year_rows]
+        self.dniextra_list = year_values["DNIextra"][year_rows]
+        self.ghi_list = year_values["GHI"][year_rows]
+        self.altitude_list = year_values["altitude"][year_rows]
+        self.azimuth_list = year_values["azimuth"][year_rows]
+        self.apparent_zenith_list = year_values["apparent_zenith"][year_rows]
+        self.wind_speed_list = year_values["Wspd"][year_rows]
+        self.pressure_list = year_values["Pressure"][year_rows]
 
         # write one year forecast to simulation repository for PV processing -> if PV forecasts are needed
         if self.weather_config.predictive_control:
@@ -813,6 +770,100 @@ class Weather(Component):
                 entry=self.altitude_list,
             )
 
+    def calculate_year_values(self, location_dict: Dict[str, Any]) -> Dict[str, List[float]]:
+        """Calculates the weather of the whole year from the weather data, which is what the cache holds."""
+        seconds_per_timestep = self.my_simulation_parameters.seconds_per_timestep
+        tmy_data = read_test_reference_year_data(
+            weatherconfig=self.weather_config,
+            simulation_parameters=self.my_simulation_parameters,
+        )
+
+        if self.weather_config.data_source == WeatherDataSourceEnum.NSRDB_15MIN:
+            dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
+            temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
+            dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
+            ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
+            wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
+            pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
+        elif self.weather_config.data_source in (WeatherDataSourceEnum.DWD_10MIN, WeatherDataSourceEnum.DWD_15MIN):
+            dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
+            temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
+            dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
+            ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
+            wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
+            pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
+        elif self.weather_config.data_source == WeatherDataSourceEnum.ERA5:
+            dni = tmy_data["DNI"].resample("1T").asfreq().interpolate(method="linear")
+            temperature = tmy_data["T"].resample("1T").asfreq().interpolate(method="linear")
+            dhi = tmy_data["DHI"].resample("1T").asfreq().interpolate(method="linear")
+            ghi = tmy_data["GHI"].resample("1T").asfreq().interpolate(method="linear")
+            wind_speed = tmy_data["Wspd"].resample("1T").asfreq().interpolate(method="linear")
+            pressure = tmy_data["Pressure"].resample("1T").asfreq().interpolate(method="linear")
+        else:
+            dni = self.interpolate(tmy_data["DNI"], self.my_simulation_parameters.year)
+            temperature = self.interpolate(tmy_data["T"], self.my_simulation_parameters.year)
+            dhi = self.interpolate(tmy_data["DHI"], self.my_simulation_parameters.year)
+            ghi = self.interpolate(tmy_data["GHI"], self.my_simulation_parameters.year)
+            wind_speed = self.interpolate(tmy_data["Wspd"], self.my_simulation_parameters.year)
+            pressure = self.interpolate(tmy_data["Pressure"], self.my_simulation_parameters.year)
+        # calculate extra terrestrial radiation- n eeded for perez array diffuse irradiance models
+        dni_extra = pd.Series(pvlib.irradiance.get_extra_radiation(dni.index), index=dni.index)  # type: ignore
+
+        solpos = pvlib.solarposition.get_solarposition(dni.index, location_dict["latitude"], location_dict["longitude"])  # type: ignore
+        altitude = solpos["elevation"]
+        azimuth = solpos["azimuth"]
+        apparent_zenith = solpos["apparent_zenith"]
+
+        if seconds_per_timestep != 60:
+            temperature_list = temperature.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            dry_bulb_list = temperature.resample(str(seconds_per_timestep) + "S").mean().to_list()
+            daily_average_outside_temperature_list = self.calculate_daily_average_outside_temperature(
+                temperaturelist=temperature_list,
+                seconds_per_timestep=seconds_per_timestep,
+            )
+
+            dhi_list = dhi.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            # np.float64( ## not sure what this is fore. python float and npfloat 64 are the same.
+            dni_list = dni.resample(str(seconds_per_timestep) + "S").mean().tolist()  # )  # type: ignore
+            dniextra_list = dni_extra.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            ghi_list = ghi.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            altitude_list = altitude.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            azimuth_list = azimuth.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            apparent_zenith_list = apparent_zenith.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            wind_speed_list = wind_speed.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            pressure_list = pressure.resample(str(seconds_per_timestep) + "S").mean().tolist()
+        else:
+            temperature_list = temperature.tolist()
+            dry_bulb_list = temperature.to_list()
+            daily_average_outside_temperature_list = self.calculate_daily_average_outside_temperature(
+                temperaturelist=temperature_list,
+                seconds_per_timestep=seconds_per_timestep,
+            )
+            dhi_list = dhi.tolist()
+            dni_list = dni.tolist()
+            dniextra_list = dni_extra.tolist()
+            ghi_list = ghi.tolist()
+            altitude_list = altitude.tolist()
+            azimuth_list = azimuth.tolist()
+            apparent_zenith_list = apparent_zenith.tolist()
+            wind_speed_list = wind_speed.resample(str(seconds_per_timestep) + "S").mean().tolist()
+            pressure_list = pressure.tolist()
+
+        return {
+            "DNI": dni_list,
+            "DHI": dhi_list,
+            "GHI": ghi_list,
+            "t_out": temperature_list,
+            "altitude": altitude_list,
+            "azimuth": azimuth_list,
+            "apparent_zenith": apparent_zenith_list,
+            "DryBulb": dry_bulb_list,
+            "Wspd": wind_speed_list,
+            "Pressure": pressure_list,
+            "DNIextra": dniextra_list,
+            "t_out_daily_average": daily_average_outside_temperature_list,
+        }
+
     def interpolate(self, pd_database: Any, year: int) -> Any:
         """Interpolates a time series."""
         firstday = pd.Series(
@@ -893,7 +944,7 @@ class Weather(Component):
         return self.altitude_list[hoy], self.azimuth_list[hoy]
 
     def calculate_daily_average_outside_temperature(
-        self, temperaturelist: List[float], seconds_per_timestep: int
+        self, temperaturelist: Union[List[float], np.ndarray], seconds_per_timestep: int
     ) -> List[float]:
         """Calculate the daily average outside temperatures."""
         timestep_24h = int(24 * 3600 / seconds_per_timestep)
@@ -931,6 +982,43 @@ class Weather(Component):
         return []
 
 
+def get_weather_repository_key(component_name: str) -> str:
+    """Gets the key of a weather component in the simulation repository."""
+    return "Weather component " + component_name
+
+
+def get_connected_weather(component: Component, component_input: ComponentInput) -> Weather:
+    """Gets the weather that an input of a component is connected to.
+
+    The components that calculate their caches for the whole year from the weather use it in i_prepare_simulation,
+    when the inputs know their source components already. The weather is looked up in the simulation repository of
+    the component, so every simulation uses its own weather.
+    """
+    if component_input.src_object_name is None:
+        raise ValueError(
+            f"The input {component_input.fullname} is not connected, so the weather of {component.component_name} "
+            "is not known. Please connect it to a weather component."
+        )
+    weather_key = get_weather_repository_key(component_input.src_object_name)
+    if not component.simulation_repository.exist_entry(weather_key):
+        raise KeyError(
+            f"The input {component_input.fullname} is connected to {component_input.src_object_name}, which is not "
+            "a weather component of this simulation."
+        )
+    weather: Weather = component.simulation_repository.get_entry(weather_key)
+    return weather
+
+
+def check_year_rows(cache_filepath: str, values_of_year: np.ndarray, weather: Weather) -> None:
+    """Checks that a year entry that was calculated from the weather has a row for every row of the weather year."""
+    weather_rows = len(weather.prepare_year_values()["t_out"])
+    if len(values_of_year) != weather_rows:
+        raise ValueError(
+            f"The cache file {cache_filepath} has {len(values_of_year)} rows, but the weather year of "
+            f"{weather.component_name} has {weather_rows} rows. Please delete the cache file."
+        )
+
+
 def get_coordinates(filepath: str, source_enum: WeatherDataSourceEnum) -> Any:
     """Reads a test reference year file and gets the GHI, DHI and DNI from it.
 
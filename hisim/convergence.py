@@ -0,0 +1,154 @@
+"""Convergence tolerances and acceleration of the fixed point iteration of the cyclic schedule groups.
+
+After each sweep over the components of a group, the accelerator gets the outputs of the group before the sweep
+(x) and after the sweep (g(x)) and may replace the outputs with a better guess for the next sweep.
+The plain strategy keeps g(x), which is the Gauss-Seidel iteration of the simulator.
+"""
+
+# clean
+from typing import List, Optional
+
+import numpy as np
+
+from hisim import component as cp
+from hisim.simulationparameters import ConvergenceStrategy, SimulationParameters
+
+
+def get_convergence_tolerances(
+    my_simulation_parameters: SimulationParameters, all_outputs: List[cp.ComponentOutput]
+) -> np.ndarray:
+    """Gets the absolute convergence tolerance of every output.
+
+    A tolerance for the full name of an output takes precedence over a tolerance for its unit,
+    which takes precedence over the global tolerance.
+    """
+    tolerances_per_unit = my_simulation_parameters.convergence_tolerances_per_unit or {}
+    tolerances_per_output = my_simulation_parameters.convergence_tolerances_per_output or {}
+    tolerances = np.full(len(all_outputs), my_simulation_parameters.convergence_tolerance, dtype=np.float64)
+    for output in all_outputs:
+        if output.full_name in tolerances_per_output:
+            tolerances[output.global_index] = tolerances_per_output[output.full_name]
+        elif output.unit.value in tolerances_per_unit:
+            tolerances[output.global_index] = tolerances_per_unit[output.unit.value]
+    return tolerances
+
+
+class ConvergenceAccelerator:
+    """Plain fixed point iteration, which keeps the outputs of the sweep."""
+
+    def __init__(self, output_indices: np.ndarray) -> None:
+        """Initializes the accelerator for the outputs of a schedule group."""
+        self.output_indices = output_indices
+
+    def reset(self) -> None:
+        """Forgets the previous iterations, at the start of a timestep or when the iterated function changes."""
+
+    def accelerate(self, stsv: cp.SingleTimeStepValues, previous_outputs: np.ndarray) -> None:
+        """Sets the outputs of the group for the next sweep from the outputs of the group before the sweep."""
+
+
+class UnderRelaxation(ConvergenceAccelerator):
+    """Moves the outputs only a fraction of the way to the outputs of the sweep: x + w * (g(x) - x)."""
+
+    def __init__(self, output_indices: np.ndarray, relaxation_factor: float) -> None:
+        """Initializes the relaxation factor."""
+        super().__init__(output_indices)
+        self.relaxation_factor = relaxation_factor
+
+    def accelerate(self, stsv: cp.SingleTimeStepValues, previous_outputs: np.ndarray) -> None:
+        """Relaxes the outputs of the group."""
+        x = previous_outputs
+        g_of_x = stsv.values[self.output_indices]
+        stsv.values[self.output_indices] = x + self.relaxation_factor * (g_of_x - x)
+
+
+class AitkenAcceleration(ConvergenceAccelerator):
+    """Under-relaxation with the dynamic relaxation factor of the vector Aitken method.
+
+    w_k = -w_(k-1) * r_(k-1) * (r_k - r_(k-1)) / |r_k - r_(k-1)|^2 with the residuals r = g(x) - x.
+    """
+
+    def __init__(self, output_indices: np.ndarray, relaxation_factor: float) -> None:
+        """Initializes the first relaxation factor."""
+        super().__init__(output_indices)
+        self.initial_relaxation_factor = relaxation_factor
+        self.relaxation_factor = relaxation_factor
+        self.previous_residual: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Starts again with the first relaxation factor."""
+        self.relaxation_factor = self.initial_relaxation_factor
+        self.previous_residual = None
+
+    def accelerate(self, stsv: cp.SingleTimeStepValues, previous_outputs: np.ndarray) -> None:
+        """Relaxes the outputs of the group with the updated relaxation factor."""
+        x = previous_outputs
+        residual = stsv.values[self.output_indices] - x
+        if not np.all(np.isfinite(residual)):
+            self.reset()
+            return
+        if self.previous_residual is not None:
+            residual_change = residual - self.previous_residual
+            squared_norm = float(np.dot(residual_change, residual_change))
+            if squared_norm > 0:
+                self.relaxation_factor = (
+                    -self.relaxation_factor * float(np.dot(self.previous_residual, residual_change)) / squared_norm
+                )
+        self.previous_residual = residual
+        stsv.values[self.output_indices] = x + self.relaxation_factor * residual
+
+
+class AndersonAcceleration(ConvergenceAccelerator):
+    """Anderson acceleration, which combines the last iterations to minimize the residual r = g(x) - x."""
+
+    def __init__(self, output_indices: np.ndarray, depth: int) -> None:
+        """Initializes the number of iterations that are combined."""
+        super().__init__(output_indices)
+        self.depth = depth
+        self.previous_residual: Optional[np.ndarray] = None
+        self.previous_g_of_x: Optional[np.ndarray] = None
+        self.residual_changes: List[np.ndarray] = []
+        self.g_of_x_changes: List[np.ndarray] = []
+
+    def reset(self) -> None:
+        """Forgets the previous iterations."""
+        self.previous_residual = None
+        self.previous_g_of_x = None
+        self.residual_changes = []
+        self.g_of_x_changes = []
+
+    def accelerate(self, stsv: cp.SingleTimeStepValues, previous_outputs: np.ndarray) -> None:
+        """Sets the outputs of the group to the combination of the last iterations with the smallest residual."""
+        g_of_x = stsv.values[self.output_indices]
+        residual = g_of_x - previous_outputs
+        if not np.all(np.isfinite(residual)):
+            self.reset()
+            return
+        if self.previous_residual is not None and self.previous_g_of_x is not None:
+            self.residual_changes.append(residual - self.previous_residual)
+            self.g_of_x_changes.append(g_of_x - self.previous_g_of_x)
+            if len(self.residual_changes) > self.depth:
+                del self.residual_changes[0]
+                del self.g_of_x_changes[0]
+        self.previous_residual = residual
+        self.previous_g_of_x = g_of_x
+        if len(self.residual_changes) == 0:
+            return
+        gamma = np.linalg.lstsq(np.stack(self.residual_changes, axis=1), residual, rcond=None)[0]
+        stsv.values[self.output_indices] = g_of_x - np.stack(self.g_of_x_changes, axis=1) @ gamma
+
+
+def create_convergence_accelerator(
+    my_simulation_parameters: SimulationParameters, output_indices: np.ndarray
+) -> ConvergenceAccelerator:
+    """Creates the accelerator of the convergence strategy that is set in the simulation parameters."""
+    convergence_strategy = ConvergenceStrategy(my_simulation_parameters.convergence_strategy)
+    if convergence_strategy == ConvergenceStrategy.PLAIN:
+        return ConvergenceAccelerator(output_indices)
+    if convergence_strategy == ConvergenceStrategy.UNDER_RELAXATION:
+        return UnderRelaxation(output_indices, my_simulation_parameters.relaxation_factor)
+    if convergence_strategy == ConvergenceStrategy.AITKEN:
+        return AitkenAcceleration(output_indices, my_simulation_parameters.relaxation_factor)
+    if convergence_strategy == ConvergenceStrategy.ANDERSON:
+        return AndersonAcceleration(output_indices, my_simulation_parameters.anderson_depth)
+    raise ValueError(f"Unknown convergence strategy: {convergence_strategy}")
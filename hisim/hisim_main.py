@@ -1,5 +1,6 @@
 """ Main module for HiSim: Starts the Simulator. """
 # clean
+import os
 import warnings
 import importlib
 from pathlib import Path
@@ -7,6 +8,7 @@ import sys
 from datetime import datetime
 from typing import Optional
 from dotenv import load_dotenv
+import psutil
 import hisim.simulator as sim
 from hisim import log
 from hisim.simulationparameters import SimulationParameters
@@ -23,10 +25,13 @@ def main(
     # Suppress warnings (e.g., from pvlib)
     warnings.filterwarnings("ignore")
 
-    # Delete old log files
+    # Delete old log files, but not the ones of simulations that are still running
     logging_default_path = Path(log.LOGGING_DEFAULT_PATH)
     if logging_default_path.exists() and logging_default_path.is_dir():
         for file in logging_default_path.iterdir():
+            process_id = file.stem.rpartition(".")[2]
+            if process_id.isdigit() and int(process_id) != os.getpid() and psutil.pid_exists(int(process_id)):
+                continue
             try:
                 file.unlink()
             except Exception:
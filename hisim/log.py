@@ -1,10 +1,22 @@
-""" Logging functionality for all of HiSim. """
+""" Logging functionality for all of HiSim.
+
+Messages above LOGGING_LEVEL are dropped before they are formatted or written. The remaining messages are put
+into a queue and written by a background thread, which keeps one open file per log file and process.
+Every process writes its own log files, so simultaneous simulations do not append to the same file.
+Messages can be formatted lazily with %-style arguments: log.debug("Registered output %s", output.full_name).
+"""
 # clean
-from enum import IntEnum
+import atexit
 import os
+import queue
+import threading
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
 LOGGING_LEVEL = 3
 LOGGING_DEFAULT_PATH: str = r"../logs/"
+SIMULATION_LOG_FILE = "hisim_simulation.log"
+PROFILING_LOG_FILE = "profiling_timeuse.log"
 
 
 class LogPrio(IntEnum):
@@ -19,80 +31,197 @@ class LogPrio(IntEnum):
     TRACE = 6
 
 
-def error(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+PRIO_STRINGS: Dict[int, str] = {
+    LogPrio.ERROR: "ERR",
+    LogPrio.WARNING: "WRN",
+    LogPrio.INFORMATION: "IFO",
+    LogPrio.DEBUG: "DBG",
+    LogPrio.PROFILE: "PRF",
+    LogPrio.TRACE: "TRC",
+}
+
+
+def get_process_log_file_name(file_name: str, process_id: Optional[int] = None) -> str:
+    """Gets the name of the log file of a process, for example hisim_simulation.1234.log."""
+    stem, extension = os.path.splitext(file_name)
+    return f"{stem}.{os.getpid() if process_id is None else process_id}{extension}"
+
+
+def get_log_file_name_without_process_id(file_name: str) -> str:
+    """Removes the process id from the name of a log file of a process."""
+    stem, extension = os.path.splitext(file_name)
+    base_stem, _, process_id = stem.rpartition(".")
+    if base_stem and process_id.isdigit():
+        return base_stem + extension
+    return file_name
+
+
+class LogWriter:
+
+    """Writes the queued log messages of this process from a background thread."""
+
+    def __init__(self) -> None:
+        """Initializes the queue. The thread is started with the first message."""
+        self.message_queue: "queue.SimpleQueue[Tuple[str, Any]]" = queue.SimpleQueue()
+        self.file_handles: Dict[str, TextIO] = {}
+        self.thread: Optional[threading.Thread] = None
+        self.thread_lock = threading.Lock()
+
+    def write(self, file_path: str, message: str) -> None:
+        """Queues a line for a log file."""
+        if self.thread is None:
+            self.start_thread()
+        self.message_queue.put((file_path, message))
+
+    def start_thread(self) -> None:
+        """Starts the writing thread."""
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="hisim-log-writer", daemon=True)
+                self.thread.start()
+
+    def run(self) -> None:
+        """Writes all queued messages and flushes the files whenever the queue is empty."""
+        while True:
+            item: Optional[Tuple[str, Any]] = self.message_queue.get()
+            while item is not None:
+                file_path, payload = item
+                if isinstance(payload, threading.Event):
+                    self.flush_files(close=file_path == "close")
+                    payload.set()
+                else:
+                    self.write_line(file_path, payload)
+                try:
+                    item = self.message_queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            self.flush_files(close=False)
+
+    def write_line(self, file_path: str, message: str) -> None:
+        """Writes a line to the open handle of a log file."""
+        try:
+            file_handle = self.file_handles.get(file_path)
+            if file_handle is None:
+                os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                file_handle = open(file_path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+                self.file_handles[file_path] = file_handle
+            file_handle.write(message + "\n")
+        except Exception:
+            print(f"{file_path} could not be appended.")
+
+    def flush_files(self, close: bool) -> None:
+        """Flushes and optionally closes all open log files."""
+        for file_handle in self.file_handles.values():
+            try:
+                file_handle.flush()
+                if close:
+                    file_handle.close()
+            except Exception:
+                print(f"{file_handle.name} could not be written.")
+        if close:
+            self.file_handles = {}
+
+    def wait_for_writer(self, command: str) -> None:
+        """Waits until the writing thread processed all messages so far and the command."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        done = threading.Event()
+        self.message_queue.put((command, done))
+        done.wait(timeout=10)
+
+    def flush(self) -> None:
+        """Writes all queued messages to the log files."""
+        self.wait_for_writer("flush")
+
+    def close(self) -> None:
+        """Writes all queued messages and closes the log files. They are opened again by the next message."""
+        self.wait_for_writer("close")
+
+
+LOG_WRITER = LogWriter()
+
+
+def reset_log_writer_in_child_process() -> None:
+    """Gives a forked process its own log writer, because the thread and the open files belong to the parent."""
+    global LOG_WRITER  # pylint: disable=global-statement
+    LOG_WRITER = LogWriter()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_log_writer_in_child_process)
+atexit.register(lambda: LOG_WRITER.close())  # pylint: disable=unnecessary-lambda
+
+
+def flush() -> None:
+    """Write all queued log messages of this process to the log files."""
+    LOG_WRITER.flush()
+
+
+def close_log_files() -> None:
+    """Write all queued log messages of this process and close the log files, for example before moving them."""
+    LOG_WRITER.close()
+
+
+def get_log_file_paths(logging_message_path: str = LOGGING_DEFAULT_PATH) -> List[str]:
+    """Get the paths of the log files of this process in a logging path."""
+    return [
+        os.path.join(logging_message_path, get_process_log_file_name(file_name))
+        for file_name in [SIMULATION_LOG_FILE, PROFILING_LOG_FILE]
+    ]
+
+
+def format_message(message: str, args: Tuple[Any, ...]) -> str:
+    """Format a message with %-style arguments, if there are any."""
+    if args:
+        return message % args
+    return message
+
+
+def error(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
     """Log an error message."""
-    log(LogPrio.ERROR, message, logging_message_path)
+    log(LogPrio.ERROR, message, *args, logging_message_path=logging_message_path)
 
 
-def warning(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+def warning(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
     """Log a warning message."""
-    log(LogPrio.WARNING, message, logging_message_path)
+    log(LogPrio.WARNING, message, *args, logging_message_path=logging_message_path)
 
 
-def information(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+def information(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
     """Log a information message."""
-    log(LogPrio.INFORMATION, message, logging_message_path)
+    log(LogPrio.INFORMATION, message, *args, logging_message_path=logging_message_path)
 
 
-def trace(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+def trace(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
     """Log a trace message."""
-    log(LogPrio.TRACE, message, logging_message_path)
+    log(LogPrio.TRACE, message, *args, logging_message_path=logging_message_path)
 
 
-def debug(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+def debug(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
     """Log a debug message."""
-    log(LogPrio.DEBUG, message, logging_message_path)
-
-
-def profile(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
-    """Log a profile message."""
-    log(LogPrio.PROFILE, message, logging_message_path)
-    log_profile_file(message, logging_message_path)
-
-
-def log(prio: int, message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
-    """Write and print a log message."""
-    # if(prio < LogPrio.Debug):
-    prio_string: str
-    if prio == LogPrio.ERROR:
-        prio_string = "ERR"
-    elif prio == LogPrio.WARNING:
-        prio_string = "WRN"
-    elif prio == LogPrio.INFORMATION:
-        prio_string = "IFO"
-    elif prio == LogPrio.DEBUG:
-        prio_string = "DBG"
-    elif prio == LogPrio.PROFILE:
-        prio_string = "PRF"
-    elif prio == LogPrio.TRACE:
-        prio_string = "TRC"
-    else:
-        raise ValueError("Unknown log priority: " + str(prio))
-    if prio <= LOGGING_LEVEL:
-        print(str(prio_string) + ":" + message)
+    log(LogPrio.DEBUG, message, *args, logging_message_path=logging_message_path)
 
-    if not os.path.exists(logging_message_path):
-        os.makedirs(logging_message_path)
 
-    file_name = os.path.join(logging_message_path, "hisim_simulation.log")
-    try:
-        with open(file_name, "a", encoding="utf-8") as filestream:
-            filestream.write(message + "\n")
-    except Exception:
-        print("hisim_simulation.log could not be appended. "
-              "This might happen when too many simultaneous simulations are running.")
+def profile(message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+    """Log a profile message. Profile messages are always written to the profiling log file."""
+    log(LogPrio.PROFILE, message, *args, logging_message_path=logging_message_path)
+    log_profile_file(format_message(message, args), logging_message_path)
 
 
-def log_profile_file(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
-    """Write log message to logfile."""
+def log(prio: int, message: str, *args: Any, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+    """Print a log message and queue it for the log file, if its priority is within the logging level."""
+    prio_string = PRIO_STRINGS.get(prio)
+    if prio_string is None:
+        raise ValueError("Unknown log priority: " + str(prio))
+    if prio > LOGGING_LEVEL:
+        return
+    formatted_message = format_message(message, args)
+    print(prio_string + ":" + formatted_message)
+    LOG_WRITER.write(
+        os.path.join(logging_message_path, get_process_log_file_name(SIMULATION_LOG_FILE)), formatted_message
+    )
 
-    if not os.path.exists(logging_message_path):
-        os.makedirs(logging_message_path)
 
-    file_name = os.path.join(logging_message_path, "profiling_timeuse.log")
-    try:
-        with open(file_name, "a", encoding="utf-8") as filestream:
-            filestream.write(message + "\n")
-    except Exception:
-        print("profiling_timeuse.log could not be appended. "
-              "This might happen when too many simultaneous simulations are running.")
+def log_profile_file(message: str, logging_message_path: str = LOGGING_DEFAULT_PATH) -> None:
+    """Write log message to logfile."""
+    LOG_WRITER.write(os.path.join(logging_message_path, get_process_log_file_name(PROFILING_LOG_FILE)), message)
@@ -0,0 +1,243 @@
+"""Keeps the cached columns and input tables in memory for many simulations in one process.
+
+Batch drivers that call hisim_main.main repeatedly in one process would otherwise read the same cache files, like
+the weather year of a location or the LPG profiles, and the same input tables, like TABULA and the PV module
+database, from disk in every simulation. The MemoCache holds them after the first read, up to a size limit beyond
+which the least recently used entries are dropped. The cached columns are keyed by the paths of
+utils.get_cache_file, the input tables by their file paths. Entries are invalidated explicitly, for example when
+a cache file is written again.
+
+The arrays of the memo cache are read-only, and the tables must not be modified either. With share_arrays, the
+numeric columns are published as multiprocessing.shared_memory blocks that are named after the key. Worker
+processes on one node attach to a block another process published instead of reading their own copy, so they share
+one copy of each location's weather year. A block is removed when the process that published it invalidates the key
+or ends, including worker processes of multiprocessing that end normally. Blocks of worker processes that are
+terminated are removed by the resource tracker of multiprocessing when all processes have ended.
+"""
+
+# clean
+import collections
+import hashlib
+import json
+import os
+from multiprocessing import resource_tracker, shared_memory, util
+from typing import Any, Callable, Dict, List, Optional, OrderedDict, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hisim import log
+
+#: the arrays in a shared memory block start at multiples of this
+BLOCK_ALIGNMENT = 64
+#: the first bytes of a block hold the length of its JSON header, which is written last
+HEADER_LENGTH_BYTES = 8
+
+
+def get_block_name(key: str) -> str:
+    """Gets the name of the shared memory block of a key, which is short enough for all platforms."""
+    return "hisim_" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:20]
+
+
+def get_size_in_bytes(value: Any) -> int:
+    """Gets the memory that a memo entry needs."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(column.nbytes for column in value.values() if isinstance(column, np.ndarray))
+    return 0
+
+
+def align(offset: int) -> int:
+    """Rounds an offset in a block up to the next array start."""
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def is_shareable(column: Any) -> bool:
+    """Checks if a column can be stored in a shared memory block."""
+    return isinstance(column, np.ndarray) and not column.dtype.hasobject
+
+
+def get_block_layout(columns: Dict[str, np.ndarray]) -> Tuple[bytes, int, Dict[str, Tuple[str, Any, int]]]:
+    """Gets the header, the size of the block and the dtype, shape and offset of every column."""
+    layout: Dict[str, Tuple[str, Any, int]] = {}
+    data_size = 0
+    for name, column in columns.items():
+        layout[name] = (column.dtype.str, list(column.shape), data_size)
+        data_size = align(data_size + column.nbytes)
+    header = json.dumps(layout).encode("utf-8")
+    data_offset = align(HEADER_LENGTH_BYTES + len(header))
+    return header, data_offset + data_size, layout
+
+
+def get_block_buffer(block: shared_memory.SharedMemory) -> memoryview:
+    """Gets the memory of a shared memory block."""
+    if block.buf is None:
+        raise ValueError("The shared memory block " + block.name + " was closed.")
+    return block.buf
+
+
+def view_block_columns(block: shared_memory.SharedMemory) -> Optional[Dict[str, np.ndarray]]:
+    """Gets read-only views of the columns in a block, or None while the block is still being written."""
+    buffer = get_block_buffer(block)
+    header_length = int.from_bytes(buffer[:HEADER_LENGTH_BYTES], "little")
+    if header_length == 0:
+        return None
+    layout = json.loads(bytes(buffer[HEADER_LENGTH_BYTES : HEADER_LENGTH_BYTES + header_length]))
+    data_offset = align(HEADER_LENGTH_BYTES + header_length)
+    columns: Dict[str, np.ndarray] = {}
+    for name, (dtype, shape, offset) in layout.items():
+        column: np.ndarray = np.ndarray(
+            tuple(shape), dtype=np.dtype(dtype), buffer=buffer, offset=data_offset + offset
+        )
+        column.flags.writeable = False
+        columns[name] = column
+    return columns
+
+
+class MemoCache:
+    """Holds the values that were read from disk in memory, up to a size limit."""
+
+    def __init__(self, size_limit_in_megabytes: float = 1024.0, share_arrays: bool = False) -> None:
+        """Initializes an empty memo cache."""
+        self.size_limit_in_bytes = int(size_limit_in_megabytes * 1024 * 1024)
+        self.share_arrays = False
+        self.entries: OrderedDict[str, Tuple[Any, int]] = collections.OrderedDict()
+        self.size_in_bytes = 0
+        # the shared memory blocks by key, the blocks stay mapped until the process ends, as the arrays of
+        # simulations may still view them
+        self.shared_blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.invalidated_blocks: List[shared_memory.SharedMemory] = []
+        self.published_keys: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.configure(share_arrays=share_arrays)
+
+    def configure(self, size_limit_in_megabytes: Optional[float] = None, share_arrays: Optional[bool] = None) -> None:
+        """Changes the size limit or if the arrays are shared with other processes.
+
+        Sharing is enabled in the batch driver before it starts the worker processes, so they all use the resource
+        tracker of the driver, which removes the blocks of worker processes that are terminated. Forked workers
+        inherit the setting, spawned workers enable it as well, for example in the initializer of the pool.
+        """
+        if size_limit_in_megabytes is not None:
+            self.size_limit_in_bytes = int(size_limit_in_megabytes * 1024 * 1024)
+            self.drop_least_recently_used()
+        if share_arrays is not None:
+            self.share_arrays = share_arrays
+            if share_arrays and os.name == "posix":
+                resource_tracker.ensure_running()
+
+    def get_or_load(self, key: str, load: Callable[[], Any]) -> Any:
+        """Gets the value of a key and loads it on the first access.
+
+        Values are dictionaries of columns or tables. With share_arrays, the columns are taken from the shared
+        memory block of another process if there is one, otherwise the loaded columns are published.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key][0]
+        self.misses += 1
+        value = self.attach_shared_columns(key) if self.share_arrays else None
+        if value is None:
+            value = load()
+            if isinstance(value, dict):
+                for column in value.values():
+                    if isinstance(column, np.ndarray):
+                        column.flags.writeable = False
+                if self.share_arrays:
+                    value = self.publish_shared_columns(key, value)
+        size_in_bytes = get_size_in_bytes(value)
+        if size_in_bytes <= self.size_limit_in_bytes:
+            self.entries[key] = (value, size_in_bytes)
+            self.size_in_bytes += size_in_bytes
+            self.drop_least_recently_used()
+        return value
+
+    def drop(self, key: str) -> None:
+        """Drops the entry of a key from the memory of this process, its shared memory block is kept."""
+        _, size_in_bytes = self.entries.pop(key, (None, 0))
+        self.size_in_bytes -= size_in_bytes
+
+    def invalidate(self, key: str) -> None:
+        """Removes a key, for example because its cache file is written again.
+
+        If this process published the shared memory block of the key, the block is removed, so other processes
+        load the key again. Other processes that hold the key already keep it until they invalidate it as well.
+        """
+        self.drop(key)
+        block = self.shared_blocks.pop(key, None)
+        if block is None:
+            return
+        self.invalidated_blocks.append(block)
+        if key in self.published_keys:
+            self.published_keys.remove(key)
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                log.warning("The shared memory block " + block.name + " was removed already.")
+
+    def clear(self) -> None:
+        """Removes all keys and the shared memory blocks that this process published."""
+        for key in list(self.entries) + list(self.shared_blocks):
+            self.invalidate(key)
+
+    def drop_least_recently_used(self) -> None:
+        """Drops the least recently used entries beyond the size limit."""
+        while self.size_in_bytes > self.size_limit_in_bytes and self.entries:
+            self.drop(next(iter(self.entries)))
+
+    def attach_shared_columns(self, key: str) -> Optional[Dict[str, Any]]:
+        """Gets the columns from the shared memory block of another process if it was published completely."""
+        block = self.shared_blocks.get(key)
+        if block is None:
+            try:
+                block = shared_memory.SharedMemory(name=get_block_name(key))
+            except FileNotFoundError:
+                return None
+            self.shared_blocks[key] = block
+        return view_block_columns(block)
+
+    def publish_shared_columns(self, key: str, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Copies the columns into a new shared memory block and returns the columns that view it.
+
+        Columns of Python objects cannot be shared, so such values are only kept in this process.
+        """
+        if not all(is_shareable(column) for column in columns.values()):
+            return columns
+        header, block_size, layout = get_block_layout(columns)
+        try:
+            block = shared_memory.SharedMemory(name=get_block_name(key), create=True, size=block_size)
+        except FileExistsError:
+            # another process is publishing the same key right now
+            return columns
+        if not self.published_keys:
+            # removes the published blocks at the end of the process, also in worker processes of multiprocessing
+            util.Finalize(self, self.clear, exitpriority=10)
+        self.shared_blocks[key] = block
+        self.published_keys.add(key)
+        buffer = get_block_buffer(block)
+        data_offset = align(HEADER_LENGTH_BYTES + len(header))
+        for name, (_, _, offset) in layout.items():
+            column = columns[name]
+            shared_column: np.ndarray = np.ndarray(
+                column.shape, dtype=column.dtype, buffer=buffer, offset=data_offset + offset
+            )
+            shared_column[...] = column
+        buffer[HEADER_LENGTH_BYTES : HEADER_LENGTH_BYTES + len(header)] = header
+        # the length of the header is written last, so other processes only attach to complete blocks
+        buffer[:HEADER_LENGTH_BYTES] = len(header).to_bytes(HEADER_LENGTH_BYTES, "little")
+        return view_block_columns(block) or columns
+
+
+MEMO_CACHE = MemoCache()
+
+
+def forget_published_blocks_in_child_process() -> None:
+    """Lets only the process that published a block remove it, not the forked processes."""
+    MEMO_CACHE.published_keys = set()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=forget_published_blocks_in_child_process)
@@ -0,0 +1,213 @@
+"""Result sinks collect the converged values of all timesteps during the simulation.
+
+The memory sink keeps the complete result matrix in memory. The chunked sinks only keep a buffer of a fixed
+number of timesteps in memory and write it to the result directory whenever it is full. After the simulation
+the results are opened from the file, so the post processing does not need to hold another copy in memory.
+"""
+
+# clean
+import os
+from typing import Any, List
+
+import numpy as np
+
+from hisim import log
+from hisim.simulationparameters import ResultSinkType, SimulationParameters
+
+
+class ResultSink:
+    """Base class for the result sinks.
+
+    The simulator iterates each timestep directly on the row returned by get_row and calls finish_row
+    when the timestep converged. If only some outputs are recorded or the results are stored as float32,
+    the simulator iterates on its own row and copies the recorded values into the row of the sink.
+    """
+
+    def __init__(self, timesteps: int, number_of_outputs: int, dtype: Any = np.float64) -> None:
+        """Initializes the sink."""
+        self.timesteps = timesteps
+        self.number_of_outputs = number_of_outputs
+        self.dtype = np.dtype(dtype)
+
+    def get_row(self, step: int) -> np.ndarray:
+        """Gets the zero initialized row for the values of a timestep."""
+        raise NotImplementedError()
+
+    def finish_row(self, step: int) -> None:
+        """Gets called after the values of a timestep converged."""
+
+    def close(self) -> np.ndarray:
+        """Finishes writing and returns the complete result matrix with the shape (timesteps, outputs)."""
+        raise NotImplementedError()
+
+
+class MemoryResultSink(ResultSink):
+    """Keeps the complete result matrix in memory."""
+
+    def __init__(self, timesteps: int, number_of_outputs: int, dtype: Any = np.float64) -> None:
+        """Preallocates the result matrix."""
+        super().__init__(timesteps, number_of_outputs, dtype)
+        self.results_matrix: np.ndarray = np.zeros((timesteps, number_of_outputs), dtype=self.dtype)
+
+    def get_row(self, step: int) -> np.ndarray:
+        """Gets the row of the result matrix."""
+        row: np.ndarray = self.results_matrix[step]
+        return row
+
+    def close(self) -> np.ndarray:
+        """Returns the result matrix."""
+        return self.results_matrix
+
+
+class ChunkedResultSink(ResultSink):
+    """Collects the results in a buffer of chunk_size timesteps, which is written whenever it is full."""
+
+    def __init__(self, timesteps: int, number_of_outputs: int, chunk_size: int, dtype: Any = np.float64) -> None:
+        """Allocates the chunk buffer."""
+        super().__init__(timesteps, number_of_outputs, dtype)
+        if chunk_size < 1:
+            raise ValueError("The chunk size of the result sink needs to be at least one timestep.")
+        self.chunk_size = min(chunk_size, max(timesteps, 1))
+        self.chunk_buffer: np.ndarray = np.zeros((self.chunk_size, number_of_outputs), dtype=self.dtype)
+        self.chunk_start = 0
+
+    def get_row(self, step: int) -> np.ndarray:
+        """Gets the row of the timestep in the chunk buffer."""
+        row: np.ndarray = self.chunk_buffer[step - self.chunk_start]
+        return row
+
+    def finish_row(self, step: int) -> None:
+        """Writes the chunk buffer if it is full or if this was the last timestep."""
+        rows_in_chunk = step + 1 - self.chunk_start
+        if rows_in_chunk == self.chunk_size or step + 1 == self.timesteps:
+            self.write_chunk(self.chunk_start, self.chunk_buffer[:rows_in_chunk])
+            self.chunk_buffer.fill(0)
+            self.chunk_start = step + 1
+
+    def write_chunk(self, start: int, chunk: np.ndarray) -> None:
+        """Writes the rows of a chunk, starting at the timestep start."""
+        raise NotImplementedError()
+
+    def close(self) -> np.ndarray:
+        """Finishes writing and returns the complete result matrix."""
+        raise NotImplementedError()
+
+
+class NumpyMemmapResultSink(ChunkedResultSink):
+    """Writes the chunks into a memory mapped .npy file."""
+
+    def __init__(
+        self, timesteps: int, number_of_outputs: int, chunk_size: int, file_path: str, dtype: Any = np.float64
+    ) -> None:
+        """Creates the .npy file with the shape of the complete result matrix."""
+        super().__init__(timesteps, number_of_outputs, chunk_size, dtype)
+        self.file_path = file_path
+        self.results_memmap = np.lib.format.open_memmap(
+            file_path, mode="w+", dtype=self.dtype, shape=(timesteps, number_of_outputs)
+        )
+
+    def write_chunk(self, start: int, chunk: np.ndarray) -> None:
+        """Copies the chunk into the file."""
+        self.results_memmap[start : start + len(chunk)] = chunk
+        self.results_memmap.flush()
+
+    def close(self) -> np.ndarray:
+        """Closes the file and opens it again copy-on-write, so the results are only read when they are used."""
+        self.results_memmap.flush()
+        del self.results_memmap
+        results_matrix: np.ndarray = np.load(self.file_path, mmap_mode="c")
+        return results_matrix
+
+
+class ParquetResultSink(ChunkedResultSink):
+    """Writes every chunk as a row group of a Parquet file. Needs pyarrow."""
+
+    def __init__(
+        self,
+        timesteps: int,
+        number_of_outputs: int,
+        chunk_size: int,
+        file_path: str,
+        column_names: List[str],
+        dtype: Any = np.float64,
+    ) -> None:
+        """Opens the Parquet writer."""
+        super().__init__(timesteps, number_of_outputs, chunk_size, dtype)
+        try:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError(
+                "The Parquet result sink needs pyarrow. Please install it with pip install hisim[parquet]."
+            ) from error
+        self.pyarrow = pyarrow
+        self.file_path = file_path
+        self.column_names = column_names
+        column_type = pyarrow.from_numpy_dtype(self.dtype)
+        self.schema = pyarrow.schema([(column_name, column_type) for column_name in column_names])
+        self.writer = pyarrow.parquet.ParquetWriter(file_path, self.schema)
+
+    def write_chunk(self, start: int, chunk: np.ndarray) -> None:
+        """Writes the chunk as a row group."""
+        table = self.pyarrow.Table.from_arrays(
+            [self.pyarrow.array(chunk[:, column]) for column in range(self.number_of_outputs)], schema=self.schema
+        )
+        self.writer.write_table(table, row_group_size=len(chunk))
+
+    def close(self) -> np.ndarray:
+        """Closes the writer and returns the results memory mapped from a .npy file next to the Parquet file.
+
+        The row groups are copied into the .npy file one at a time, so only one chunk is held in memory. The post
+        processing then reads the results from the file when they are used, like with the memmap sink.
+        """
+        self.writer.close()
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+        memmap_file_path = os.path.splitext(self.file_path)[0] + ".npy"
+        results_memmap = np.lib.format.open_memmap(
+            memmap_file_path, mode="w+", dtype=self.dtype, shape=(self.timesteps, self.number_of_outputs)
+        )
+        parquet_file = pyarrow.parquet.ParquetFile(self.file_path)
+        start = 0
+        for row_group_index in range(parquet_file.num_row_groups):
+            row_group = parquet_file.read_row_group(row_group_index, columns=self.column_names)
+            for column_index, column_name in enumerate(self.column_names):
+                results_memmap[start : start + row_group.num_rows, column_index] = row_group.column(
+                    column_name
+                ).to_numpy()
+            start += row_group.num_rows
+        results_memmap.flush()
+        del results_memmap
+        results_matrix: np.ndarray = np.load(memmap_file_path, mmap_mode="c")
+        return results_matrix
+
+
+def get_results_dtype(my_simulation_parameters: SimulationParameters) -> np.dtype:
+    """Gets the dtype the results are stored with, which is float64 or float32."""
+    dtype = np.dtype(my_simulation_parameters.results_dtype)
+    if dtype not in (np.dtype(np.float64), np.dtype(np.float32)):
+        raise ValueError(f"The results can be stored as float64 or float32, but not as {dtype}.")
+    return dtype
+
+
+def create_result_sink(my_simulation_parameters: SimulationParameters, column_names: List[str]) -> ResultSink:
+    """Creates the result sink that is set in the simulation parameters.
+
+    The column names identify the outputs in the Parquet file, so they need to be unique.
+    """
+    timesteps = my_simulation_parameters.timesteps
+    number_of_outputs = len(column_names)
+    dtype = get_results_dtype(my_simulation_parameters)
+    result_sink_type = ResultSinkType(my_simulation_parameters.result_sink)
+    chunk_size = my_simulation_parameters.result_sink_chunk_size
+    if result_sink_type == ResultSinkType.MEMORY:
+        return MemoryResultSink(timesteps, number_of_outputs, dtype)
+    if result_sink_type == ResultSinkType.NUMPY_MEMMAP:
+        file_path = os.path.join(my_simulation_parameters.result_directory, "results.npy")
+        log.information(f"Writing the results in chunks of {chunk_size} timesteps to {file_path}")
+        return NumpyMemmapResultSink(timesteps, number_of_outputs, chunk_size, file_path, dtype)
+    if result_sink_type == ResultSinkType.PARQUET:
+        file_path = os.path.join(my_simulation_parameters.result_directory, "results.parquet")
+        log.information(f"Writing the results in chunks of {chunk_size} timesteps to {file_path}")
+        return ParquetResultSink(timesteps, number_of_outputs, chunk_size, file_path, column_names, dtype)
+    raise ValueError(f"Unknown result sink: {result_sink_type}")
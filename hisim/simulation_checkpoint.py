@@ -0,0 +1,90 @@
+"""Checkpoints of a running simulation, so a long simulation can resume after it was interrupted.
+
+A checkpoint directory contains the converged results of all timesteps so far in checkpoint_results.npy and
+the state of the simulation at the beginning of the next timestep in checkpoint.pkl. The results are written
+row by row during the simulation, the state file is replaced atomically every checkpoint interval.
+Rows after the timestep in the state file are ignored when resuming.
+"""
+
+# clean
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import numpy as np
+
+from hisim import log
+
+CHECKPOINT_STATE_FILE = "checkpoint.pkl"
+CHECKPOINT_RESULTS_FILE = "checkpoint_results.npy"
+
+
+@dataclass
+class SimulationCheckpoint:
+    """State of the simulation at the beginning of a timestep."""
+
+    next_timestep: int
+    timesteps: int
+    output_names: List[str]
+    component_states: Dict[str, Any]
+    previous_timestep_values: np.ndarray
+    total_iteration_tries: int
+    # the outputs that components with a native timestep hold until their next calculation
+    held_output_values: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
+class CheckpointWriter:
+    """Writes the results row by row and the simulation state every checkpoint interval."""
+
+    def __init__(self, checkpoint_directory: str, timesteps: int, number_of_outputs: int) -> None:
+        """Opens the result file of the checkpoint. An existing result file of the same shape is continued."""
+        self.checkpoint_directory = checkpoint_directory
+        os.makedirs(checkpoint_directory, exist_ok=True)
+        results_path = os.path.join(checkpoint_directory, CHECKPOINT_RESULTS_FILE)
+        results_memmap = None
+        if os.path.isfile(results_path):
+            results_memmap = np.load(results_path, mmap_mode="r+")
+            if results_memmap.shape != (timesteps, number_of_outputs):
+                del results_memmap
+                results_memmap = None
+        if results_memmap is None:
+            results_memmap = np.lib.format.open_memmap(
+                results_path, mode="w+", dtype=np.float64, shape=(timesteps, number_of_outputs)
+            )
+        self.results_memmap: np.ndarray = results_memmap
+
+    def write_row(self, step: int, values: np.ndarray) -> None:
+        """Writes the converged values of a timestep."""
+        self.results_memmap[step] = values
+
+    def write_checkpoint(self, checkpoint: SimulationCheckpoint) -> None:
+        """Flushes the results and replaces the state file."""
+        self.results_memmap.flush()  # type: ignore
+        state_path = os.path.join(self.checkpoint_directory, CHECKPOINT_STATE_FILE)
+        temporary_path = state_path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, state_path)
+        log.information(f"Wrote checkpoint before timestep {checkpoint.next_timestep} to {self.checkpoint_directory}")
+
+    def close(self) -> None:
+        """Flushes and closes the result file."""
+        self.results_memmap.flush()  # type: ignore
+        del self.results_memmap
+
+
+def load_checkpoint(checkpoint_directory: str) -> SimulationCheckpoint:
+    """Loads the state of a checkpoint directory."""
+    state_path = os.path.join(checkpoint_directory, CHECKPOINT_STATE_FILE)
+    if not os.path.isfile(state_path):
+        raise FileNotFoundError(f"Could not find a checkpoint in {checkpoint_directory}.")
+    with open(state_path, "rb") as file:
+        checkpoint: SimulationCheckpoint = pickle.load(file)
+    return checkpoint
+
+
+def load_checkpoint_results(checkpoint_directory: str) -> np.ndarray:
+    """Opens the results of a checkpoint directory read only."""
+    results: np.ndarray = np.load(os.path.join(checkpoint_directory, CHECKPOINT_RESULTS_FILE), mmap_mode="r")
+    return results
@@ -0,0 +1,324 @@
+"""Simulates several variants of the same system setup in lockstep.
+
+For sensitivity studies, the same system setup is simulated many times with different configuration values.
+Every variant is set up in its own simulator. The ensemble checks that all variants have the same components,
+outputs and connections and then calculates all variants together, timestep by timestep, on single time step
+values with the shape (variants, outputs). The components are calculated with Component.i_simulate_batch,
+which calculates the variants one by one unless the component implements a vectorised calculation.
+
+Precomputed components with the same configuration in all variants, like the weather or the occupancy,
+are shared: their series are taken from the first variant and written into the rows of all variants.
+The convergence is checked per variant. A variant that converged is not calculated again in that timestep.
+Components with a native timestep hold the outputs of all variants between their own timesteps.
+The results are kept in memory, checkpoints are not supported.
+"""
+
+# clean
+import datetime
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+import hisim.component as cp
+from hisim import convergence
+from hisim import log
+from hisim import simulation_schedule
+from hisim.component_wrapper import ComponentWrapper
+from hisim.simulationparameters import SimulationParameters
+from hisim.simulator import Simulator
+
+
+def configs_are_equal(configs: List[Any]) -> bool:
+    """Checks if the configurations of a component are the same in all variants."""
+    try:
+        return all(bool(config == configs[0]) for config in configs[1:])
+    except ValueError:
+        # configurations with numpy arrays cannot be compared like this
+        return False
+
+
+class SimulationEnsemble:
+
+    """Runs the variants of a system setup together."""
+
+    def __init__(self, variant_simulators: List[Simulator]) -> None:
+        """Initializes the ensemble with one simulator per variant, which already contains all components."""
+        if len(variant_simulators) == 0:
+            raise ValueError("An ensemble needs at least one variant.")
+        self.variant_simulators = variant_simulators
+        self.number_of_variants = len(variant_simulators)
+        self.reference_simulator = variant_simulators[0]
+        self.my_simulation_parameters: SimulationParameters = self.reference_simulator.get_simulation_parameters()
+        # the components of all variants for each wrapped component of the first variant
+        self.variant_components: Dict[ComponentWrapper, List[ComponentWrapper]] = {}
+        self.shared_component_names: List[str] = []
+        self.shared_precomputed_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.shared_precomputed_values: np.ndarray = np.zeros((0, 0), dtype=np.float64)
+        self.variant_precomputed_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.variant_precomputed_values: np.ndarray = np.zeros((0, self.number_of_variants, 0), dtype=np.float64)
+        self.convergence_accelerators: List[List[convergence.ConvergenceAccelerator]] = []
+        # the held outputs of all variants of the components with a native timestep
+        self.held_output_values: Dict[ComponentWrapper, np.ndarray] = {}
+        self.results_matrix: np.ndarray = np.zeros((0, self.number_of_variants, 0), dtype=np.float64)
+        self.total_iteration_tries: int = 0
+
+    @property
+    def schedule(self) -> List[simulation_schedule.ScheduleGroup]:
+        """The schedule of the first variant, which is used for all variants."""
+        return self.reference_simulator.schedule
+
+    def prepare(self) -> None:
+        """Prepares and connects the components of all variants and builds the schedule."""
+        for variant_index, variant_simulator in enumerate(self.variant_simulators):
+            my_simulation_parameters = variant_simulator.get_simulation_parameters()
+            if my_simulation_parameters.checkpoint_interval or my_simulation_parameters.resume_from is not None:
+                raise ValueError("Checkpoints are not supported for ensembles.")
+            if (
+                my_simulation_parameters.start_date != self.my_simulation_parameters.start_date
+                or my_simulation_parameters.timesteps != self.my_simulation_parameters.timesteps
+                or my_simulation_parameters.seconds_per_timestep != self.my_simulation_parameters.seconds_per_timestep
+            ):
+                raise ValueError(f"Variant {variant_index} does not simulate the same period as the first variant.")
+            variant_simulator.prepare_calculation()
+            variant_simulator.connect_all_components()
+            variant_simulator.build_schedule()
+        self.check_variants_have_the_same_setup()
+        for position, reference_component in enumerate(self.reference_simulator.wrapped_components):
+            self.variant_components[reference_component] = [
+                variant_simulator.wrapped_components[position] for variant_simulator in self.variant_simulators
+            ]
+        self.collect_precomputed_outputs()
+        self.held_output_values = {
+            reference_component: np.zeros(
+                (self.number_of_variants, len(reference_component.output_global_indices)), dtype=np.float64
+            )
+            for reference_component in self.reference_simulator.multi_rate_components
+        }
+        self.convergence_accelerators = [
+            [
+                convergence.create_convergence_accelerator(self.my_simulation_parameters, group.output_indices)
+                for _ in range(self.number_of_variants)
+            ]
+            for group in self.schedule
+        ]
+        log.information(
+            f"Ensemble of {self.number_of_variants} variants with {len(self.shared_component_names)} shared components."
+        )
+
+    def check_variants_have_the_same_setup(self) -> None:
+        """Checks that all variants have the same components, outputs and connections as the first variant."""
+        reference = self.reference_simulator
+        for variant_index, variant_simulator in enumerate(self.variant_simulators[1:], start=1):
+            if (
+                [type(wrapped_component.my_component) for wrapped_component in variant_simulator.wrapped_components]
+                != [type(wrapped_component.my_component) for wrapped_component in reference.wrapped_components]
+                or [output.full_name for output in variant_simulator.all_outputs]
+                != [output.full_name for output in reference.all_outputs]
+                or variant_simulator.get_component_connections() != reference.get_component_connections()
+            ):
+                raise ValueError(
+                    f"Variant {variant_index} has different components, outputs or connections than the first variant."
+                )
+            if not np.array_equal(variant_simulator.precomputed_indices, reference.precomputed_indices):
+                raise ValueError(f"Variant {variant_index} precomputes different outputs than the first variant.")
+            calculation_intervals = [
+                wrapped_component.calculation_interval for wrapped_component in variant_simulator.wrapped_components
+            ]
+            if calculation_intervals != [
+                wrapped_component.calculation_interval for wrapped_component in reference.wrapped_components
+            ]:
+                raise ValueError(f"Variant {variant_index} has components with other native timesteps.")
+
+    def collect_precomputed_outputs(self) -> None:
+        """Splits the precomputed outputs into the ones that are shared by all variants and the others.
+
+        The precomputed values of the variant simulators are released afterwards.
+        """
+        shared_output_indices: List[int] = []
+        for reference_component, wrapped_components in self.variant_components.items():
+            if not reference_component.is_precomputed:
+                continue
+            if configs_are_equal([wrapped_component.my_component.config for wrapped_component in wrapped_components]):
+                self.shared_component_names.append(reference_component.my_component.component_name)
+                shared_output_indices.extend(output.global_index for output in reference_component.component_outputs)
+        precomputed_indices = self.reference_simulator.precomputed_indices
+        is_shared = np.isin(precomputed_indices, shared_output_indices)
+        self.shared_precomputed_indices = precomputed_indices[is_shared]
+        self.shared_precomputed_values = self.reference_simulator.precomputed_values[:, is_shared]
+        self.variant_precomputed_indices = precomputed_indices[~is_shared]
+        self.variant_precomputed_values = np.stack(
+            [variant_simulator.precomputed_values[:, ~is_shared] for variant_simulator in self.variant_simulators],
+            axis=1,
+        )
+        for variant_simulator in self.variant_simulators:
+            variant_simulator.precomputed_values = np.zeros((0, 0), dtype=np.float64)
+
+    def calculate_component(
+        self,
+        reference_component: ComponentWrapper,
+        timestep: int,
+        stsv: cp.SingleTimeStepValues,
+        force_convergence: bool,
+        variant_indices: np.ndarray,
+    ) -> None:
+        """Restores the states of a component in the given variants and calculates them."""
+        wrapped_components = self.variant_components[reference_component]
+        for variant_index in variant_indices:
+            wrapped_components[variant_index].restore_state()
+        type(reference_component.my_component).i_simulate_batch(
+            [wrapped_component.my_component for wrapped_component in wrapped_components],
+            timestep,
+            stsv,
+            force_convergence,
+            variant_indices,
+        )
+
+    def process_one_timestep(self, timestep: int, stsv: cp.SingleTimeStepValues) -> Tuple[int, bool]:
+        """Executes one timestep for all variants, see Simulator.process_one_timestep.
+
+        Returns the largest number of iterations of any group.
+        """
+        stsv.values[:, self.shared_precomputed_indices] = self.shared_precomputed_values[timestep]
+        stsv.values[:, self.variant_precomputed_indices] = self.variant_precomputed_values[timestep]
+        for reference_component, held_output_values in self.held_output_values.items():
+            reference_component.is_idle = timestep % reference_component.calculation_interval != 0
+            if reference_component.is_idle:
+                stsv.values[:, reference_component.output_global_indices] = held_output_values
+        calculated_components = [
+            reference_component
+            for reference_component in self.reference_simulator.calculated_components or []
+            if not reference_component.is_idle
+        ]
+        for reference_component in calculated_components:
+            for wrapped_component in self.variant_components[reference_component]:
+                wrapped_component.save_state()
+
+        all_variants = np.arange(self.number_of_variants)
+        iterative_tries = 0
+        force_convergence = False
+        for group, accelerators in zip(self.schedule, self.convergence_accelerators):
+            if group.is_cyclic:
+                group_tries, group_force_convergence = self.iterate_schedule_group(
+                    timestep, group, stsv, accelerators
+                )
+                iterative_tries = max(iterative_tries, group_tries)
+                force_convergence = force_convergence or group_force_convergence
+            else:
+                for reference_component in group.wrapped_components:
+                    if not reference_component.is_idle:
+                        self.calculate_component(reference_component, timestep, stsv, False, all_variants)
+                iterative_tries = max(iterative_tries, 1)
+
+        for reference_component in calculated_components:
+            for variant_index, wrapped_component in enumerate(self.variant_components[reference_component]):
+                wrapped_component.doublecheck(timestep, stsv.get_variant(variant_index))
+        for reference_component in self.held_output_values:
+            if not reference_component.is_idle:
+                self.held_output_values[reference_component] = stsv.values[:, reference_component.output_global_indices]
+        return iterative_tries, force_convergence
+
+    def iterate_schedule_group(
+        self,
+        timestep: int,
+        group: simulation_schedule.ScheduleGroup,
+        stsv: cp.SingleTimeStepValues,
+        accelerators: List[convergence.ConvergenceAccelerator],
+    ) -> Tuple[int, bool]:
+        """Iterates the components of a group until the values of all variants converge.
+
+        Only the variants that did not converge yet are calculated in each iteration.
+        """
+        for accelerator in accelerators:
+            accelerator.reset()
+        previous_values = stsv.clone()
+        active_variants = np.arange(self.number_of_variants)
+        tolerances = self.reference_simulator.convergence_tolerances
+        iterative_tries = 0
+        force_convergence = False
+        while len(active_variants) > 0:
+            for reference_component in group.wrapped_components:
+                if not reference_component.is_idle:
+                    self.calculate_component(reference_component, timestep, stsv, force_convergence, active_variants)
+            unconverged_variants = stsv.get_unconverged_variants(previous_values, tolerances)
+            remaining_variants = active_variants[unconverged_variants[active_variants]]
+            if iterative_tries > 10:
+                if not force_convergence:
+                    for variant_index in remaining_variants:
+                        accelerators[variant_index].reset()
+                force_convergence = True
+            if iterative_tries > 100:
+                variant_index = int(remaining_variants[0])
+                differences = stsv.get_variant(variant_index).get_differences(
+                    previous_values.get_variant(variant_index), tolerances
+                )
+                raise ValueError(
+                    f"More than 100 tries in time step {timestep} in variant {variant_index}\n"
+                    + differences.format(self.reference_simulator.all_outputs)
+                )
+            for variant_index in remaining_variants:
+                accelerator = accelerators[variant_index]
+                accelerator.accelerate(
+                    stsv.get_variant(variant_index),
+                    previous_values.get_variant(variant_index).values[accelerator.output_indices],
+                )
+            previous_values.copy_values_from_other(stsv)
+            active_variants = remaining_variants
+            iterative_tries += 1
+        return iterative_tries, force_convergence
+
+    def run_all_timesteps(self) -> None:
+        """Simulates all timesteps of all variants.
+
+        Afterwards, results_matrix has the shape (timesteps, variants, outputs) and the results_matrix of every
+        variant simulator is a view on its part.
+        """
+        start_counter = time.perf_counter()
+        self.prepare()
+        timesteps = self.my_simulation_parameters.timesteps
+        number_of_outputs = len(self.reference_simulator.all_outputs)
+        self.results_matrix = np.zeros((timesteps, self.number_of_variants, number_of_outputs), dtype=np.float64)
+        # the warm start of the first variant works on the values of all variants
+        self.reference_simulator.previous_timestep_values = np.zeros(
+            (2, self.number_of_variants, number_of_outputs), dtype=np.float64
+        )
+        self.total_iteration_tries = 0
+        log.information(f"Starting ensemble simulation of {self.number_of_variants} variants for {timesteps} timesteps")
+        starttime = datetime.datetime.now()
+        lastmessage = starttime
+        last_step = 0
+        total_iteration_tries_since_last_msg = 0
+        for step in range(timesteps):
+            stsv = cp.SingleTimeStepValues.from_array(self.results_matrix[step])
+            self.reference_simulator.warm_start_timestep(step, stsv)
+            iteration_tries, force_convergence = self.process_one_timestep(step, stsv)
+            self.reference_simulator.remember_timestep_values(stsv)
+            total_iteration_tries_since_last_msg += iteration_tries
+            self.total_iteration_tries += iteration_tries
+            if (datetime.datetime.now() - lastmessage).total_seconds() > 5 and step != 0:
+                lastmessage = self.reference_simulator.show_progress(
+                    starttime, step, total_iteration_tries_since_last_msg, last_step, force_convergence
+                )
+                last_step = step
+                total_iteration_tries_since_last_msg = 0
+        for variant_index, variant_simulator in enumerate(self.variant_simulators):
+            variant_simulator.results_matrix = self.results_matrix[:, variant_index, :]
+        log.information(
+            f"Ensemble simulation took {time.perf_counter() - start_counter:1.2f}s, "
+            f"{self.total_iteration_tries / max(timesteps, 1):.2f} iterations per timestep on average."
+        )
+
+    def get_results_data_frame(self, variant_index: int) -> pd.DataFrame:
+        """Gets the results of a variant as data frame with the pretty output names and a time index."""
+        results_data_frame = pd.DataFrame(
+            data=self.results_matrix[:, variant_index, :],
+            columns=[output.get_pretty_name() for output in self.reference_simulator.all_outputs],
+            copy=False,
+        )
+        results_data_frame.index = pd.date_range(
+            start=self.my_simulation_parameters.start_date,
+            periods=self.my_simulation_parameters.timesteps,
+            freq=f"{self.my_simulation_parameters.seconds_per_timestep}S",
+        )
+        return results_data_frame
@@ -0,0 +1,132 @@
+"""Measures how much time the components need in the timestep iteration.
+
+The profiler wraps the calls of the simulator to the components and records per component the time and number of
+calls of i_simulate, i_save_state and i_restore_state and how often its outputs were the last ones to converge.
+It also records the number of iterations of each timestep.
+"""
+
+# clean
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from hisim import component as cp
+from hisim import log
+from hisim.component_wrapper import ComponentWrapper
+from hisim.simulation_schedule import ScheduleGroup
+
+
+@dataclass
+class ComponentProfile:
+    """Profiling results of a single component."""
+
+    component_name: str
+    simulate_calls: int = 0
+    simulate_time_in_s: float = 0.0
+    save_state_calls: int = 0
+    save_state_time_in_s: float = 0.0
+    restore_state_calls: int = 0
+    restore_state_time_in_s: float = 0.0
+    last_to_converge: int = 0
+
+
+class SimulationProfiler:
+    """Collects the profiling results of a simulation."""
+
+    def __init__(self, wrapped_components: List[ComponentWrapper], timesteps: int) -> None:
+        """Initializes the profiles of the wrapped components."""
+        self.component_profiles: Dict[ComponentWrapper, ComponentProfile] = {
+            wrapped_component: ComponentProfile(wrapped_component.my_component.component_name)
+            for wrapped_component in wrapped_components
+        }
+        self.output_indices: Dict[ComponentWrapper, np.ndarray] = {
+            wrapped_component: np.array(
+                [output.global_index for output in wrapped_component.component_outputs], dtype=np.int64
+            )
+            for wrapped_component in wrapped_components
+        }
+        self.iterations_per_timestep = np.zeros(timesteps, dtype=np.int32)
+
+    def save_state(self, wrapped_component: ComponentWrapper) -> None:
+        """Saves the state of the component and measures the time."""
+        start_counter = time.perf_counter()
+        wrapped_component.save_state()
+        profile = self.component_profiles[wrapped_component]
+        profile.save_state_time_in_s += time.perf_counter() - start_counter
+        profile.save_state_calls += 1
+
+    def restore_state(self, wrapped_component: ComponentWrapper) -> None:
+        """Restores the state of the component and measures the time."""
+        start_counter = time.perf_counter()
+        wrapped_component.restore_state()
+        profile = self.component_profiles[wrapped_component]
+        profile.restore_state_time_in_s += time.perf_counter() - start_counter
+        profile.restore_state_calls += 1
+
+    def calculate_component(
+        self, wrapped_component: ComponentWrapper, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool
+    ) -> None:
+        """Calculates the component and measures the time."""
+        start_counter = time.perf_counter()
+        wrapped_component.calculate_component(timestep, stsv, force_convergence)
+        profile = self.component_profiles[wrapped_component]
+        profile.simulate_time_in_s += time.perf_counter() - start_counter
+        profile.simulate_calls += 1
+
+    def record_last_to_converge(self, group: ScheduleGroup, changed_outputs: np.ndarray) -> None:
+        """Counts the components of a group whose outputs still changed in the last iteration before convergence."""
+        for wrapped_component in group.wrapped_components:
+            if changed_outputs[self.output_indices[wrapped_component]].any():
+                self.component_profiles[wrapped_component].last_to_converge += 1
+
+    def record_timestep(self, timestep: int, iterations: int) -> None:
+        """Records the number of iterations of a timestep."""
+        self.iterations_per_timestep[timestep] = iterations
+
+    def get_profiles(self) -> List[ComponentProfile]:
+        """Gets the component profiles, sorted by the time in i_simulate."""
+        return sorted(self.component_profiles.values(), key=lambda profile: profile.simulate_time_in_s, reverse=True)
+
+    def write_results(self, result_directory: str) -> None:
+        """Writes the component profiles as json and csv and the iterations per timestep as csv."""
+        profiles = [asdict(profile) for profile in self.get_profiles()]
+        max_iterations = int(self.iterations_per_timestep.max()) if len(self.iterations_per_timestep) > 0 else 0
+        with open(os.path.join(result_directory, "component_profile.json"), "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "components": profiles,
+                    "total_iterations": int(self.iterations_per_timestep.sum()),
+                    "max_iterations_per_timestep": max_iterations,
+                },
+                file,
+                indent=4,
+            )
+        pd.DataFrame(profiles).to_csv(os.path.join(result_directory, "component_profile.csv"), index=False)
+        pd.DataFrame({"iterations": self.iterations_per_timestep}).rename_axis("timestep").to_csv(
+            os.path.join(result_directory, "iterations_per_timestep.csv")
+        )
+
+    def log_summary(self, number_of_components: int = 10) -> None:
+        """Logs the components that took the most time."""
+        profiles = self.get_profiles()
+        total_time_in_s = sum(
+            profile.simulate_time_in_s + profile.save_state_time_in_s + profile.restore_state_time_in_s
+            for profile in profiles
+        )
+        max_iterations = int(self.iterations_per_timestep.max()) if len(self.iterations_per_timestep) > 0 else 0
+        log.information(
+            f"Component profile: {total_time_in_s:.3f} seconds in the components, "
+            f"{self.iterations_per_timestep.mean() if len(self.iterations_per_timestep) > 0 else 0:.2f} "
+            f"iterations per timestep on average, at most {max_iterations}."
+        )
+        for profile in profiles[:number_of_components]:
+            log.information(
+                f"    {profile.component_name}: {profile.simulate_time_in_s:.3f} s in {profile.simulate_calls} "
+                f"i_simulate calls, {profile.save_state_time_in_s + profile.restore_state_time_in_s:.3f} s "
+                f"saving and restoring states, last to converge {profile.last_to_converge} times"
+            )
@@ -0,0 +1,164 @@
+"""Builds the calculation schedule of the simulator from the connections between the components.
+
+The components and their connections form a directed graph (source component -> target component).
+The strongly connected components of this graph are the algebraic loops of the system setup.
+Groups without a loop only need to be calculated once per timestep, while the groups with a loop
+need to be iterated until their outputs converge.
+"""
+
+# clean
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+import numpy as np
+
+from hisim.component_wrapper import ComponentWrapper
+
+
+@dataclass
+class ScheduleGroup:
+    """A group of wrapped components that is calculated together."""
+
+    wrapped_components: List[ComponentWrapper]
+    is_cyclic: bool
+    output_indices: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    component_names: List[str] = field(default_factory=list)
+
+    def get_component_names(self) -> List[str]:
+        """Gets the names of the components in this group."""
+        return self.component_names
+
+    def get_description(self) -> str:
+        """Gets a single line description of this group for logging."""
+        if self.is_cyclic:
+            return "iterated: " + ", ".join(self.get_component_names())
+        return "once: " + ", ".join(self.get_component_names())
+
+
+def build_sequential_schedule(wrapped_components: List[ComponentWrapper]) -> List[ScheduleGroup]:
+    """Builds a schedule that iterates all components together in the order they were added to the simulator."""
+    return [_create_group(wrapped_components, is_cyclic=True)]
+
+
+def build_dependency_schedule(wrapped_components: List[ComponentWrapper]) -> List[ScheduleGroup]:
+    """Builds a schedule of the strongly connected components in topological order.
+
+    The inputs need to be connected before, because the graph is taken from ComponentInput.source_output.
+    """
+    successors = get_component_graph(wrapped_components)
+    strongly_connected_components = find_strongly_connected_components(successors)
+
+    # order the strongly connected components topologically.
+    # Among the groups that are ready, the one with the component added first is calculated first.
+    group_of_component: Dict[int, int] = {}
+    for group_index, members in enumerate(strongly_connected_components):
+        for member in members:
+            group_of_component[member] = group_index
+    group_successors: List[Set[int]] = [set() for _ in strongly_connected_components]
+    number_of_predecessors = [0] * len(strongly_connected_components)
+    for source, targets in enumerate(successors):
+        for target in targets:
+            source_group = group_of_component[source]
+            target_group = group_of_component[target]
+            if source_group != target_group and target_group not in group_successors[source_group]:
+                group_successors[source_group].add(target_group)
+                number_of_predecessors[target_group] += 1
+
+    ready_groups = [index for index, count in enumerate(number_of_predecessors) if count == 0]
+    schedule: List[ScheduleGroup] = []
+    while ready_groups:
+        ready_groups.sort(key=lambda index: min(strongly_connected_components[index]))
+        group_index = ready_groups.pop(0)
+        members = sorted(strongly_connected_components[group_index])
+        is_cyclic = len(members) > 1 or members[0] in successors[members[0]]
+        schedule.append(_create_group([wrapped_components[member] for member in members], is_cyclic=is_cyclic))
+        for successor_group in group_successors[group_index]:
+            number_of_predecessors[successor_group] -= 1
+            if number_of_predecessors[successor_group] == 0:
+                ready_groups.append(successor_group)
+    if len(schedule) != len(strongly_connected_components):
+        raise ValueError("The condensed component graph is not acyclic. This is a bug.")
+    return schedule
+
+
+def get_component_graph(wrapped_components: List[ComponentWrapper]) -> List[Set[int]]:
+    """Gets the successors of each wrapped component, identified by its position in the list."""
+    component_of_output: Dict[int, int] = {}
+    for component_index, wrapped_component in enumerate(wrapped_components):
+        for output in wrapped_component.component_outputs:
+            component_of_output[output.global_index] = component_index
+    successors: List[Set[int]] = [set() for _ in wrapped_components]
+    for component_index, wrapped_component in enumerate(wrapped_components):
+        for component_input in wrapped_component.my_component.inputs:
+            if component_input.source_output is None:
+                continue
+            source_index = component_of_output.get(component_input.source_output.global_index)
+            if source_index is not None:
+                successors[source_index].add(component_index)
+    return successors
+
+
+def find_strongly_connected_components(successors: List[Set[int]]) -> List[List[int]]:
+    """Finds the strongly connected components with Tarjan's algorithm.
+
+    Implemented iteratively, because large district setups would exceed the recursion limit.
+    """
+    index_counter = 0
+    indices: Dict[int, int] = {}
+    lowlinks: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    result: List[List[int]] = []
+
+    for start_node in range(len(successors)):
+        if start_node in indices:
+            continue
+        work_stack = [(start_node, iter(sorted(successors[start_node])))]
+        indices[start_node] = lowlinks[start_node] = index_counter
+        index_counter += 1
+        stack.append(start_node)
+        on_stack.add(start_node)
+        while work_stack:
+            node, successor_iterator = work_stack[-1]
+            descended = False
+            for successor in successor_iterator:
+                if successor not in indices:
+                    indices[successor] = lowlinks[successor] = index_counter
+                    index_counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work_stack.append((successor, iter(sorted(successors[successor]))))
+                    descended = True
+                    break
+                if successor in on_stack:
+                    lowlinks[node] = min(lowlinks[node], indices[successor])
+            if descended:
+                continue
+            work_stack.pop()
+            if work_stack:
+                parent = work_stack[-1][0]
+                lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+            if lowlinks[node] == indices[node]:
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.append(member)
+                    if member == node:
+                        break
+                result.append(members)
+    return result
+
+
+def _create_group(wrapped_components: List[ComponentWrapper], is_cyclic: bool) -> ScheduleGroup:
+    """Creates a schedule group and collects the global indices of its outputs."""
+    output_indices = np.array(
+        [output.global_index for wrapped_component in wrapped_components for output in wrapped_component.component_outputs],
+        dtype=np.int64,
+    )
+    return ScheduleGroup(
+        wrapped_components=wrapped_components,
+        is_cyclic=is_cyclic,
+        output_indices=output_indices,
+        component_names=[wrapped_component.my_component.component_name for wrapped_component in wrapped_components],
+    )
@@ -3,7 +3,7 @@
 from __future__ import annotations
 import os
 import inspect
-from typing import List, Optional
+from typing import Dict, List, Optional
 import enum
 
 import datetime
@@ -14,6 +14,61 @@ from hisim import log
 from hisim.postprocessingoptions import PostProcessingOptions
 
 
+class WarmStartMode(str, enum.Enum):
+
+    """Set how the iteration of a timestep is initialized.
+
+    NONE starts every timestep from zeros. PREVIOUS_VALUES starts from the values of the last converged timestep,
+    LINEAR_EXTRAPOLATION extrapolates linearly from the last two converged timesteps.
+    """
+
+    NONE = "none"
+    PREVIOUS_VALUES = "previous_values"
+    LINEAR_EXTRAPOLATION = "linear_extrapolation"
+
+
+class ResultSinkType(str, enum.Enum):
+
+    """Set where the results are collected during the simulation.
+
+    MEMORY keeps the complete result matrix in memory. NUMPY_MEMMAP and PARQUET write the results in chunks
+    of result_sink_chunk_size timesteps into the result directory, so only one chunk needs to be kept in memory.
+    """
+
+    MEMORY = "memory"
+    NUMPY_MEMMAP = "numpy_memmap"
+    PARQUET = "parquet"
+
+
+class ConvergenceStrategy(str, enum.Enum):
+
+    """Set how the outputs of the iterated components are updated between the iterations of a timestep.
+
+    PLAIN uses the outputs of the last iteration. UNDER_RELAXATION only moves them by relaxation_factor towards
+    the new outputs, AITKEN adapts this factor in every iteration and ANDERSON combines the last anderson_depth
+    iterations.
+    """
+
+    PLAIN = "plain"
+    UNDER_RELAXATION = "under_relaxation"
+    AITKEN = "aitken"
+    ANDERSON = "anderson"
+
+
+class RecordingPolicy(str, enum.Enum):
+
+    """Set which outputs are stored in the results.
+
+    ALL stores every output. POSTPROCESSING_FLAGGED stores the outputs with a postprocessing flag and the outputs
+    of the recording allow list, ALLOW_LIST only the outputs of the recording allow list. The other outputs are
+    still calculated, but not stored.
+    """
+
+    ALL = "all"
+    POSTPROCESSING_FLAGGED = "postprocessing_flagged"
+    ALLOW_LIST = "allow_list"
+
+
 @dataclass()
 class SimulationParameters(JSONWizard):
 
@@ -28,7 +83,29 @@ class SimulationParameters(JSONWizard):
     skip_finished_results: bool
     surplus_control: bool
     cache_dir_path: str
+    cache_size_limit_in_megabytes: Optional[float]
     multiple_buildings: bool
+    warm_start_mode: WarmStartMode
+    dependency_scheduling: bool
+    write_component_connections: bool
+    result_sink: ResultSinkType
+    result_sink_chunk_size: int
+    checkpoint_interval: Optional[int]
+    checkpoint_directory: Optional[str]
+    resume_from: Optional[str]
+    profile_components: bool
+    convergence_strategy: ConvergenceStrategy
+    relaxation_factor: float
+    anderson_depth: int
+    convergence_tolerance: float
+    convergence_tolerances_per_unit: Optional[Dict[str, float]]
+    convergence_tolerances_per_output: Optional[Dict[str, float]]
+    typical_days: Optional[int]
+    typical_period_warmup_days: int
+    recording_policy: RecordingPolicy
+    recording_allow_list: Optional[List[str]]
+    aggregate_unrecorded_outputs: bool
+    results_dtype: str
 
     def __init__(
         self,
@@ -41,7 +118,29 @@ class SimulationParameters(JSONWizard):
         skip_finished_results: bool = False,
         surplus_control: bool = True,
         cache_dir_path: str = os.path.join(os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))), "inputs", "cache"),  # type: ignore
+        cache_size_limit_in_megabytes: Optional[float] = None,
         multiple_buildings: bool = False,
+        warm_start_mode: WarmStartMode = WarmStartMode.NONE,
+        dependency_scheduling: bool = False,
+        write_component_connections: bool = True,
+        result_sink: ResultSinkType = ResultSinkType.MEMORY,
+        result_sink_chunk_size: int = 10000,
+        checkpoint_interval: Optional[int] = None,
+        checkpoint_directory: Optional[str] = None,
+        resume_from: Optional[str] = None,
+        profile_components: bool = False,
+        convergence_strategy: ConvergenceStrategy = ConvergenceStrategy.PLAIN,
+        relaxation_factor: float = 0.5,
+        anderson_depth: int = 5,
+        convergence_tolerance: float = 0.0001,
+        convergence_tolerances_per_unit: Optional[Dict[str, float]] = None,
+        convergence_tolerances_per_output: Optional[Dict[str, float]] = None,
+        typical_days: Optional[int] = None,
+        typical_period_warmup_days: int = 1,
+        recording_policy: RecordingPolicy = RecordingPolicy.ALL,
+        recording_allow_list: Optional[List[str]] = None,
+        aggregate_unrecorded_outputs: bool = False,
+        results_dtype: str = "float64",
     ):
         """Initializes the class."""
         self.start_date: datetime.datetime = start_date
@@ -59,8 +158,44 @@ class SimulationParameters(JSONWizard):
         self.skip_finished_results: bool = skip_finished_results
         self.surplus_control = surplus_control
         self.cache_dir_path = cache_dir_path
+        # the least recently used cache files are deleted when the cache directory grows beyond this size
+        self.cache_size_limit_in_megabytes: Optional[float] = cache_size_limit_in_megabytes
         self.multiple_buildings = multiple_buildings
         self.figure_format = FigureFormat.PNG
+        self.warm_start_mode: WarmStartMode = WarmStartMode(warm_start_mode)
+        # calculate components without feedback only once per timestep and only iterate the algebraic loops
+        self.dependency_scheduling: bool = dependency_scheduling
+        # write component_connections.json into the result directory after connecting the components
+        self.write_component_connections: bool = write_component_connections
+        self.result_sink: ResultSinkType = ResultSinkType(result_sink)
+        self.result_sink_chunk_size: int = result_sink_chunk_size
+        # write a checkpoint every checkpoint_interval timesteps, by default into <result_directory>/checkpoint
+        self.checkpoint_interval: Optional[int] = checkpoint_interval
+        self.checkpoint_directory: Optional[str] = checkpoint_directory
+        # checkpoint directory to continue the simulation from
+        self.resume_from: Optional[str] = resume_from
+        # measure the time of the component calls and write it into the result directory
+        self.profile_components: bool = profile_components
+        self.convergence_strategy: ConvergenceStrategy = ConvergenceStrategy(convergence_strategy)
+        self.relaxation_factor: float = relaxation_factor
+        self.anderson_depth: int = anderson_depth
+        # absolute tolerances for the change of the outputs between two iterations.
+        # The tolerances per unit (e.g. {"W": 1}) and per output full name (e.g. {"Building # TemperatureMean": 0.001})
+        # override the global tolerance.
+        self.convergence_tolerance: float = convergence_tolerance
+        self.convergence_tolerances_per_unit: Optional[Dict[str, float]] = convergence_tolerances_per_unit
+        self.convergence_tolerances_per_output: Optional[Dict[str, float]] = convergence_tolerances_per_output
+        # only simulate this number of typical days, each after typical_period_warmup_days days of warm-up,
+        # and fill the other days with the results of their typical day
+        self.typical_days: Optional[int] = typical_days
+        self.typical_period_warmup_days: int = typical_period_warmup_days
+        self.recording_policy: RecordingPolicy = RecordingPolicy(recording_policy)
+        # component names, field names or full names of the outputs that are stored
+        self.recording_allow_list: Optional[List[str]] = recording_allow_list
+        # keep the hourly sums of the outputs that are not stored
+        self.aggregate_unrecorded_outputs: bool = aggregate_unrecorded_outputs
+        # "float64" or "float32", the results are always calculated with float64
+        self.results_dtype: str = results_dtype
 
     @classmethod
     def full_year(cls, year: int, seconds_per_timestep: int) -> SimulationParameters:
@@ -227,6 +362,10 @@ class SimulationParameters(JSONWizard):
             + str(self.timesteps)
         )
 
+    def get_year_unique_key(self) -> str:
+        """Gets a key for caches of a whole year, which only depends on the year and the seconds per timestep."""
+        return "year###" + str(self.year) + "###" + str(self.seconds_per_timestep)
+
     def get_unique_key_as_list(self) -> List[str]:
         """Gets unique key from a simulation parameter class as list."""
         lines = []
@@ -5,18 +5,27 @@ It iterates over all components in each timestep until convergence and loops ove
 # clean
 import os
 import datetime
+import json
 from typing import List, Tuple, Optional, Dict, Any, Union
 import time
+import numpy as np
 import pandas as pd
 
 from hisim.postprocessing.postprocessing_datatransfer import PostProcessingDataTransfer
-from hisim.component_wrapper import ComponentWrapper
+from hisim.component_wrapper import ComponentOutputIndex, ComponentWrapper
+from hisim import cache_files
+from hisim import convergence
+from hisim import result_sink
+from hisim import simulation_checkpoint
+from hisim import simulation_profiler
+from hisim import simulation_schedule
+from hisim import typical_periods
 from hisim import sim_repository
 from hisim.postprocessing import postprocessing_main as pp
 import hisim.component as cp
 import hisim.dynamic_component as dcp
 from hisim import log
-from hisim.simulationparameters import SimulationParameters
+from hisim.simulationparameters import RecordingPolicy, ResultSinkType, SimulationParameters, WarmStartMode
 from hisim import utils
 from hisim import postprocessingoptions
 from hisim.loadtypes import Units
@@ -52,14 +61,40 @@ class Simulator:
             log.LOGGING_LEVEL = self._simulation_parameters.logging_level
         self.wrapped_components: List[ComponentWrapper] = []
         self.all_outputs: List[cp.ComponentOutput] = []
+        # the components read their caches when they are created, so the cache statistics of the run start here
+        cache_files.CACHE_STORE.reset_statistics()
+        self.output_index: ComponentOutputIndex = ComponentOutputIndex()
+        self.setup_timings: Dict[str, float] = {"adding components": 0.0}
+        self.schedule: List[simulation_schedule.ScheduleGroup] = []
+        self.convergence_accelerators: List[convergence.ConvergenceAccelerator] = []
+        self.convergence_tolerances: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.calculated_components: Optional[List[ComponentWrapper]] = None
+        self.precomputed_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.precomputed_values: np.ndarray = np.zeros((0, 0), dtype=np.float64)
+        self.multi_rate_components: List[ComponentWrapper] = []
+        # the array states of all calculated components in one array with the rows current and saved values
+        self.component_state_values: np.ndarray = np.zeros((2, 0), dtype=np.float64)
+        self.components_with_object_states: List[ComponentWrapper] = []
+        # the outputs that are stored in the results, which are all outputs unless a recording policy is set
+        self.recorded_outputs: List[cp.ComponentOutput] = self.all_outputs
+        self.recorded_indices: Optional[np.ndarray] = None
+        self.unrecorded_indices: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.unrecorded_hourly_sums: Optional[pd.DataFrame] = None
 
         self.setup_function = setup_function
         self.module_filename = module_filename
         self.module_directory = module_directory
         self.my_module_config = my_module_config
         self.simulation_repository = sim_repository.SimRepository()
+        self.results_matrix: np.ndarray = np.zeros((0, 0), dtype=np.float64)
+        # the last two converged timesteps, used for the warm start
+        self.previous_timestep_values: np.ndarray = np.zeros((2, 0), dtype=np.float64)
+        self.profiler: Optional[simulation_profiler.SimulationProfiler] = None
+        self.typical_periods: Optional[typical_periods.TypicalPeriods] = None
         self.results_data_frame: pd.DataFrame
         self.iteration_logging_path: str = ""
+        self.total_iteration_tries: int = 0
+        self.skipped_component_calculations: int = 0
         self.config_dictionary: Dict[str, Any] = {}
 
     def set_simulation_parameters(self, my_simulation_parameters: SimulationParameters) -> None:
@@ -68,6 +103,10 @@ class Simulator:
         if self._simulation_parameters is not None:
             log.LOGGING_LEVEL = self._simulation_parameters.logging_level
 
+    def get_simulation_parameters(self) -> SimulationParameters:
+        """Gets the simulation parameters."""
+        return self._simulation_parameters
+
     def add_component(
         self,
         component: cp.Component,
@@ -77,22 +116,27 @@ class Simulator:
         """Adds component to simulator and wraps it up the output in the register."""
         if self._simulation_parameters is None:
             raise ValueError("Simulation Parameters were not initialized")
+        start_counter = time.perf_counter()
         # set the repository
         component.set_sim_repo(self.simulation_repository)
 
         # set the wrapper
         wrap = ComponentWrapper(component, is_cachable, connect_automatically=connect_automatically)
-        wrap.register_component_outputs(self.all_outputs, wrapped_components_so_far=self.wrapped_components)
+        wrap.register_component_outputs(
+            self.all_outputs, wrapped_components_so_far=self.wrapped_components, output_index=self.output_index
+        )
         self.wrapped_components.append(wrap)
+        self.output_index.add_wrapped_component(wrap)
         if component.component_name in self.config_dictionary:
             raise ValueError("duplicate component name : " + component.component_name)
         self.config_dictionary[component.component_name] = component.config
+        self.setup_timings["adding components"] += time.perf_counter() - start_counter
 
     @utils.measure_execution_time
     def connect_all_components(self) -> None:
         """Connects the inputs from every component to the corresponding outputs."""
         for wrapped_component in self.wrapped_components:
-            wrapped_component.connect_inputs(self.all_outputs)
+            wrapped_component.connect_inputs(self.all_outputs, output_index=self.output_index)
 
     @utils.measure_execution_time
     def prepare_calculation(self) -> None:
@@ -106,8 +150,160 @@ class Simulator:
                 )
             wrapped_component.prepare_calculation()
 
+    def get_component_connections(self) -> List[Dict[str, Dict[str, Optional[str]]]]:
+        """Gets the connections of all component inputs in the format of component_connections.json."""
+        connections: List[Dict[str, Dict[str, Optional[str]]]] = []
+        for wrapped_component in self.wrapped_components:
+            for component_input in wrapped_component.my_component.inputs:
+                if component_input.src_object_name is None:
+                    continue
+                connections.append(
+                    {
+                        "From": {"Component": component_input.src_object_name, "Field": component_input.src_field_name},
+                        "To": {"Component": component_input.component_name, "Field": component_input.field_name},
+                    }
+                )
+        return connections
+
+    def write_component_connections(self) -> None:
+        """Writes all connections at once into component_connections.json in the result directory."""
+        file_name = os.path.join(self._simulation_parameters.result_directory, "component_connections.json")
+        utils.write_text_file_atomically(file_name, json.dumps(self.get_component_connections()))
+
+    def collect_precomputed_outputs(self) -> None:
+        """Collects the output series of all components that know them after i_prepare_simulation.
+
+        These components are not calculated anymore. Their values are written into the single time step values
+        at the start of each timestep instead.
+        """
+        timesteps = self._simulation_parameters.timesteps
+        indices: List[int] = []
+        columns: List[np.ndarray] = []
+        for wrapped_component in self.wrapped_components:
+            precomputed_outputs = wrapped_component.my_component.get_precomputed_outputs()
+            if precomputed_outputs is None:
+                wrapped_component.is_precomputed = False
+                continue
+            for output in wrapped_component.component_outputs:
+                if output not in precomputed_outputs:
+                    raise ValueError(
+                        f"The component {wrapped_component.my_component.component_name} did not precompute "
+                        f"the output {output.field_name}. Either all or none of the outputs need to be precomputed."
+                    )
+                series = np.asarray(precomputed_outputs[output], dtype=np.float64)
+                if series.ndim != 1 or len(series) < timesteps:
+                    raise ValueError(
+                        f"The precomputed output {output.full_name} has {len(series)} values, "
+                        f"but the simulation has {timesteps} timesteps."
+                    )
+                indices.append(output.global_index)
+                columns.append(series[:timesteps])
+            wrapped_component.is_precomputed = True
+        self.precomputed_indices = np.array(indices, dtype=np.int64)
+        if columns:
+            self.precomputed_values = np.stack(columns, axis=1)
+        else:
+            self.precomputed_values = np.zeros((timesteps, 0), dtype=np.float64)
+        self.calculated_components = [
+            wrapped_component for wrapped_component in self.wrapped_components if not wrapped_component.is_precomputed
+        ]
+        if len(indices) > 0:
+            log.information(
+                f"{len(self.wrapped_components) - len(self.calculated_components)} components with "
+                f"{len(indices)} outputs are precomputed and not calculated in the timesteps."
+            )
+
+    def set_calculation_intervals(self) -> None:
+        """Sets every how many timesteps the components with a native timestep are calculated."""
+        seconds_per_timestep = self._simulation_parameters.seconds_per_timestep
+        self.multi_rate_components = []
+        for wrapped_component in self.calculated_components or []:
+            native_seconds_per_timestep = wrapped_component.my_component.get_native_seconds_per_timestep()
+            if native_seconds_per_timestep % seconds_per_timestep != 0:
+                raise ValueError(
+                    f"The native timestep of {native_seconds_per_timestep} seconds of the component "
+                    f"{wrapped_component.my_component.component_name} is not a multiple of the "
+                    f"{seconds_per_timestep} seconds per timestep of the simulation."
+                )
+            wrapped_component.calculation_interval = native_seconds_per_timestep // seconds_per_timestep
+            wrapped_component.is_idle = False
+            if wrapped_component.calculation_interval > 1:
+                wrapped_component.held_output_values = np.zeros(
+                    len(wrapped_component.output_global_indices), dtype=np.float64
+                )
+                self.multi_rate_components.append(wrapped_component)
+        for wrapped_component in self.multi_rate_components:
+            log.information(
+                f"{wrapped_component.my_component.component_name} is only calculated every "
+                f"{wrapped_component.calculation_interval} timesteps."
+            )
+
+    def collect_component_states(self) -> None:
+        """Moves the array states of the calculated components into one array, which is saved with a single copy."""
+        array_states: List[cp.ArrayState] = []
+        self.components_with_object_states = []
+        for wrapped_component in self.calculated_components or []:
+            array_state = wrapped_component.my_component.array_state
+            if array_state is None:
+                self.components_with_object_states.append(wrapped_component)
+            else:
+                array_states.append(array_state)
+        self.component_state_values = np.zeros(
+            (2, sum(len(array_state.values) for array_state in array_states)), dtype=np.float64
+        )
+        start = 0
+        for array_state in array_states:
+            stop = start + len(array_state.values)
+            array_state.bind(self.component_state_values[0, start:stop], self.component_state_values[1, start:stop])
+            start = stop
+        if array_states:
+            log.information(
+                f"{len(array_states)} components keep their state of {start} values in one array, "
+                f"{len(self.components_with_object_states)} components save their state themselves."
+            )
+
+    def build_schedule(self) -> List[simulation_schedule.ScheduleGroup]:
+        """Builds the calculation schedule from the connected components.
+
+        With dependency scheduling, the components are ordered by their strongly connected components, so only
+        the algebraic loops are iterated. Otherwise all components are iterated together in the order they were added.
+        Components with precomputed outputs are not part of the schedule.
+        """
+        self.collect_precomputed_outputs()
+        self.set_calculation_intervals()
+        if self.calculated_components is None:
+            raise ValueError("The precomputed outputs were not collected.")
+        self.collect_component_states()
+        if self._simulation_parameters.dependency_scheduling:
+            self.schedule = simulation_schedule.build_dependency_schedule(self.calculated_components)
+        else:
+            self.schedule = simulation_schedule.build_sequential_schedule(self.calculated_components)
+        self.convergence_tolerances = convergence.get_convergence_tolerances(
+            self._simulation_parameters, self.all_outputs
+        )
+        self.convergence_accelerators = [
+            convergence.create_convergence_accelerator(self._simulation_parameters, group.output_indices)
+            for group in self.schedule
+        ]
+        log.information(
+            f"Calculation schedule with {len(self.schedule)} groups, "
+            f"{sum(1 for group in self.schedule if group.is_cyclic)} of them iterated:"
+        )
+        for group_index, group in enumerate(self.schedule):
+            log.information(f"{group_index + 1}. {group.get_description()}")
+        return self.schedule
+
+    def log_setup_timings(self) -> None:
+        """Logs how long the phases of the simulation setup took."""
+        log.information(
+            f"Setup of {len(self.wrapped_components)} components with {len(self.all_outputs)} outputs took "
+            f"{sum(self.setup_timings.values()):.3f} seconds:"
+        )
+        for phase, duration in self.setup_timings.items():
+            log.information(f"    {phase}: {duration:.3f} seconds")
+
     def process_one_timestep(
-        self, timestep: int, previous_stsv: cp.SingleTimeStepValues
+        self, timestep: int, stsv: cp.SingleTimeStepValues
     ) -> Tuple[cp.SingleTimeStepValues, int, bool]:
         """Executes one simulation timestep.
 
@@ -115,63 +311,164 @@ class Simulator:
         To solve the circular dependency, all components have their states restored
         and simulated until their values converge.
 
-        Firstly, their previously converged state is saved as the current timestep state.
-        Following up, all components have their states restored and simulated respectively.
+        Firstly, the precomputed outputs are written and the previously converged state
+        is saved as the current timestep state.
+        Following up, the groups of the schedule are calculated in order. Groups without a loop are
+        calculated once, the others have their states restored and simulated until they converge.
         Convergence is dependent on the i_restore and i_simulate of the components and how they
         are connected to each other.
-        """
-
-        # Save states of all components
-        # Executes save state in the component
-        for wrapped_component in self.wrapped_components:
-            wrapped_component.save_state()
 
-        continue_calculation = True
+        The iteration works in place on the given stsv, which is usually a view on a row of the result matrix,
+        so the converged values do not need to be copied afterwards.
+        Returns the largest number of iterations of any group.
+        """
 
         # Verifies data existence
         if (len(self.all_outputs)) == 0:
             raise ValueError("Not a single column was defined.")
+        if self.calculated_components is None:
+            self.build_schedule()
+        calculated_components: List[ComponentWrapper] = self.calculated_components or []
+
+        # Writes the outputs that are already known for this timestep
+        stsv.values[self.precomputed_indices] = self.precomputed_values[timestep]
+        # Components with a native timestep hold their outputs between their own timesteps
+        for wrapped_component in self.multi_rate_components:
+            wrapped_component.is_idle = timestep % wrapped_component.calculation_interval != 0
+            if wrapped_component.is_idle:
+                stsv.values[wrapped_component.output_global_indices] = wrapped_component.held_output_values
+
+        # Save states of all components
+        # The array states are saved at once, the other states by the components
+        if self.profiler is None:
+            self.component_state_values[1] = self.component_state_values[0]
+            for wrapped_component in self.components_with_object_states:
+                if not wrapped_component.is_idle:
+                    wrapped_component.save_state()
+        else:
+            for wrapped_component in calculated_components:
+                if not wrapped_component.is_idle:
+                    self.profiler.save_state(wrapped_component)
+
+        iterative_tries = 0
+        force_convergence = False
+        for group, accelerator in zip(self.schedule, self.convergence_accelerators):
+            if group.is_cyclic:
+                group_tries, group_force_convergence = self.iterate_schedule_group(timestep, group, stsv, accelerator)
+                iterative_tries = max(iterative_tries, group_tries)
+                force_convergence = force_convergence or group_force_convergence
+            else:
+                for wrapped_component in group.wrapped_components:
+                    if wrapped_component.is_idle:
+                        continue
+                    if self.profiler is None:
+                        wrapped_component.restore_state()
+                        wrapped_component.calculate_component(timestep, stsv, False)
+                    else:
+                        self.profiler.restore_state(wrapped_component)
+                        self.profiler.calculate_component(wrapped_component, timestep, stsv, False)
+                iterative_tries = max(iterative_tries, 1)
+
+        for wrapped_component in calculated_components:
+            if not wrapped_component.is_idle:
+                wrapped_component.doublecheck(timestep, stsv)
+        for wrapped_component in self.multi_rate_components:
+            if not wrapped_component.is_idle:
+                wrapped_component.held_output_values = stsv.values[wrapped_component.output_global_indices]
+        return (stsv, iterative_tries, force_convergence)
 
-        # Creates List with values
-        stsv = previous_stsv.clone()
-        # Creates a buffer List with values
-        previous_values = previous_stsv.clone()
+    def iterate_schedule_group(
+        self,
+        timestep: int,
+        group: simulation_schedule.ScheduleGroup,
+        stsv: cp.SingleTimeStepValues,
+        accelerator: Optional[convergence.ConvergenceAccelerator] = None,
+    ) -> Tuple[int, bool]:
+        """Iterates the components of a group until their values converge.
+
+        Between the iterations, the accelerator of the convergence strategy may update the outputs of the group.
+        """
+        if accelerator is None:
+            accelerator = convergence.ConvergenceAccelerator(group.output_indices)
+        accelerator.reset()
+        continue_calculation = True
+        # only the components of the group are calculated, so only the outputs of the group can change
+        output_indices = group.output_indices
+        tolerances = self.convergence_tolerances[output_indices]
+        # Creates a buffer with the outputs of the previous iteration
+        previous_outputs = stsv.values.take(output_indices)
         iterative_tries = 0
         force_convergence = False
+        # components that are pure within a timestep are skipped if their inputs did not change,
+        # but only after they were calculated once in this timestep with the current force_convergence flag
+        skipping_allowed = False
+        # outputs of the group that changed in the last iteration, only tracked for the profiler
+        last_changed_outputs: Optional[np.ndarray] = None
 
         # Starts loop
         while continue_calculation:
             # Loops through components
-            for wrapped_component in self.wrapped_components:
-                # Executes restore state for each component
-                wrapped_component.restore_state()
-                # Executes i_simulate for component
-                wrapped_component.calculate_component(timestep, stsv, force_convergence)
+            for wrapped_component in group.wrapped_components:
+                if wrapped_component.is_idle:
+                    continue
+                if (
+                    skipping_allowed
+                    and wrapped_component.is_pure_within_timestep
+                    and not wrapped_component.inputs_changed_since_last_calculation(stsv)
+                ):
+                    # the accelerator may have replaced the outputs after the last calculation
+                    wrapped_component.restore_last_outputs(stsv)
+                    wrapped_component.skipped_calculations += 1
+                    continue
+                if self.profiler is None:
+                    # Executes restore state for each component
+                    wrapped_component.restore_state()
+                    # Executes i_simulate for component
+                    wrapped_component.calculate_component(timestep, stsv, force_convergence)
+                else:
+                    self.profiler.restore_state(wrapped_component)
+                    self.profiler.calculate_component(wrapped_component, timestep, stsv, force_convergence)
+            skipping_allowed = True
 
             # Stops simulation for too small difference between
             # actual values and previous values
-            if stsv.is_close_enough_to_previous(previous_values):
+            current_outputs = stsv.values.take(output_indices)
+            changed_outputs = np.abs(previous_outputs - current_outputs) > tolerances
+            if not changed_outputs.any():
                 continue_calculation = False
+                if self.profiler is not None and last_changed_outputs is not None:
+                    self.profiler.record_last_to_converge(group, last_changed_outputs)
+            if self.profiler is not None:
+                last_changed_outputs = np.zeros(len(stsv.values), dtype=bool)
+                last_changed_outputs[output_indices] = changed_outputs
             if (
                 iterative_tries > 2
                 and postprocessingoptions.PostProcessingOptions.PROVIDE_DETAILED_ITERATION_LOGGING
                 in self._simulation_parameters.post_processing_options
             ):
-                myerr = stsv.get_differences_for_error_msg(previous_values, self.all_outputs)
+                differences = cp.ValueDifferences.of_outputs(
+                    output_indices, previous_outputs, current_outputs, tolerances
+                )
                 with open(self.iteration_logging_path, "a", encoding="utf-8") as filestream:
-                    filestream.write(myerr + "\n")
+                    filestream.write(differences.format(self.all_outputs) + "\n")
             if iterative_tries > 10:
+                if not force_convergence:
+                    skipping_allowed = False
+                    accelerator.reset()
                 force_convergence = True
             if iterative_tries > 100:
-                list_of_changed_values = stsv.get_differences_for_error_msg(previous_values, self.all_outputs)
-                raise ValueError("More than 100 tries in time step " + str(timestep) + "\n" + list_of_changed_values)
-            # Copies actual values to previous variable
-            previous_values.copy_values_from_other(stsv)
+                differences = cp.ValueDifferences.of_outputs(
+                    output_indices, previous_outputs, current_outputs, tolerances
+                )
+                raise ValueError(
+                    "More than 100 tries in time step " + str(timestep) + "\n" + differences.format(self.all_outputs)
+                )
+            if continue_calculation:
+                accelerator.accelerate(stsv, previous_outputs)
+            # Copies actual outputs to previous variable
+            stsv.values.take(output_indices, out=previous_outputs)
             iterative_tries += 1
-
-        for wrapped_component in self.wrapped_components:
-            wrapped_component.doublecheck(timestep, stsv)
-        return (stsv, iterative_tries, force_convergence)
+        return iterative_tries, force_convergence
 
     def prepare_simulation_directory(self):
         """Prepares the simulation directory. Determines the filename if nothing is set."""
@@ -236,8 +533,13 @@ class Simulator:
         # Starts time counter
         start_counter = time.perf_counter()
         self.prepare_calculation()
+        self.setup_timings["preparing components"] = time.perf_counter() - start_counter
         # Connects all components
+        connect_start_counter = time.perf_counter()
         self.connect_all_components()
+        if self._simulation_parameters.write_component_connections:
+            self.write_component_connections()
+        self.setup_timings["connecting components"] = time.perf_counter() - connect_start_counter
         log.information(
             "finished connecting all components. A total of "
             + str(len(self.wrapped_components))
@@ -245,49 +547,120 @@ class Simulator:
             + str(len(self.all_outputs))
             + " outputs."
         )
-        all_result_lines = []
+        schedule_start_counter = time.perf_counter()
+        self.build_schedule()
+        self.typical_periods = self.find_typical_periods()
+        self.select_recorded_outputs()
+        self.setup_timings["building schedule"] = time.perf_counter() - schedule_start_counter
+        self.log_setup_timings()
         log.information("Starting simulation for year " + str(self._simulation_parameters.year))
         log.information("Starting simulation for " + str(self._simulation_parameters.timesteps) + " timesteps")
         lastmessage = datetime.datetime.now()
         last_step: int = 0
         starttime = datetime.datetime.now()
         total_iteration_tries_since_last_msg = 0
+        self.total_iteration_tries = 0
 
-        # Creates empty list with values to get started
-        number_of_outputs = len(self.all_outputs)
-        stsv = cp.SingleTimeStepValues(number_of_outputs)
+        # Every timestep iterates directly on its (zero initialized) row of the result sink. If not all outputs
+        # are stored as float64, it iterates on the live values and copies the recorded ones into the row.
+        my_result_sink = result_sink.create_result_sink(
+            self._simulation_parameters, [output.full_name for output in self.recorded_outputs]
+        )
+        live_values: Optional[np.ndarray] = None
+        if self.recorded_indices is not None or my_result_sink.dtype != np.float64:
+            live_values = np.zeros(len(self.all_outputs), dtype=np.float64)
+        hourly_sums = self.create_unrecorded_hourly_sums()
+        self.previous_timestep_values = np.zeros((2, len(self.all_outputs)), dtype=np.float64)
+
+        if self._simulation_parameters.profile_components:
+            self.profiler = simulation_profiler.SimulationProfiler(
+                self.calculated_components or [], self._simulation_parameters.timesteps
+            )
+        checkpoint_writer = self.create_checkpoint_writer()
+        start_step = 0
+        if self._simulation_parameters.resume_from is not None:
+            start_step = self.resume_from_checkpoint(
+                self._simulation_parameters.resume_from, my_result_sink, checkpoint_writer
+            )
+            last_step = start_step
+        checkpoint_interval = self._simulation_parameters.checkpoint_interval
+        timesteps_to_simulate = self.get_timesteps_to_simulate(start_step)
+        number_of_simulated_timesteps = start_step + len(timesteps_to_simulate)
 
-        for step in range(self._simulation_parameters.timesteps):
+        for step_number, step in enumerate(timesteps_to_simulate, start=start_step):
             if self._simulation_parameters.timesteps % 500 == 0:
                 log.information("Starting step " + str(step))
-
+            if (
+                checkpoint_writer is not None
+                and checkpoint_interval
+                and step % checkpoint_interval == 0
+                and step > start_step
+            ):
+                checkpoint_writer.write_checkpoint(self.get_checkpoint(step))
+
+            result_row = my_result_sink.get_row(step)
+            stsv = cp.SingleTimeStepValues.from_array(result_row if live_values is None else live_values)
+            if self.typical_periods is not None or live_values is not None:
+                # the rows of repeated warm-up periods were calculated before
+                stsv.values.fill(0)
+            self.warm_start_timestep(step, stsv)
             (
-                resulting_stsv,
+                _,
                 iteration_tries,
                 force_convergence,
             ) = self.process_one_timestep(step, stsv)
-            stsv = cp.SingleTimeStepValues(number_of_outputs)
+            self.remember_timestep_values(stsv)
+            if self.profiler is not None:
+                self.profiler.record_timestep(step, iteration_tries)
+            if live_values is not None:
+                self.record_timestep_values(step, live_values, result_row, hourly_sums)
+            if checkpoint_writer is not None:
+                checkpoint_writer.write_row(step, stsv.values)
+            my_result_sink.finish_row(step)
             # Accumulates iteration counter
             total_iteration_tries_since_last_msg += iteration_tries
-
-            # Appends
-            all_result_lines.append(resulting_stsv.values)
-            del resulting_stsv
+            self.total_iteration_tries += iteration_tries
             # Calculates time execution
             elapsed = datetime.datetime.now() - lastmessage
 
             # For simulation longer than 5 seconds
-            if elapsed.total_seconds() > 5 and step != 0:
+            if elapsed.total_seconds() > 5 and step_number != 0:
                 lastmessage = self.show_progress(
                     starttime,
-                    step,
+                    step_number,
                     total_iteration_tries_since_last_msg,
                     last_step,
                     force_convergence,
+                    total_timesteps=number_of_simulated_timesteps,
                 )
-                last_step = step
+                last_step = step_number
                 total_iteration_tries_since_last_msg = 0
-        postprocessing_datatransfer = self.prepare_post_processing(all_result_lines, start_counter)
+        self.skipped_component_calculations = sum(
+            wrapped_component.skipped_calculations for wrapped_component in self.wrapped_components
+        )
+        if self.skipped_component_calculations > 0:
+            log.information(
+                f"Skipped {self.skipped_component_calculations} component calculations, "
+                "because their inputs did not change."
+            )
+        if number_of_simulated_timesteps > 0:
+            log.information(
+                f"Average iterations per timestep: {self.total_iteration_tries / number_of_simulated_timesteps:.2f} "
+                f"(warm start: {WarmStartMode(self._simulation_parameters.warm_start_mode).value})"
+            )
+        cache_files.CACHE_STORE.write_hits()
+        cache_files.CACHE_STORE.log_statistics()
+        if checkpoint_writer is not None:
+            checkpoint_writer.close()
+        if self.profiler is not None:
+            self.profiler.write_results(self._simulation_parameters.result_directory)
+            self.profiler.log_summary()
+        self.results_matrix = my_result_sink.close()
+        if self.typical_periods is not None:
+            self.typical_periods.expand_results(self.results_matrix)
+        if hourly_sums is not None:
+            self.unrecorded_hourly_sums = self.write_unrecorded_hourly_sums(hourly_sums)
+        postprocessing_datatransfer = self.prepare_post_processing(self.results_matrix, start_counter)
         log.information("Starting postprocessing")
         if postprocessing_datatransfer is None:
             raise ValueError("postprocessing_datatransfer was none")
@@ -296,7 +669,6 @@ class Simulator:
         my_post_processor.run(ppdt=postprocessing_datatransfer)
         for wrapped_component in self.wrapped_components:
             wrapped_component.clear()
-        del all_result_lines
         del postprocessing_datatransfer
         del my_post_processor
         self.simulation_repository.clear()
@@ -304,22 +676,237 @@ class Simulator:
         with open(flagfile, "a", encoding="utf-8") as filestream:
             filestream.write("finished")
 
+    def find_typical_periods(self) -> Optional[typical_periods.TypicalPeriods]:
+        """Finds the typical days from the precomputed outputs, if only typical days are simulated."""
+        number_of_typical_days = self._simulation_parameters.typical_days
+        if number_of_typical_days is None:
+            return None
+        if (
+            self._simulation_parameters.result_sink != ResultSinkType.MEMORY
+            or self._simulation_parameters.checkpoint_interval
+            or self._simulation_parameters.resume_from is not None
+        ):
+            raise ValueError("Typical days can only be simulated with the memory result sink and without checkpoints.")
+        seconds_per_day = 24 * 3600
+        if seconds_per_day % self._simulation_parameters.seconds_per_timestep != 0:
+            raise ValueError("Typical days need a timestep that divides a day.")
+        found_typical_periods = typical_periods.find_typical_periods(
+            self.precomputed_values,
+            seconds_per_day // self._simulation_parameters.seconds_per_timestep,
+            number_of_typical_days,
+            self._simulation_parameters.typical_period_warmup_days,
+        )
+        found_typical_periods.write_to_json(self._simulation_parameters.result_directory)
+        log.information(
+            f"Simulating {len(found_typical_periods.typical_periods)} typical days with "
+            f"{found_typical_periods.warmup_periods} warm-up days each instead of "
+            f"{len(found_typical_periods.period_assignments)} days: "
+            f"{len(found_typical_periods.get_timesteps_to_simulate())} of "
+            f"{self._simulation_parameters.timesteps} timesteps."
+        )
+        return found_typical_periods
+
+    def select_recorded_outputs(self) -> None:
+        """Selects the outputs that are stored in the results according to the recording policy.
+
+        The other outputs are still calculated in the live values of every timestep, but not stored.
+        """
+        recording_policy = RecordingPolicy(self._simulation_parameters.recording_policy)
+        if recording_policy == RecordingPolicy.ALL:
+            self.recorded_outputs = self.all_outputs
+            self.recorded_indices = None
+            self.unrecorded_indices = np.zeros(0, dtype=np.int64)
+            return
+        allow_list = set(self._simulation_parameters.recording_allow_list or [])
+        is_recorded = np.array(
+            [
+                output.component_name in allow_list
+                or output.field_name in allow_list
+                or output.full_name in allow_list
+                or (recording_policy == RecordingPolicy.POSTPROCESSING_FLAGGED and bool(output.postprocessing_flag))
+                for output in self.all_outputs
+            ],
+            dtype=bool,
+        )
+        self.recorded_indices = np.flatnonzero(is_recorded)
+        self.unrecorded_indices = np.flatnonzero(~is_recorded)
+        self.recorded_outputs = [self.all_outputs[index] for index in self.recorded_indices]
+        log.information(
+            f"Recording {len(self.recorded_outputs)} of {len(self.all_outputs)} outputs "
+            f"(recording policy: {recording_policy.value})."
+        )
+
+    def create_unrecorded_hourly_sums(self) -> Optional[np.ndarray]:
+        """Creates the hourly sums of the unrecorded outputs, if they are aggregated."""
+        if not self._simulation_parameters.aggregate_unrecorded_outputs or len(self.unrecorded_indices) == 0:
+            return None
+        if self._simulation_parameters.resume_from is not None:
+            raise ValueError("The unrecorded outputs can not be aggregated when resuming from a checkpoint.")
+        seconds_per_timestep = self._simulation_parameters.seconds_per_timestep
+        if 3600 % seconds_per_timestep != 0:
+            raise ValueError("The unrecorded outputs can only be aggregated with a timestep that divides an hour.")
+        number_of_hours = self._simulation_parameters.timesteps * seconds_per_timestep // 3600
+        return np.zeros((number_of_hours, len(self.unrecorded_indices)), dtype=np.float64)
+
+    def record_timestep_values(
+        self, step: int, live_values: np.ndarray, result_row: np.ndarray, hourly_sums: Optional[np.ndarray]
+    ) -> None:
+        """Copies the recorded live values of a timestep into its row of the result sink.
+
+        The unrecorded values are added to the hourly sums. The first timestep of an hour overwrites the sum,
+        so repeated warm-up periods of typical days are not counted twice.
+        """
+        if self.recorded_indices is None:
+            result_row[:] = live_values
+        else:
+            result_row[:] = live_values[self.recorded_indices]
+        if hourly_sums is not None:
+            hour, second_of_hour = divmod(step * self._simulation_parameters.seconds_per_timestep, 3600)
+            if second_of_hour == 0:
+                hourly_sums[hour] = live_values[self.unrecorded_indices]
+            else:
+                hourly_sums[hour] += live_values[self.unrecorded_indices]
+
+    def write_unrecorded_hourly_sums(self, hourly_sums: np.ndarray) -> pd.DataFrame:
+        """Writes the hourly sums of the unrecorded outputs into the result directory."""
+        if self.typical_periods is not None:
+            self.typical_periods.expand_results(hourly_sums, rows_per_period=24)
+        hourly_sums_data_frame = pd.DataFrame(
+            data=hourly_sums,
+            columns=[self.all_outputs[index].get_pretty_name() for index in self.unrecorded_indices],
+            index=pd.date_range(start=self._simulation_parameters.start_date, periods=len(hourly_sums), freq="H"),
+        )
+        hourly_sums_data_frame.to_csv(
+            os.path.join(self._simulation_parameters.result_directory, "unrecorded_outputs_hourly_sums.csv")
+        )
+        return hourly_sums_data_frame
+
+    def get_timesteps_to_simulate(self, start_step: int) -> Union[range, List[int]]:
+        """Gets the timesteps in the order they are simulated, which are only the typical days with typical periods."""
+        if self.typical_periods is None:
+            return range(start_step, self._simulation_parameters.timesteps)
+        return self.typical_periods.get_timesteps_to_simulate()
+
+    def create_checkpoint_writer(self) -> Optional[simulation_checkpoint.CheckpointWriter]:
+        """Creates the checkpoint writer, if checkpoints are enabled.
+
+        The states of all components are collected once, so components without checkpoint support fail right away.
+        """
+        if not self._simulation_parameters.checkpoint_interval:
+            return None
+        self.get_component_states()
+        checkpoint_directory = self._simulation_parameters.checkpoint_directory
+        if checkpoint_directory is None:
+            checkpoint_directory = os.path.join(self._simulation_parameters.result_directory, "checkpoint")
+        return simulation_checkpoint.CheckpointWriter(
+            checkpoint_directory, self._simulation_parameters.timesteps, len(self.all_outputs)
+        )
+
+    def get_component_states(self) -> Dict[str, Any]:
+        """Gets the states of all calculated components for a checkpoint. Precomputed components have no state."""
+        return {
+            wrapped_component.my_component.component_name: wrapped_component.my_component.i_get_state()
+            for wrapped_component in self.calculated_components or []
+        }
+
+    def get_checkpoint(self, next_timestep: int) -> simulation_checkpoint.SimulationCheckpoint:
+        """Gets the state of the simulation at the beginning of a timestep."""
+        return simulation_checkpoint.SimulationCheckpoint(
+            next_timestep=next_timestep,
+            timesteps=self._simulation_parameters.timesteps,
+            output_names=[output.full_name for output in self.all_outputs],
+            component_states=self.get_component_states(),
+            previous_timestep_values=self.previous_timestep_values.copy(),
+            total_iteration_tries=self.total_iteration_tries,
+            held_output_values={
+                wrapped_component.my_component.component_name: wrapped_component.held_output_values.copy()
+                for wrapped_component in self.multi_rate_components
+            },
+        )
+
+    def resume_from_checkpoint(
+        self,
+        checkpoint_directory: str,
+        my_result_sink: result_sink.ResultSink,
+        checkpoint_writer: Optional[simulation_checkpoint.CheckpointWriter],
+    ) -> int:
+        """Restores the results and states of a checkpoint and returns the timestep to continue with."""
+        checkpoint = simulation_checkpoint.load_checkpoint(checkpoint_directory)
+        if checkpoint.timesteps != self._simulation_parameters.timesteps:
+            raise ValueError(
+                f"The checkpoint in {checkpoint_directory} has {checkpoint.timesteps} timesteps, "
+                f"but the simulation has {self._simulation_parameters.timesteps}."
+            )
+        if checkpoint.output_names != [output.full_name for output in self.all_outputs]:
+            raise ValueError(f"The checkpoint in {checkpoint_directory} was written for a different system setup.")
+        checkpoint_results = simulation_checkpoint.load_checkpoint_results(checkpoint_directory)
+        for step in range(checkpoint.next_timestep):
+            if self.recorded_indices is None:
+                my_result_sink.get_row(step)[:] = checkpoint_results[step]
+            else:
+                my_result_sink.get_row(step)[:] = checkpoint_results[step][self.recorded_indices]
+            my_result_sink.finish_row(step)
+            if checkpoint_writer is not None:
+                checkpoint_writer.write_row(step, checkpoint_results[step])
+        del checkpoint_results
+        for wrapped_component in self.calculated_components or []:
+            component_name = wrapped_component.my_component.component_name
+            if component_name not in checkpoint.component_states:
+                raise ValueError(f"The checkpoint in {checkpoint_directory} has no state for {component_name}.")
+            wrapped_component.my_component.i_set_state(checkpoint.component_states[component_name])
+        for wrapped_component in self.multi_rate_components:
+            component_name = wrapped_component.my_component.component_name
+            # checkpoints of older versions have no held outputs
+            held_output_values = getattr(checkpoint, "held_output_values", {})
+            if component_name in held_output_values:
+                wrapped_component.held_output_values = held_output_values[component_name].copy()
+        self.previous_timestep_values = checkpoint.previous_timestep_values.copy()
+        self.total_iteration_tries = checkpoint.total_iteration_tries
+        log.information(f"Resuming the simulation from {checkpoint_directory} at timestep {checkpoint.next_timestep}")
+        return checkpoint.next_timestep
+
+    def warm_start_timestep(self, step: int, stsv: cp.SingleTimeStepValues) -> None:
+        """Seeds the iteration of a timestep with the previously converged values, depending on the warm start mode.
+
+        Without warm start every timestep starts from zeros.
+        """
+        warm_start_mode = self._simulation_parameters.warm_start_mode
+        if warm_start_mode == WarmStartMode.NONE or step == 0:
+            return
+        last_values = self.previous_timestep_values[0]
+        if warm_start_mode == WarmStartMode.LINEAR_EXTRAPOLATION and step > 1:
+            # x(t) = x(t-1) + (x(t-1) - x(t-2))
+            np.subtract(2 * last_values, self.previous_timestep_values[1], out=stsv.values)
+        else:
+            np.copyto(stsv.values, last_values)
+
+    def remember_timestep_values(self, stsv: cp.SingleTimeStepValues) -> None:
+        """Keeps the converged values of the last two timesteps for the warm start.
+
+        They are kept separately, because the result sink might have written the previous rows to disk already.
+        """
+        if self._simulation_parameters.warm_start_mode == WarmStartMode.NONE:
+            return
+        self.previous_timestep_values[1] = self.previous_timestep_values[0]
+        self.previous_timestep_values[0] = stsv.values
+
     @utils.measure_execution_time
-    def prepare_post_processing(self, all_result_lines, start_counter):
+    def prepare_post_processing(self, results_matrix: np.ndarray, start_counter: float) -> PostProcessingDataTransfer:
         """Prepares the post processing."""
         log.information("Preparing post processing")
         # Prepares the results from the simulation for the post processing.
-        if len(all_result_lines) != self._simulation_parameters.timesteps:
+        if results_matrix.shape[0] != self._simulation_parameters.timesteps:
             raise ValueError("not all lines were generated")
         colum_names = []
         if self.setup_function is None:
             raise ValueError("No setup function was set")
         entry: cp.ComponentOutput
-        for _index, entry in enumerate(self.all_outputs):
+        for _index, entry in enumerate(self.recorded_outputs):
             column_name = entry.get_pretty_name()
             colum_names.append(column_name)
             log.debug("Output column: " + column_name)
-        self.results_data_frame = pd.DataFrame(data=all_result_lines, columns=colum_names)
+        # the result matrix is wrapped without copying it
+        self.results_data_frame = pd.DataFrame(data=results_matrix, columns=colum_names, copy=False)
         df_index = pd.date_range(
             start=self._simulation_parameters.start_date,
             end=self._simulation_parameters.end_date,
@@ -352,7 +939,7 @@ class Simulator:
 
         ppdt = PostProcessingDataTransfer(
             results=self.results_data_frame,
-            all_outputs=self.all_outputs,
+            all_outputs=self.recorded_outputs,
             simulation_parameters=self._simulation_parameters,
             wrapped_components=self.wrapped_components,
             mode=1,
@@ -375,8 +962,11 @@ class Simulator:
         total_iteration_tries: int,
         last_step: int,
         force_covergence: bool,
+        total_timesteps: Optional[int] = None,
     ) -> datetime.datetime:
         """Makes the pretty progress messages with time estimate."""
+        if total_timesteps is None:
+            total_timesteps = self._simulation_parameters.timesteps
         # calculates elapsed time
         elapsed = datetime.datetime.now() - starttime
         elapsed_minutes, elapsed_seconds = divmod(elapsed.seconds, 60)
@@ -388,14 +978,16 @@ class Simulator:
             average_iteration_tries: float = 1
         else:
             average_iteration_tries = total_iteration_tries / elapsed_steps
-        time_elapsed = datetime.timedelta(seconds=(self._simulation_parameters.timesteps - step) / steps_per_second)
+        time_elapsed = datetime.timedelta(seconds=(total_timesteps - step) / steps_per_second)
         time_left_minutes, time_left_seconds = divmod(time_elapsed.seconds, 60)
         time_left_seconds = str(time_left_seconds).zfill(2)  # type: ignore
-        simulation_status = f"Simulating... {(step / self._simulation_parameters.timesteps) * 100:.1f}% "
+        simulation_status = f"Simulating... {(step / total_timesteps) * 100:.1f}% "
         simulation_status += f"| Elapsed Time: {elapsed_minutes}:{elapsed_seconds_str} min "
         simulation_status += f"| Speed: {steps_per_second:.0f} step/s "
         simulation_status += f"| Time Left: {time_left_minutes}:{time_left_seconds} min"
         simulation_status += f"| Avg. iterations {average_iteration_tries:.1f}"
+        if self._simulation_parameters.warm_start_mode != WarmStartMode.NONE:
+            simulation_status += f" (warm start: {WarmStartMode(self._simulation_parameters.warm_start_mode).value})"
         if force_covergence:
             simulation_status += " (forced)"
         log.information(simulation_status)
@@ -421,39 +1013,40 @@ class Simulator:
             Units.PASCAL,
         }
 
-        monthly_frames = []
-        daily_frames = []
-        cumulative_data = {}
-        hourly_frames = []
-
-        use_hourly_resample = self._simulation_parameters.seconds_per_timestep != 3600
-
-        for i, column_name in enumerate(results_data_frame.columns):
-            log.debug(f"Processing column {i + 1}/{len(results_data_frame.columns)} - {column_name}")
-            col_data = results_data_frame.iloc[:, i]
-            unit = self.all_outputs[i].unit
-
-            if unit in units_mean:
-                monthly = col_data.resample("M").mean()
-                daily = col_data.resample("D").mean()
-                hourly = col_data.resample("60T").mean() if use_hourly_resample else col_data
-                cumulative = col_data.mean()
-            else:
-                monthly = col_data.resample("M").sum()
-                daily = col_data.resample("D").sum()
-                hourly = col_data.resample("60T").sum() if use_hourly_resample else col_data
-                cumulative = col_data.sum()
-
-            monthly_frames.append(monthly.rename(column_name))
-            daily_frames.append(daily.rename(column_name))
-            hourly_frames.append(hourly.rename(column_name))
-            cumulative_data[column_name] = cumulative
-
-        # Combine at once to avoid per-column index assignment
-        results_merged_monthly = pd.concat(monthly_frames, axis=1)
-        results_merged_daily = pd.concat(daily_frames, axis=1)
-        results_merged_hourly = pd.concat(hourly_frames, axis=1)
-        results_merged_cumulative = pd.DataFrame([cumulative_data])
+        # the columns are split once into a block of means and a block of sums, which are resampled as a whole
+        is_mean_column = np.isin(
+            [self.recorded_outputs[i].unit_code for i in range(len(results_data_frame.columns))],
+            [cp.UNIT_CODES[unit] for unit in units_mean],
+        )
+        mean_positions = np.flatnonzero(is_mean_column)
+        sum_positions = np.flatnonzero(~is_mean_column)
+        mean_frame = results_data_frame.iloc[:, mean_positions]
+        sum_frame = results_data_frame.iloc[:, sum_positions]
+        # puts the columns of both blocks back into the original order
+        column_order = np.argsort(np.concatenate([mean_positions, sum_positions]), kind="stable")
+
+        def resample_blocks(rule: str) -> pd.DataFrame:
+            return pd.concat([mean_frame.resample(rule).mean(), sum_frame.resample(rule).sum()], axis=1).iloc[
+                :, column_order
+            ]
+
+        results_merged_monthly = resample_blocks("M")
+        results_merged_daily = resample_blocks("D")
+        if self._simulation_parameters.seconds_per_timestep != 3600:
+            results_merged_hourly = resample_blocks("60T")
+        else:
+            results_merged_hourly = results_data_frame.copy()
+        # each column is summed along a contiguous row, which adds up the values in the same order as a single
+        # column, so the results are identical to Series.sum and Series.mean, also if there are missing values
+        column_values = np.ascontiguousarray(results_data_frame.to_numpy(dtype=np.float64).T)
+        is_missing = np.isnan(column_values)
+        if is_missing.any():
+            column_values[is_missing] = 0
+        column_sums = column_values.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            column_means = column_sums / np.count_nonzero(~is_missing, axis=1)
+        cumulative_values = np.where(is_mean_column, column_means, column_sums)
+        results_merged_cumulative = pd.DataFrame([dict(zip(results_data_frame.columns, cumulative_values))])
 
         return (
             results_merged_cumulative,
@@ -536,8 +1129,14 @@ class Simulator:
         if os.path.exists(result_directory) is False:
             raise NameError(f"The result directory {result_directory} could not be found.")
 
-        # move log files to result path
-        for file in os.listdir(default_logging_path):
+        # move the log files of this process to result path, the log files of other simulations stay in /logs
+        log.close_log_files()
+        for file_path in log.get_log_file_paths(default_logging_path):
+            if not os.path.isfile(file_path):
+                continue
+            result_file_path = os.path.join(
+                result_directory, log.get_log_file_name_without_process_id(os.path.basename(file_path))
+            )
             # if logging file is not yet in result directory, move it from default directory /logs to result directory
-            if not os.path.isfile(os.path.join(result_directory, file)):
-                os.rename(os.path.join(default_logging_path, file), os.path.join(result_directory, file))
+            if not os.path.isfile(result_file_path):
+                os.rename(file_path, result_file_path)
@@ -0,0 +1,208 @@
+"""Aggregation of the simulated period into typical periods for a fast estimation of the annual results.
+
+The periods (usually days) are clustered by the series of the precomputed outputs, which are the weather,
+the load profiles and the other inputs that are known before the simulation. Only the most typical period of
+every cluster is simulated, after some warm-up periods, so the states of storages and buildings carry over.
+Afterwards, every period is filled with the results of its typical period. Annual sums and means, the standard
+results and the KPIs are therefore weighted with the number of periods of each cluster.
+"""
+
+# clean
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hisim import component as cp
+from hisim import log
+
+TYPICAL_PERIODS_FILE = "typical_periods.json"
+TYPICAL_PERIOD_ERRORS_FILE = "typical_period_errors.csv"
+
+
+@dataclass
+class TypicalPeriods:
+    """The typical periods of a simulation and the period each period is represented by."""
+
+    timesteps_per_period: int
+    #: the typical periods in chronological order
+    typical_periods: np.ndarray
+    #: the typical period of every period of the simulation
+    period_assignments: np.ndarray
+    warmup_periods: int
+
+    def get_weights(self) -> np.ndarray:
+        """Gets how many periods each typical period represents."""
+        weights: np.ndarray = np.array(
+            [np.count_nonzero(self.period_assignments == period) for period in self.typical_periods], dtype=np.int64
+        )
+        return weights
+
+    def get_simulated_periods(self) -> List[int]:
+        """Gets the periods in the order they are simulated, including the warm-up periods.
+
+        The warm-up periods are the periods before a typical period. If the simulation just calculated one of them,
+        it continues from there. Before the first period, the typical period itself is repeated.
+        """
+        simulated_periods: List[int] = []
+        last_period: Optional[int] = None
+        for typical_period in self.typical_periods:
+            first_warmup_period = typical_period - self.warmup_periods
+            if last_period is not None and first_warmup_period <= last_period < typical_period:
+                first_warmup_period = last_period + 1
+            for period in range(first_warmup_period, typical_period):
+                simulated_periods.append(period if period >= 0 else int(typical_period))
+            simulated_periods.append(int(typical_period))
+            last_period = int(typical_period)
+        return simulated_periods
+
+    def get_timesteps_to_simulate(self) -> List[int]:
+        """Gets the timesteps in the order they are simulated."""
+        return [
+            timestep
+            for period in self.get_simulated_periods()
+            for timestep in range(period * self.timesteps_per_period, (period + 1) * self.timesteps_per_period)
+        ]
+
+    def expand_results(self, results_matrix: np.ndarray, rows_per_period: Optional[int] = None) -> None:
+        """Fills every period of the result matrix with the results of its typical period.
+
+        The rows are timesteps, unless rows_per_period is given, for example 24 for hourly values.
+        """
+        if rows_per_period is None:
+            rows_per_period = self.timesteps_per_period
+        period_results = results_matrix.reshape(len(self.period_assignments), rows_per_period, -1)
+        period_results[:] = period_results[self.period_assignments]
+
+    def write_to_json(self, result_directory: str) -> None:
+        """Writes the typical periods, their weights and the assignments into the result directory."""
+        with open(os.path.join(result_directory, TYPICAL_PERIODS_FILE), "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "timesteps_per_period": self.timesteps_per_period,
+                    "warmup_periods": self.warmup_periods,
+                    "typical_periods": self.typical_periods.tolist(),
+                    "weights": self.get_weights().tolist(),
+                    "period_assignments": self.period_assignments.tolist(),
+                },
+                file,
+                indent=4,
+            )
+
+
+def get_period_features(precomputed_values: np.ndarray, timesteps_per_period: int) -> np.ndarray:
+    """Gets one feature vector per period from the precomputed series, which are scaled to the range 0 to 1."""
+    minimum = precomputed_values.min(axis=0)
+    value_range = precomputed_values.max(axis=0) - minimum
+    value_range[value_range == 0] = 1
+    scaled_values = (precomputed_values - minimum) / value_range
+    number_of_periods = len(precomputed_values) // timesteps_per_period
+    features: np.ndarray = scaled_values[: number_of_periods * timesteps_per_period].reshape(number_of_periods, -1)
+    return features
+
+
+def cluster_periods(
+    features: np.ndarray, number_of_clusters: int, max_iterations: int = 100
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Clusters the periods with k-means and returns the medoid periods and the medoid of every period.
+
+    The initial centers are chosen deterministically: the period closest to the mean, then repeatedly the period
+    farthest from the centers so far.
+    """
+    number_of_periods = len(features)
+    squared_norms = np.einsum("ij,ij->i", features, features)
+
+    def get_squared_distances(centers: np.ndarray) -> np.ndarray:
+        distances: np.ndarray = (
+            squared_norms[:, None] - 2 * features @ centers.T + np.einsum("ij,ij->i", centers, centers)[None, :]
+        )
+        return distances
+
+    center_periods = [int(np.argmin(get_squared_distances(features.mean(axis=0, keepdims=True))[:, 0]))]
+    while len(center_periods) < min(number_of_clusters, number_of_periods):
+        distances_to_centers = get_squared_distances(features[center_periods]).min(axis=1)
+        center_periods.append(int(np.argmax(distances_to_centers)))
+    centers = features[center_periods]
+    labels = np.full(number_of_periods, -1, dtype=np.int64)
+    for _ in range(max_iterations):
+        new_labels = np.argmin(get_squared_distances(centers), axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for cluster in range(len(centers)):
+            members = labels == cluster
+            if members.any():
+                centers[cluster] = features[members].mean(axis=0)
+    distances = get_squared_distances(centers)
+    medoids = np.zeros(len(centers), dtype=np.int64)
+    for cluster in range(len(centers)):
+        members = np.flatnonzero(labels == cluster)
+        medoids[cluster] = members[np.argmin(distances[members, cluster])] if len(members) > 0 else -1
+    period_assignments = medoids[labels]
+    typical_periods = np.unique(period_assignments)
+    return typical_periods, period_assignments
+
+
+def find_typical_periods(
+    precomputed_values: np.ndarray, timesteps_per_period: int, number_of_typical_periods: int, warmup_periods: int
+) -> TypicalPeriods:
+    """Finds the typical periods of the precomputed series, which need to cover whole periods."""
+    if precomputed_values.shape[1] == 0:
+        raise ValueError(
+            "Typical periods are found from the precomputed outputs like the weather and the load profiles, "
+            "but no component precomputes its outputs."
+        )
+    if len(precomputed_values) % timesteps_per_period != 0:
+        raise ValueError("Typical periods need a simulation of whole days.")
+    typical_periods, period_assignments = cluster_periods(
+        get_period_features(precomputed_values, timesteps_per_period), number_of_typical_periods
+    )
+    return TypicalPeriods(
+        timesteps_per_period=timesteps_per_period,
+        typical_periods=typical_periods,
+        period_assignments=period_assignments,
+        warmup_periods=warmup_periods,
+    )
+
+
+def get_typical_period_errors(
+    results_data_frame: pd.DataFrame, reference_data_frame: pd.DataFrame, all_outputs: List[cp.ComponentOutput]
+) -> pd.DataFrame:
+    """Compares the totals of all outputs with the ones of a simulation of every period.
+
+    The relative error of the total is the same as the one of the mean, so it holds for all units.
+    """
+    totals = results_data_frame.to_numpy().sum(axis=0)
+    reference_totals = reference_data_frame.to_numpy().sum(axis=0)
+    absolute_errors = np.abs(totals - reference_totals)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_errors = np.where(reference_totals != 0, absolute_errors / np.abs(reference_totals), np.nan)
+    return pd.DataFrame(
+        {
+            "total": totals,
+            "reference total": reference_totals,
+            "absolute error": absolute_errors,
+            "relative error": relative_errors,
+        },
+        index=[output.get_pretty_name() for output in all_outputs],
+    )
+
+
+def write_typical_period_errors(
+    results_data_frame: pd.DataFrame,
+    reference_data_frame: pd.DataFrame,
+    all_outputs: List[cp.ComponentOutput],
+    result_directory: str,
+) -> pd.DataFrame:
+    """Writes the errors of the typical periods against a reference simulation and logs the largest one."""
+    errors = get_typical_period_errors(results_data_frame, reference_data_frame, all_outputs)
+    errors.to_csv(os.path.join(result_directory, TYPICAL_PERIOD_ERRORS_FILE))
+    if errors["relative error"].notna().any():
+        log.information(
+            f"Largest relative error of the typical periods: {errors['relative error'].max():.2%} "
+            f"for {errors['relative error'].idxmax()}"
+        )
+    return errors
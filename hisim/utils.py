@@ -8,17 +8,20 @@ import inspect
 import itertools
 import json
 import os
+import tempfile
 from dataclasses import dataclass
 from functools import reduce as freduce
 from functools import wraps
 from timeit import default_timer as timer
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 import copy
 
+import numpy as np
 import pandas as pd
 import psutil
 import pytz
 
+from hisim import cache_files
 from hisim import log
 from hisim.simulationparameters import SimulationParameters
 
@@ -45,7 +48,7 @@ hisim_postprocessing_img = os.path.join(hisim_abs_path, "postprocessing", "repor
 HISIMPATH: Dict[str, Any] = {
     "inputs": hisim_inputs,
     "cache_dir": os.path.join(hisim_abs_path, "inputs", "cache"),
-    "cache_indices": os.path.join(hisim_abs_path, "inputs", "cache", "cache_indices.json"),
+    "cache_indices": os.path.join(hisim_abs_path, "inputs", "cache", cache_files.CACHE_INDEX_FILE),
     "cfg": os.path.join(hisim_abs_path, "inputs", "cfg.json"),
     "utsp_results": hisim_results,
     "utsp_example_results": os.path.join(hisim_inputs, "LPGResults_for_tests", "Results"),
@@ -265,13 +268,16 @@ def get_cache_file(
     component_key: str,
     parameter_class: Any,
     my_simulation_parameters: SimulationParameters,
-    cache_dir_path: Optional[str] = None
+    cache_dir_path: Optional[str] = None,
+    simulation_parameter_key: Optional[str] = None,
 ) -> Tuple[bool, str]:  # noqa
     """Gets a cache path for a given parameter set.
 
     This will generate a file path based on any dataclass_json.
     It works by turning the class into a json string, hashing the string and then using that as filename.
     The idea is to have a unique file path for every possible configuration.
+    By default the key contains the simulated period, see get_year_cache_file for caches of a whole year.
+    The cached results are read and written with the functions of hisim.cache_files.
     """
     parameter_class_copy = copy.deepcopy(parameter_class)
     if hasattr(parameter_class_copy, "building_name"):
@@ -281,8 +287,9 @@ def get_cache_file(
         cache_dir_path = my_simulation_parameters.cache_dir_path
     if my_simulation_parameters is None:
         raise ValueError("Simulation parameters was none.")
-    simulation_parameter_str = my_simulation_parameters.get_unique_key()
-    json_str = json_str + simulation_parameter_str
+    if simulation_parameter_key is None:
+        simulation_parameter_key = my_simulation_parameters.get_unique_key()
+    json_str = json_str + simulation_parameter_key
     if len(json_str) < 5:
         raise ValueError("Empty json detected for caching. This is a bug.")
     json_str_encoded = json_str.encode("utf-8")
@@ -294,11 +301,90 @@ def get_cache_file(
     cache_absolute_filepath = os.path.join(cache_dir_path, filename)
     if not os.path.isdir(cache_dir_path):
         os.mkdir(cache_dir_path)
-    if os.path.isfile(cache_absolute_filepath):
+    cache_files.CACHE_STORE.set_size_limit(cache_dir_path, my_simulation_parameters.cache_size_limit_in_megabytes)
+    if cache_files.cache_file_exists(cache_absolute_filepath):
         return True, cache_absolute_filepath
     return False, cache_absolute_filepath
 
 
+def simulates_every_timestep(my_simulation_parameters: SimulationParameters) -> bool:
+    """Checks if every timestep is simulated, which is not the case if only typical days are simulated.
+
+    Components that collect their cache values in i_simulate only write them if every timestep was simulated.
+    """
+    return my_simulation_parameters.typical_days is None
+
+
+def get_year_slice(
+    my_simulation_parameters: SimulationParameters, year_rows: Optional[int] = None
+) -> Union[slice, np.ndarray]:
+    """Gets the rows of the simulated period in the values of the whole year.
+
+    The rows start at the offset of the start date in the year. A period that crosses the end of the year continues
+    with the first rows of the year, so it gets an array of rows instead of a slice. year_rows is the number of rows
+    of the cached year, by default the number of timesteps of the calendar year.
+    """
+    year = my_simulation_parameters.year
+    if year_rows is None:
+        seconds_of_year = (dt.datetime(year + 1, 1, 1) - dt.datetime(year, 1, 1)).total_seconds()
+        year_rows = int(seconds_of_year) // my_simulation_parameters.seconds_per_timestep
+    timesteps = my_simulation_parameters.timesteps
+    if timesteps > year_rows:
+        raise ValueError(
+            f"The simulation has {timesteps} timesteps, but the cached year only has {year_rows} rows. "
+            "Simulations longer than a year cannot be served from the year caches."
+        )
+    seconds_since_start_of_year = (my_simulation_parameters.start_date - dt.datetime(year, 1, 1)).total_seconds()
+    start_row = int(seconds_since_start_of_year) // my_simulation_parameters.seconds_per_timestep % year_rows
+    if start_row + timesteps <= year_rows:
+        return slice(start_row, start_row + timesteps)
+    return (start_row + np.arange(timesteps)) % year_rows
+
+
+def get_year_cache_file(
+    component_key: str,
+    parameter_class: Any,
+    my_simulation_parameters: SimulationParameters,
+    cache_dir_path: Optional[str] = None,
+    source_cache_key: Optional[str] = None,
+) -> Tuple[bool, str]:
+    """Gets a cache path that serves every simulated period of a year.
+
+    Year entries are keyed by the configuration, the year and the seconds per timestep only and hold the values
+    of the whole year, so a one week, a January and a full year simulation share them. The component that misses the
+    entry calculates and writes the whole year, and every simulation selects the rows of its period with
+    get_year_slice. Values that are calculated from another year entry, like the PV values from the weather, give
+    the key of that entry as source_cache_key, so they are cached separately for every weather.
+    """
+    simulation_parameter_key = my_simulation_parameters.get_year_unique_key()
+    if source_cache_key is not None:
+        simulation_parameter_key += source_cache_key
+    return get_cache_file(
+        component_key,
+        parameter_class,
+        my_simulation_parameters,
+        cache_dir_path,
+        simulation_parameter_key=simulation_parameter_key,
+    )
+
+
+def write_text_file_atomically(file_path: str, content: str) -> None:
+    """Writes a text file by replacing it with a completely written temporary file.
+
+    Readers and other simulations that write into the same directory never see a partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
 def load_export_load_profile_generator(target):  # noqa
     """Returns the paths for the SQL exported files from the Load Profile Generator."""
     targetpath = os.path.join(HISIMPATH["LoadProfileGenerator_export_directory"], target)
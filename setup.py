@@ -18,6 +18,11 @@ test_requirements = [
     "pytest>=3",
 ]
 
+extras_requirements = {
+    # the Parquet result sink
+    "parquet": ["pyarrow"],
+}
+
 
 setup(
     author="Noah Pflugradt",
@@ -35,6 +40,7 @@ setup(
         "Programming Language :: Python :: 3.8",
     ],
     description="ETHOS.HiSim is a house infrastructure simulator",
+    extras_require=extras_requirements,
     entry_points={
         "console_scripts": [
             "hisim=hisim.cli:main",
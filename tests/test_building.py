@@ -80,6 +80,7 @@ def test_building():
         my_simulation_parameters=my_simulation_parameters,
     )
     my_residence.set_sim_repo(repo)
+    my_residence.connect_only_predefined_connections(my_weather)
     my_residence.i_prepare_simulation()
 
     # Occupancy
@@ -54,7 +54,6 @@ def test_building_scalability():
         my_simulation_parameters=my_simulation_parameters,
     )
     my_residence.set_sim_repo(repo)
-    my_residence.i_prepare_simulation()
 
     log.information(my_residence_config.building_code)
 
@@ -75,6 +74,9 @@ def test_building_scalability():
     )
     my_weather.set_sim_repo(repo)
     my_weather.i_prepare_simulation()
+    # the building calculates its solar gains from the connected weather
+    my_residence.connect_only_predefined_connections(my_weather)
+    my_residence.i_prepare_simulation()
 
     number_of_outputs = fft.get_number_of_outputs(
         [my_occupancy, my_weather, my_residence]
@@ -0,0 +1,266 @@
+"""Tests for the cache files of the precomputed component results."""
+
+# clean
+import datetime
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from dataclasses_json import dataclass_json
+
+from hisim import cache_files
+from hisim import simulator as sim
+from hisim import utils
+from hisim.components import generic_pv_system, weather
+from hisim.simulationparameters import SimulationParameters
+
+
+@dataclass_json
+@dataclass
+class CacheTestConfig:
+    """Config of a component with a cache."""
+
+    name: str
+    building_name: str
+    peak_power_in_watt: float
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_year_cache_entry_serves_every_period_of_the_year(tmp_path):
+    """All simulations of a year share the year entry and slice their period from the offset of the start date."""
+    config = CacheTestConfig(name="PV", building_name="BUI1", peak_power_in_watt=10000.0)
+    cache_dir_path = str(tmp_path)
+    full_year = SimulationParameters.full_year(year=2021, seconds_per_timestep=900)
+    one_week = SimulationParameters.one_week_only(year=2021, seconds_per_timestep=900)
+    three_months = SimulationParameters.three_months_only(year=2021, seconds_per_timestep=900)
+
+    found, year_path = utils.get_year_cache_file("PV", config, full_year, cache_dir_path)
+    assert not found
+    assert utils.get_year_cache_file("PV", config, one_week, cache_dir_path) == (False, year_path)
+    with open(year_path, "w", encoding="utf-8") as file:
+        file.write("year entry")
+    assert utils.get_year_cache_file("PV", config, three_months, cache_dir_path) == (True, year_path)
+    other_resolution = SimulationParameters.one_week_only(year=2021, seconds_per_timestep=3600)
+    assert utils.get_year_cache_file("PV", config, other_resolution, cache_dir_path)[1] != year_path
+    other_year = SimulationParameters.one_week_only(year=2022, seconds_per_timestep=900)
+    assert utils.get_year_cache_file("PV", config, other_year, cache_dir_path)[1] != year_path
+
+    year_rows = 365 * 96
+    assert utils.get_year_slice(full_year) == slice(0, year_rows)
+    assert utils.get_year_slice(one_week) == slice(0, one_week.timesteps)
+    start_row = (31 + 28) * 96
+    assert utils.get_year_slice(three_months) == slice(start_row, start_row + three_months.timesteps)
+    # a period that crosses the end of the year continues with the start of the cached year
+    new_year = SimulationParameters(
+        datetime.datetime(2021, 12, 31), datetime.datetime(2022, 1, 2), seconds_per_timestep=900, result_directory=""
+    )
+    rows = utils.get_year_slice(new_year)
+    assert isinstance(rows, np.ndarray)
+    assert rows.tolist() == list(range(year_rows - 96, year_rows)) + list(range(96))
+    with pytest.raises(ValueError):
+        utils.get_year_slice(full_year, year_rows=year_rows - 96)
+
+
+def simulate_weather_and_pv(
+    start_date: datetime.datetime,
+    end_date: datetime.datetime,
+    cache_dir_path: str,
+    result_directory: str,
+    location: weather.LocationEnum = weather.LocationEnum.AACHEN,
+) -> pd.DataFrame:
+    """Simulates a weather and a PV system and gets the temperature, the DNI and the PV power."""
+    my_simulation_parameters = SimulationParameters(start_date, end_date, seconds_per_timestep=3600)
+    my_simulation_parameters.cache_dir_path = cache_dir_path
+    my_simulation_parameters.result_directory = result_directory
+    os.makedirs(my_simulation_parameters.result_directory, exist_ok=True)
+    my_sim = sim.Simulator(
+        module_directory=my_simulation_parameters.result_directory,
+        module_filename="test_cache_files",
+        my_simulation_parameters=my_simulation_parameters,
+    )
+    my_weather = weather.Weather(my_simulation_parameters, weather.WeatherConfig.get_default(location))
+    my_pvs_config = generic_pv_system.PVSystemConfig.get_default_pv_system(
+        module_name="Hanwha HSL60P6-PA-4-250T [2013]",
+        module_database=generic_pv_system.PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE,
+        inverter_name="ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_",
+        inverter_database=generic_pv_system.PVLibModuleAndInverterEnum.SANDIA_INVERTER_DATABASE,
+    )
+    my_pvs = generic_pv_system.PVSystem(my_simulation_parameters, my_pvs_config)
+    my_pvs.connect_only_predefined_connections(my_weather)
+    # the PV system is prepared first, so it calculates its year cache before the weather is prepared
+    my_sim.add_component(my_pvs)
+    my_sim.add_component(my_weather)
+    my_sim.run_all_timesteps()
+    columns = [
+        my_weather.air_temperature_output.get_pretty_name(),
+        my_weather.dni_output.get_pretty_name(),
+        my_pvs.electricity_output_channel.get_pretty_name(),
+    ]
+    results: pd.DataFrame = my_sim.results_data_frame[columns].reset_index(drop=True)
+    return results
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_january_from_the_year_cache_equals_a_fresh_calculation(tmp_path):
+    """A January simulation gets the same weather and PV values from the year cache as from a fresh calculation."""
+    result_directory = str(tmp_path / "results")
+    year_cache_dir_path = str(tmp_path / "year_cache")
+    full_year = simulate_weather_and_pv(
+        datetime.datetime(2021, 1, 1), datetime.datetime(2022, 1, 1), year_cache_dir_path, result_directory
+    )
+    january_from_year_cache = simulate_weather_and_pv(
+        datetime.datetime(2021, 1, 1), datetime.datetime(2021, 2, 1), year_cache_dir_path, result_directory
+    )
+    january_calculated = simulate_weather_and_pv(
+        datetime.datetime(2021, 1, 1), datetime.datetime(2021, 2, 1), str(tmp_path / "fresh_cache"), result_directory
+    )
+    pd.testing.assert_frame_equal(january_from_year_cache, january_calculated)
+    pd.testing.assert_frame_equal(january_from_year_cache, full_year.iloc[: 31 * 24].reset_index(drop=True))
+    # the weather and the PV values of a later period start at the same offset in the year
+    february = simulate_weather_and_pv(
+        datetime.datetime(2021, 2, 1), datetime.datetime(2021, 3, 1), year_cache_dir_path, result_directory
+    )
+    pd.testing.assert_frame_equal(february, full_year.iloc[31 * 24 : 59 * 24].reset_index(drop=True))
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_pv_year_cache_is_keyed_by_the_connected_weather(tmp_path):
+    """The same PV system at another location in the same process calculates its values from its own weather."""
+    result_directory = str(tmp_path / "results")
+    cache_dir_path = str(tmp_path / "cache")
+    start_date, end_date = datetime.datetime(2021, 6, 1), datetime.datetime(2021, 6, 8)
+    aachen = simulate_weather_and_pv(start_date, end_date, cache_dir_path, result_directory)
+    bremerhaven = simulate_weather_and_pv(
+        start_date, end_date, cache_dir_path, result_directory, weather.LocationEnum.BREMERHAVEN
+    )
+    bremerhaven_calculated = simulate_weather_and_pv(
+        start_date, end_date, str(tmp_path / "fresh_cache"), result_directory, weather.LocationEnum.BREMERHAVEN
+    )
+    pd.testing.assert_frame_equal(bremerhaven, bremerhaven_calculated)
+    assert not np.allclose(aachen.iloc[:, 2], bremerhaven.iloc[:, 2])
+    pv_cache_files = [name for name in os.listdir(cache_dir_path) if name.startswith("PVSystem")]
+    assert len(pv_cache_files) == 2
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_binary_cache_columns_are_exact_and_memory_mapped(tmp_path):
+    """The columns are read back bit for bit, the numeric ones from a memory map of the file."""
+    cache_filepath = str(tmp_path / "PV_key.cache")
+    assert not cache_files.cache_file_exists(cache_filepath)
+    output_power = np.random.default_rng(1).random(525600) / 3
+    cache_files.write_cache_columns(
+        cache_filepath, {"output_power": list(output_power), "in_station": [True, False], "text": "car data"}
+    )
+    assert cache_files.cache_file_exists(cache_filepath)
+    columns = cache_files.read_cache_columns(cache_filepath)
+    assert columns["output_power"].dtype == np.float64
+    assert (columns["output_power"] == output_power).all()
+    assert isinstance(columns["output_power"].base, np.memmap)
+    assert not columns["output_power"].flags.writeable
+    assert list(columns["in_station"]) == [True, False]
+    assert columns["text"].item() == "car data"
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_csv_cache_file_is_converted_when_it_is_read(tmp_path):
+    """An older CSV cache is converted to the binary format, the written index is left out."""
+    cache_filepath = str(tmp_path / "Weather_key.cache")
+    pd.DataFrame({"t_out": [1.5, 2.25, -3.0], "DNI": [0.0, 100.1, 200.2]}).to_csv(cache_filepath)
+    assert cache_files.cache_file_exists(cache_filepath)
+    columns = cache_files.read_cache_columns(cache_filepath)
+    assert sorted(columns) == ["DNI", "t_out"]
+    assert list(columns["t_out"]) == [1.5, 2.25, -3.0]
+    assert not os.path.isfile(cache_filepath)
+    assert os.path.isfile(cache_files.get_binary_cache_path(cache_filepath))
+    assert list(cache_files.read_cache_columns(cache_filepath)["DNI"]) == [0.0, 100.1, 200.2]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_csv_cache_file_is_converted_once_while_its_key_is_claimed(tmp_path, monkeypatch):
+    """A simulation that reads an older file another simulation converts waits and reads the converted file."""
+    monkeypatch.setattr(cache_files, "CACHE_STORE", cache_files.CacheStore(poll_interval_in_seconds=0.01))
+    cache_filepath = str(tmp_path / "Weather_key.cache")
+    pd.DataFrame({"t_out": [1.5, 2.25]}).to_csv(cache_filepath)
+    read_older_files: List[str] = []
+    loaded_columns: List[Optional[Dict[str, np.ndarray]]] = []
+
+    def read_older_cache_file(file_path: str) -> Dict[str, np.ndarray]:
+        read_older_files.append(file_path)
+        return cache_files.read_csv_cache_columns(file_path)
+
+    def load() -> None:
+        loaded_columns.append(cache_files.load_cache_columns(cache_filepath, read_older_cache_file))
+
+    other_simulation = cache_files.CacheStore()
+    with other_simulation.claimed_key(cache_filepath):
+        reader = threading.Thread(target=load)
+        reader.start()
+        time.sleep(0.2)
+        # the other simulation converts the file while the reader waits for the key
+        cache_files.write_binary_cache_file(cache_filepath, cache_files.read_csv_cache_columns(cache_filepath))
+        os.remove(cache_filepath)
+    reader.join()
+    assert not read_older_files
+    assert cache_files.CACHE_STORE.statistics.waits == 1
+    columns = loaded_columns[0]
+    assert columns is not None and list(columns["t_out"]) == [1.5, 2.25]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_cache_store_evicts_the_least_recently_used_files(tmp_path, monkeypatch):
+    """The index holds size, last access and producer, the oldest files are evicted beyond the size limit."""
+    monkeypatch.setattr(cache_files, "CACHE_STORE", cache_files.CacheStore())
+    cache_files.CACHE_STORE.set_size_limit(str(tmp_path), 3.5)
+    one_megabyte_column = {"values": np.zeros(131072)}
+    for name in ["Weather_a", "PV_b", "Building_c"]:
+        cache_files.write_cache_columns(str(tmp_path / f"{name}.cache"), one_megabyte_column)
+    cache_files.read_cache_columns(str(tmp_path / "Weather_a.cache"))
+    cache_files.write_cache_columns(str(tmp_path / "LPG_d.cache"), one_megabyte_column)
+
+    assert sorted(os.listdir(tmp_path)) == ["Building_c.npz", "LPG_d.npz", "Weather_a.npz", "cache_indices.json"]
+    with open(tmp_path / cache_files.CACHE_INDEX_FILE, encoding="utf-8") as file:
+        index = json.load(file)
+    assert sorted(index) == ["Building_c", "LPG_d", "Weather_a"]
+    assert index["Weather_a"]["producer"] == "Weather" and index["Weather_a"]["hits"] == 1
+    assert index["LPG_d"]["size"] == os.path.getsize(tmp_path / "LPG_d.npz")
+    statistics = cache_files.CACHE_STORE.statistics
+    assert (statistics.hits, statistics.misses, statistics.evicted_files) == (1, 4, 1)
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_second_simulation_waits_for_the_claimed_key(tmp_path, monkeypatch):
+    """A simulation that misses a claimed key waits until the result is published and reads it."""
+    monkeypatch.setattr(cache_files, "CACHE_STORE", cache_files.CacheStore(poll_interval_in_seconds=0.01))
+    cache_filepath = str(tmp_path / "Weather_a.cache")
+    other_simulation = cache_files.CacheStore()
+    assert not other_simulation.claim(cache_filepath)
+    assert os.path.isfile(cache_files.get_binary_cache_path(cache_filepath) + cache_files.LOCK_EXTENSION)
+
+    def publish() -> None:
+        cache_files.write_binary_cache_file(cache_filepath, {"t_out": [1.0, 2.0]})
+        other_simulation.release(cache_filepath)
+
+    timer = threading.Timer(0.2, publish)
+    timer.start()
+    assert cache_files.CACHE_STORE.claim(cache_filepath)
+    timer.join()
+    assert cache_files.CACHE_STORE.statistics.waits == 1
+    assert list(cache_files.read_cache_columns(cache_filepath)["t_out"]) == [1.0, 2.0]
+    # the hit is written into the index at the end of the simulation
+    assert sorted(os.listdir(tmp_path)) == ["Weather_a.npz"]
+    cache_files.CACHE_STORE.write_hits()
+    assert sorted(os.listdir(tmp_path)) == ["Weather_a.npz", "cache_indices.json"]
@@ -0,0 +1,67 @@
+"""Tests for precomputing the component caches of system setups."""
+
+# clean
+from typing import Any, Dict
+
+import pytest
+
+from hisim import cache_files
+from hisim import cache_warmup
+from hisim import utils
+from hisim.components.generic_pv_system import PVSystem
+from hisim.components.weather import Weather
+from hisim.simulationparameters import SimulationParameters
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_parameter_grid_gives_a_system_setup_for_every_combination():
+    """The dotted paths of the grid are set in copies of the base setup."""
+    base_setup: Dict[str, Any] = {
+        "path_to_module": "../system_setups/household_heat_pump.py",
+        "simulation_parameters": {"seconds_per_timestep": 900},
+    }
+    system_setups = cache_warmup.expand_parameter_grid(
+        base_setup,
+        {
+            "simulation_parameters.seconds_per_timestep": [900, 3600],
+            "system_setup_config.pv_config.power_in_watt": [5000, 10000, 15000],
+        },
+    )
+    assert len(system_setups) == 6
+    assert system_setups[5]["simulation_parameters"]["seconds_per_timestep"] == 3600
+    assert system_setups[5]["system_setup_config"]["pv_config"]["power_in_watt"] == 15000
+    assert base_setup["simulation_parameters"]["seconds_per_timestep"] == 900
+    assert "system_setup_config" not in base_setup
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_every_distinct_key_is_built_once_and_cached_keys_are_skipped(tmp_path):
+    """Keys shared by system setups are built once, the weather before the components."""
+    my_simulation_parameters = SimulationParameters.one_day_only(year=2021, seconds_per_timestep=900)
+
+    def get_entry(name: str, component_class: type) -> cache_warmup.CacheEntry:
+        return cache_warmup.CacheEntry(str(tmp_path / f"{name}.cache"), component_class, None, my_simulation_parameters)
+
+    first_setup = cache_warmup.SetupCacheEntries(
+        entries=[get_entry("Weather_a", Weather), get_entry("PVSystem_b", PVSystem)]
+    )
+    second_setup = cache_warmup.SetupCacheEntries(
+        entries=[get_entry("Weather_a", Weather), get_entry("PVSystem_c", PVSystem)]
+    )
+    cache_files.write_binary_cache_file(str(tmp_path / "PVSystem_c.cache"), {"output_power": [0.0]})
+    summary = cache_warmup.WarmupSummary()
+    weather_entries, component_entries = cache_warmup.get_entries_to_build([first_setup, second_setup], summary)
+    assert [entry.get_label() for entry in weather_entries] == ["Weather_a"]
+    assert [entry.get_label() for entry in component_entries] == ["PVSystem_b"]
+    assert summary.skipped == ["PVSystem_c"]
+
+    summary.add_result("Weather_a", built=True)
+    summary.failed["PVSystem_b"] = "no module"
+    assert summary.get_report().splitlines() == [
+        "Cache warmup: 1 built, 1 skipped, 1 failed",
+        "  built: Weather_a",
+        "  skipped: PVSystem_c",
+        "  failed: PVSystem_b: no module",
+    ]
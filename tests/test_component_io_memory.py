@@ -0,0 +1,129 @@
+"""Memory footprint of the slotted component outputs compared to the former dict based outputs."""
+
+# clean
+import importlib
+import os
+import tracemalloc
+from typing import Any, Callable, List, Optional
+
+import pytest
+
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import log
+from hisim import simulator as sim
+from hisim import utils
+from hisim.simulationparameters import SimulationParameters
+
+
+class DictBasedComponentOutput:  # noqa: too-few-public-methods
+    """The component output as it was before it used slots, as a reference for the footprint."""
+
+    def __init__(
+        self,
+        object_name: str,
+        field_name: str,
+        load_type: lt.LoadTypes,
+        unit: lt.Units,
+        postprocessing_flag: Optional[List[Any]] = None,
+        sankey_flow_direction: Optional[bool] = None,
+        output_description: Optional[str] = None,
+        source_component_class: Optional[str] = None,
+    ):
+        """Defines a component output."""
+        self.full_name: str = object_name + " # " + field_name
+        self.component_name: str = object_name
+        self.field_name: str = field_name
+        self.display_name: str = field_name
+        self.load_type: lt.LoadTypes = load_type
+        self.unit: lt.Units = unit
+        self.global_index: int = -1
+        self.postprocessing_flag: Optional[List[Any]] = postprocessing_flag
+        self.sankey_flow_direction: Optional[bool] = sankey_flow_direction
+        self.output_description: Optional[str] = output_description
+        self.source_component_class: Optional[str] = source_component_class
+
+
+def get_footprint_per_output(create_outputs: Callable[[], List[Any]]) -> float:
+    """Gets the bytes that are allocated per output, including its names.
+
+    The pretty names are not included, because they are only kept after they were used once.
+    """
+    tracemalloc.start()
+    try:
+        memory_before = tracemalloc.get_traced_memory()[0]
+        outputs = create_outputs()
+        memory_after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (memory_after - memory_before) / len(outputs)
+
+
+def compare_footprints(output_arguments: List[tuple]) -> tuple:
+    """Creates the outputs in both representations and logs their footprint per output."""
+    footprint_before = get_footprint_per_output(
+        lambda: [DictBasedComponentOutput(*arguments) for arguments in output_arguments]
+    )
+    footprint_after = get_footprint_per_output(
+        lambda: [cp.ComponentOutput(*arguments) for arguments in output_arguments]
+    )
+    log.information(
+        f"Footprint of {len(output_arguments)} outputs: {footprint_before:.0f} bytes per output before, "
+        f"{footprint_after:.0f} bytes per output with slots and interned names."
+    )
+    return footprint_before, footprint_after
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_slotted_outputs_need_less_memory():
+    """Outputs with slots are smaller than the dict based outputs and build their pretty name only once."""
+    output_arguments = [
+        (f"BUI{building}_Component{component}", f"Output{field}", lt.LoadTypes.ELECTRICITY, lt.Units.WATT)
+        for building in range(10)
+        for component in range(20)
+        for field in range(10)
+    ]
+    footprint_before, footprint_after = compare_footprints(output_arguments)
+    assert footprint_after < footprint_before
+
+    output = cp.ComponentOutput("Meter", "ElectricityToGrid", lt.LoadTypes.ELECTRICITY, lt.Units.WATT_HOUR)
+    assert output.get_pretty_name() is output.get_pretty_name()
+    assert output.unit_code == cp.UNIT_CODES[lt.Units.WATT_HOUR]
+    output.display_name = "Grid feed-in"
+    assert output.get_pretty_name() == "Meter - Grid feed-in [Electricity - Wh]"
+    assert not hasattr(output, "__dict__")
+
+
+@pytest.mark.system_setups
+@utils.measure_execution_time
+def test_output_footprint_of_the_simple_district():
+    """Compares the footprint of the outputs of the simple district setup before and after the outputs used slots."""
+    my_simulation_parameters = SimulationParameters.one_week_only(year=2021, seconds_per_timestep=60)
+    my_simulation_parameters.multiple_buildings = True
+    result_directory = os.path.join("results", "test_output_footprint_of_the_simple_district")
+    my_simulation_parameters.result_directory = result_directory
+    my_sim = sim.Simulator(
+        module_directory=result_directory,
+        module_filename="simple_district",
+        my_simulation_parameters=my_simulation_parameters,
+    )
+    simple_district = importlib.import_module("system_setups.district_system_setup.simple_district")
+    simple_district.setup_function(my_sim, my_simulation_parameters)
+    output_arguments = [
+        (
+            output.component_name,
+            output.field_name,
+            output.load_type,
+            output.unit,
+            output.postprocessing_flag,
+            output.sankey_flow_direction,
+            output.output_description,
+            output.source_component_class,
+        )
+        for wrapped_component in my_sim.wrapped_components
+        for output in wrapped_component.my_component.outputs
+    ]
+    log.information(f"The simple district has {len(output_arguments)} outputs.")
+    footprint_before, footprint_after = compare_footprints(output_arguments)
+    assert footprint_after < footprint_before
@@ -47,6 +47,7 @@ def test_photovoltaic_sandia():
         config=my_pvs_config, my_simulation_parameters=mysim
     )
     my_pvs.set_sim_repo(repo)
+    my_pvs.connect_only_predefined_connections(my_weather)
     my_pvs.i_prepare_simulation()
     number_of_outputs = fft.get_number_of_outputs([my_weather, my_pvs])
     stsv: component.SingleTimeStepValues = component.SingleTimeStepValues(
@@ -127,6 +128,7 @@ def test_photovoltaic_cec():
         config=my_pvs_config, my_simulation_parameters=mysim
     )
     my_pvs.set_sim_repo(repo)
+    my_pvs.connect_only_predefined_connections(my_weather)
     my_pvs.i_prepare_simulation()
     number_of_outputs = fft.get_number_of_outputs([my_weather, my_pvs])
     stsv: component.SingleTimeStepValues = component.SingleTimeStepValues(
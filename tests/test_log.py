@@ -0,0 +1,43 @@
+"""Tests for the buffered log writer."""
+
+# clean
+import os
+
+import pytest
+
+from hisim import log
+from hisim import utils
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_log_filters_before_writing_and_formats_lazily(tmp_path, monkeypatch):
+    """Messages above the logging level are neither formatted nor written, the others go to the file of the process."""
+    monkeypatch.setattr(log, "LOGGING_LEVEL", log.LogPrio.INFORMATION)
+
+    class FailsToFormat:
+        def __str__(self) -> str:
+            raise AssertionError("Filtered messages should not be formatted.")
+
+    logging_path = str(tmp_path)
+    log.debug("not written %s", FailsToFormat(), logging_message_path=logging_path)
+    log.information("written %s of %d", "message", 2, logging_message_path=logging_path)
+    log.information("100 % written", logging_message_path=logging_path)
+    log.profile("profiled", logging_message_path=logging_path)
+    log.flush()
+
+    simulation_log_path, profiling_log_path = log.get_log_file_paths(logging_path)
+    assert os.path.basename(simulation_log_path) == f"hisim_simulation.{os.getpid()}.log"
+    with open(simulation_log_path, encoding="utf-8") as file:
+        assert file.read() == "written message of 2\n100 % written\n"
+    with open(profiling_log_path, encoding="utf-8") as file:
+        assert file.read() == "profiled\n"
+    assert log.get_log_file_name_without_process_id(os.path.basename(profiling_log_path)) == "profiling_timeuse.log"
+
+    log.close_log_files()
+    os.remove(simulation_log_path)
+    log.information("written again", logging_message_path=logging_path)
+    log.flush()
+    with open(simulation_log_path, encoding="utf-8") as file:
+        assert file.read() == "written again\n"
+    log.close_log_files()
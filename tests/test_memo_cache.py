@@ -0,0 +1,75 @@
+"""Tests for keeping the cached columns in memory for the simulations of a process."""
+
+# clean
+import numpy as np
+import pandas as pd
+import pytest
+
+from hisim import cache_files
+from hisim import memo_cache
+from hisim import utils
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_memo_cache_is_bounded_and_invalidated(tmp_path):
+    """The least recently used entries are dropped beyond the size limit, written cache files are read again."""
+    memo = memo_cache.MemoCache(size_limit_in_megabytes=2.5)
+    loads = []
+
+    def load_one_megabyte(key: str):
+        def load():
+            loads.append(key)
+            return {"values": np.zeros(131072)}
+
+        return load
+
+    first_columns = memo.get_or_load("a", load_one_megabyte("a"))
+    assert not first_columns["values"].flags.writeable
+    memo.get_or_load("b", load_one_megabyte("b"))
+    assert memo.get_or_load("a", load_one_megabyte("a")) is first_columns
+    memo.get_or_load("c", load_one_megabyte("c"))
+    assert list(memo.entries) == ["a", "c"]
+    memo.invalidate("a")
+    memo.get_or_load("a", load_one_megabyte("a"))
+    assert loads == ["a", "b", "c", "a"]
+    assert (memo.hits, memo.misses) == (1, 4)
+    table = memo.get_or_load("table", lambda: pd.DataFrame({"Name": ["module"]}))
+    assert memo.get_or_load("table", lambda: None) is table
+
+    cache_filepath = str(tmp_path / "Weather_a.cache")
+    cache_files.write_cache_columns(cache_filepath, {"t_out": [1.0, 2.0]})
+    assert cache_files.read_cache_columns(cache_filepath) is cache_files.read_cache_columns(cache_filepath)
+    cache_files.write_cache_columns(cache_filepath, {"t_out": [3.0, 4.0]})
+    assert list(cache_files.read_cache_columns(cache_filepath)["t_out"]) == [3.0, 4.0]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_columns_are_shared_with_other_processes():
+    """Another process attaches to the shared memory block of the columns instead of loading them."""
+    key = f"/cache/Weather_{np.random.default_rng().integers(1 << 60)}.cache"
+    publishing_process = memo_cache.MemoCache(share_arrays=True)
+    other_process = memo_cache.MemoCache(share_arrays=True)
+    temperatures = np.linspace(-10.0, 30.0, 35040)
+    published_columns = publishing_process.get_or_load(
+        key, lambda: {"t_out": temperatures, "location": np.array(["Aachen"])}
+    )
+    attached_columns = other_process.get_or_load(key, lambda: pytest.fail("The columns are loaded again."))
+    assert (attached_columns["t_out"] == temperatures).all()
+    assert attached_columns["location"].item() == "Aachen"
+    assert not attached_columns["t_out"].flags.writeable
+    assert (published_columns["t_out"] == temperatures).all() and published_columns["t_out"] is not temperatures
+
+    # invalidating the key removes the block, so processes that do not hold it yet load it again
+    publishing_process.invalidate(key)
+    loads = []
+
+    def load_temperatures():
+        loads.append(key)
+        return {"t_out": temperatures}
+
+    later_process = memo_cache.MemoCache(share_arrays=True)
+    later_process.get_or_load(key, load_temperatures)
+    assert loads == [key]
+    later_process.clear()
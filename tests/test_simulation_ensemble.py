@@ -0,0 +1,137 @@
+"""Tests for simulating the variants of a system setup in lockstep."""
+
+# clean
+import math
+
+import numpy as np
+import pytest
+
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import utils
+from hisim.simulation_ensemble import SimulationEnsemble
+from tests.test_simulator import (
+    LoopTestController,
+    LoopTestSource,
+    build_loop_simulator,
+    get_one_day_parameters,
+)
+
+INITIAL_STORAGE_TEMPERATURES = [15.0, 20.0, 25.0]
+
+
+def build_variant(result_directory: str, initial_storage_temperature: float):
+    """Builds the loop simulator with another initial storage temperature."""
+    my_sim = build_loop_simulator(get_one_day_parameters(), result_directory)
+    storage = my_sim.wrapped_components[1].my_component
+    storage.temperature_in_celsius = initial_storage_temperature
+    storage.previous_temperature_in_celsius = initial_storage_temperature
+    return my_sim
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_ensemble_gives_the_results_of_the_single_simulations(tmp_path, monkeypatch):
+    """Every variant of the ensemble has the same results as its own simulation and the source is shared."""
+
+    def get_precomputed_outputs(self):
+        return {
+            self.temperature_output: np.array(
+                [5 + 5 * math.sin(timestep / 60 * math.pi / 12) for timestep in range(1440)]
+            )
+        }
+
+    monkeypatch.setattr(LoopTestSource, "get_precomputed_outputs", get_precomputed_outputs)
+    ensemble = SimulationEnsemble(
+        [
+            build_variant(str(tmp_path / f"variant_{index}"), temperature)
+            for index, temperature in enumerate(INITIAL_STORAGE_TEMPERATURES)
+        ]
+    )
+    ensemble.run_all_timesteps()
+    assert ensemble.results_matrix.shape == (1440, 3, 3)
+    assert ensemble.shared_component_names == ["Source"]
+    for index, temperature in enumerate(INITIAL_STORAGE_TEMPERATURES):
+        single_sim = build_variant(str(tmp_path / f"single_{index}"), temperature)
+        single_sim.run_all_timesteps()
+        assert (ensemble.results_matrix[:, index, :] == single_sim.results_matrix).all()
+        assert (ensemble.variant_simulators[index].results_matrix == single_sim.results_matrix).all()
+    assert ensemble.get_results_data_frame(2).shape == (1440, 3)
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_vectorised_batch_simulation_only_calculates_unconverged_variants(tmp_path, monkeypatch):
+    """A component with i_simulate_batch calculates all variants at once, converged variants are left out."""
+    reference = SimulationEnsemble(
+        [
+            build_variant(str(tmp_path / f"reference_{index}"), temperature)
+            for index, temperature in enumerate([15.0, 21.0])
+        ]
+    )
+    reference.run_all_timesteps()
+
+    calculated_variants = []
+
+    def i_simulate_batch(cls, components, timestep, stsv, force_convergence, variant_indices):
+        calculated_variants.append(len(variant_indices))
+        storage_temperatures = stsv.get_input_values(components[0].storage_temperature_input)[variant_indices]
+        stsv.values[variant_indices, components[0].heating_power_output.global_index] = np.maximum(
+            0.0, 100 * (21 - storage_temperatures)
+        )
+
+    monkeypatch.setattr(LoopTestController, "i_simulate_batch", classmethod(i_simulate_batch))
+    ensemble = SimulationEnsemble(
+        [
+            build_variant(str(tmp_path / f"variant_{index}"), temperature)
+            for index, temperature in enumerate([15.0, 21.0])
+        ]
+    )
+    ensemble.run_all_timesteps()
+    assert (ensemble.results_matrix == reference.results_matrix).all()
+    assert len(calculated_variants) == ensemble.total_iteration_tries
+    assert 1 in calculated_variants and 2 in calculated_variants
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_ensemble_rejects_variants_with_another_setup(tmp_path):
+    """All variants need the same components and connections."""
+    other_variant = build_variant(str(tmp_path / "other"), 20.0)
+    other_variant.add_component(LoopTestSource(other_variant.get_simulation_parameters(), name="SecondSource"))
+    ensemble = SimulationEnsemble([build_variant(str(tmp_path / "first"), 20.0), other_variant])
+    with pytest.raises(ValueError, match="Variant 1 has different components"):
+        ensemble.run_all_timesteps()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_single_timestep_values_of_an_ensemble():
+    """The values of an ensemble can be read per input and per variant."""
+    output = cp.ComponentOutput("Source", "TemperatureOutside", lt.LoadTypes.TEMPERATURE, lt.Units.CELSIUS)
+    output.global_index = 1
+    stsv = cp.SingleTimeStepValues.from_array(np.zeros((3, 2)))
+    stsv.set_output_values(output, np.array([1.0, 2.0, 3.0]))
+    stsv.get_variant(1).set_output_value(output, 5.0)
+    assert list(stsv.values[:, 1]) == [1.0, 5.0, 3.0]
+    previous_values = stsv.clone()
+    stsv.values[2, 0] = 1.0
+    assert list(stsv.get_unconverged_variants(previous_values)) == [False, False, True]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_ensemble_holds_the_outputs_of_components_with_a_native_timestep(tmp_path, monkeypatch):
+    """The hourly source is held in all variants like in the single simulation."""
+    monkeypatch.setattr(LoopTestSource, "native_seconds_per_timestep", 3600)
+    ensemble = SimulationEnsemble(
+        [
+            build_variant(str(tmp_path / f"variant_{index}"), temperature)
+            for index, temperature in enumerate([15.0, 25.0])
+        ]
+    )
+    ensemble.run_all_timesteps()
+    single_sim = build_variant(str(tmp_path / "single"), 25.0)
+    single_sim.run_all_timesteps()
+    assert (ensemble.results_matrix[:, 1, :] == single_sim.results_matrix).all()
+    assert (ensemble.results_matrix[:60, 0, 0] == ensemble.results_matrix[0, 0, 0]).all()
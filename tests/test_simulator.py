@@ -0,0 +1,775 @@
+"""Tests for the simulator core with a small system setup that contains an algebraic loop."""
+
+# clean
+import datetime
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+from dataclasses_json import dataclass_json
+
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import utils
+import hisim.simulator as sim
+from hisim import convergence
+from hisim.simulationparameters import (
+    ConvergenceStrategy,
+    RecordingPolicy,
+    ResultSinkType,
+    SimulationParameters,
+    WarmStartMode,
+)
+
+
+@dataclass_json
+@dataclass
+class LoopTestConfig(cp.ConfigBase):
+    """Config for the test components."""
+
+    building_name: str
+    name: str
+
+    @classmethod
+    def get_main_classname(cls):
+        """Returns the full class name of the base class."""
+        return LoopTestSource.get_full_classname()
+
+
+class LoopTestSource(cp.Component):
+    """Slowly changing outside temperature without any inputs."""
+
+    TemperatureOutside = "TemperatureOutside"
+
+    def __init__(self, my_simulation_parameters: SimulationParameters, name: str = "Source") -> None:
+        """Initializes the component."""
+        super().__init__(
+            name=name,
+            my_simulation_parameters=my_simulation_parameters,
+            my_config=LoopTestConfig(name=name, building_name="BUI1"),
+            my_display_config=cp.DisplayConfig(),
+        )
+        self.temperature_output: cp.ComponentOutput = self.add_output(
+            self.component_name,
+            self.TemperatureOutside,
+            lt.LoadTypes.TEMPERATURE,
+            lt.Units.CELSIUS,
+            output_description="Outside temperature",
+        )
+
+    def i_prepare_simulation(self) -> None:
+        """Nothing to prepare."""
+
+    def i_save_state(self) -> None:
+        """No state."""
+
+    def i_restore_state(self) -> None:
+        """No state."""
+
+    def i_get_state(self) -> Any:
+        """No state."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state."""
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Sets a daily sine wave."""
+        stsv.set_output_value(self.temperature_output, 5 + 5 * math.sin(timestep / 60 * math.pi / 12))
+
+    def write_to_report(self) -> Any:
+        """Writes nothing to the report."""
+        return []
+
+
+class LoopTestStorage(cp.Component):
+    """Thermal storage, whose temperature depends on the heating power of the controller."""
+
+    HeatingPower = "HeatingPower"
+    TemperatureOutside = "TemperatureOutside"
+    StorageTemperature = "StorageTemperature"
+
+    def __init__(self, my_simulation_parameters: SimulationParameters) -> None:
+        """Initializes the component."""
+        super().__init__(
+            name="Storage",
+            my_simulation_parameters=my_simulation_parameters,
+            my_config=LoopTestConfig(name="Storage", building_name="BUI1"),
+            my_display_config=cp.DisplayConfig(),
+        )
+        self.heating_power_input: cp.ComponentInput = self.add_input(
+            self.component_name, self.HeatingPower, lt.LoadTypes.HEATING, lt.Units.WATT, True
+        )
+        self.temperature_outside_input: cp.ComponentInput = self.add_input(
+            self.component_name, self.TemperatureOutside, lt.LoadTypes.TEMPERATURE, lt.Units.CELSIUS, True
+        )
+        self.storage_temperature_output: cp.ComponentOutput = self.add_output(
+            self.component_name,
+            self.StorageTemperature,
+            lt.LoadTypes.TEMPERATURE,
+            lt.Units.CELSIUS,
+            output_description="Storage temperature",
+        )
+        self.temperature_in_celsius: float = 20.0
+        self.previous_temperature_in_celsius: float = 20.0
+
+    def i_prepare_simulation(self) -> None:
+        """Nothing to prepare."""
+
+    def i_save_state(self) -> None:
+        """Saves the temperature."""
+        self.previous_temperature_in_celsius = self.temperature_in_celsius
+
+    def i_restore_state(self) -> None:
+        """Restores the temperature."""
+        self.temperature_in_celsius = self.previous_temperature_in_celsius
+
+    def i_get_state(self) -> Any:
+        """Returns the temperature for checkpoints."""
+        return self.temperature_in_celsius
+
+    def i_set_state(self, state: Any) -> None:
+        """Sets the temperature from a checkpoint."""
+        self.temperature_in_celsius = state
+        self.previous_temperature_in_celsius = state
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Heats the storage and loses heat to the outside."""
+        heating_power_in_watt = stsv.get_input_value(self.heating_power_input)
+        temperature_outside_in_celsius = stsv.get_input_value(self.temperature_outside_input)
+        self.temperature_in_celsius += 0.0005 * heating_power_in_watt - 0.01 * (
+            self.temperature_in_celsius - temperature_outside_in_celsius
+        )
+        stsv.set_output_value(self.storage_temperature_output, self.temperature_in_celsius)
+
+    def write_to_report(self) -> Any:
+        """Writes nothing to the report."""
+        return []
+
+
+class LoopTestController(cp.Component):
+    """Proportional controller, whose heating power depends on the storage temperature."""
+
+    StorageTemperature = "StorageTemperature"
+    HeatingPower = "HeatingPower"
+
+    def __init__(self, my_simulation_parameters: SimulationParameters) -> None:
+        """Initializes the component."""
+        super().__init__(
+            name="Controller",
+            my_simulation_parameters=my_simulation_parameters,
+            my_config=LoopTestConfig(name="Controller", building_name="BUI1"),
+            my_display_config=cp.DisplayConfig(),
+        )
+        self.storage_temperature_input: cp.ComponentInput = self.add_input(
+            self.component_name, self.StorageTemperature, lt.LoadTypes.TEMPERATURE, lt.Units.CELSIUS, True
+        )
+        self.heating_power_output: cp.ComponentOutput = self.add_output(
+            self.component_name,
+            self.HeatingPower,
+            lt.LoadTypes.HEATING,
+            lt.Units.WATT,
+            output_description="Heating power",
+        )
+
+    def i_prepare_simulation(self) -> None:
+        """Nothing to prepare."""
+
+    def i_save_state(self) -> None:
+        """No state."""
+
+    def i_restore_state(self) -> None:
+        """No state."""
+
+    def i_get_state(self) -> Any:
+        """No state."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state."""
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Heats proportionally to the difference to the set temperature."""
+        storage_temperature_in_celsius = stsv.get_input_value(self.storage_temperature_input)
+        stsv.set_output_value(self.heating_power_output, max(0.0, 100 * (21 - storage_temperature_in_celsius)))
+
+    def write_to_report(self) -> Any:
+        """Writes nothing to the report."""
+        return []
+
+
+class LoopTestHeatingRod(cp.Component):
+    """Adds a heating power that depends on the outside temperature to the heating power of the controller."""
+
+    HeatingPower = "HeatingPower"
+    TemperatureOutside = "TemperatureOutside"
+    TotalHeatingPower = "TotalHeatingPower"
+    is_pure_within_timestep = True
+
+    def __init__(self, my_simulation_parameters: SimulationParameters) -> None:
+        """Initializes the component."""
+        super().__init__(
+            name="HeatingRod",
+            my_simulation_parameters=my_simulation_parameters,
+            my_config=LoopTestConfig(name="HeatingRod", building_name="BUI1"),
+            my_display_config=cp.DisplayConfig(),
+        )
+        self.heating_power_input: cp.ComponentInput = self.add_input(
+            self.component_name, self.HeatingPower, lt.LoadTypes.HEATING, lt.Units.WATT, True
+        )
+        self.temperature_outside_input: cp.ComponentInput = self.add_input(
+            self.component_name, self.TemperatureOutside, lt.LoadTypes.TEMPERATURE, lt.Units.CELSIUS, True
+        )
+        self.total_heating_power_output: cp.ComponentOutput = self.add_output(
+            self.component_name,
+            self.TotalHeatingPower,
+            lt.LoadTypes.HEATING,
+            lt.Units.WATT,
+            output_description="Total heating power",
+        )
+
+    def i_prepare_simulation(self) -> None:
+        """Nothing to prepare."""
+
+    def i_save_state(self) -> None:
+        """No state."""
+
+    def i_restore_state(self) -> None:
+        """No state."""
+
+    def i_get_state(self) -> Any:
+        """No state."""
+        return None
+
+    def i_set_state(self, state: Any) -> None:
+        """No state."""
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Heats more when it is colder outside."""
+        heating_power_in_watt = stsv.get_input_value(self.heating_power_input)
+        temperature_outside_in_celsius = stsv.get_input_value(self.temperature_outside_input)
+        stsv.set_output_value(
+            self.total_heating_power_output, heating_power_in_watt + 100 * (20 - temperature_outside_in_celsius)
+        )
+
+    def write_to_report(self) -> Any:
+        """Writes nothing to the report."""
+        return []
+
+
+class LoopTestStorageState(cp.ArrayState):
+    """Array state of the storage."""
+
+    __slots__ = ()
+    temperature_in_celsius: float
+
+
+class ArrayStateLoopTestStorage(LoopTestStorage):
+    """Storage that keeps its temperature in an array state, which the simulator saves and restores."""
+
+    def __init__(self, my_simulation_parameters: SimulationParameters) -> None:
+        """Initializes the component and registers its state."""
+        super().__init__(my_simulation_parameters)
+        self.state = self.add_array_state(LoopTestStorageState())
+        self.state.temperature_in_celsius = 20.0
+
+    i_save_state = cp.Component.i_save_state
+    i_restore_state = cp.Component.i_restore_state
+    i_get_state = cp.Component.i_get_state
+    i_set_state = cp.Component.i_set_state
+
+    def i_simulate(self, timestep: int, stsv: cp.SingleTimeStepValues, force_convergence: bool) -> None:
+        """Heats the storage and loses heat to the outside."""
+        heating_power_in_watt = stsv.get_input_value(self.heating_power_input)
+        temperature_outside_in_celsius = stsv.get_input_value(self.temperature_outside_input)
+        self.state.temperature_in_celsius += 0.0005 * heating_power_in_watt - 0.01 * (
+            self.state.temperature_in_celsius - temperature_outside_in_celsius
+        )
+        stsv.set_output_value(self.storage_temperature_output, self.state.temperature_in_celsius)
+
+
+def build_loop_simulator(
+    my_simulation_parameters: SimulationParameters, result_directory: str, storage_class: type = LoopTestStorage
+) -> sim.Simulator:
+    """Builds a simulator with a source and a storage/controller loop."""
+    os.makedirs(result_directory, exist_ok=True)
+    my_simulation_parameters.result_directory = result_directory
+    my_sim: sim.Simulator = sim.Simulator(
+        module_directory=result_directory,
+        module_filename="test_simulator",
+        my_simulation_parameters=my_simulation_parameters,
+    )
+    my_source = LoopTestSource(my_simulation_parameters)
+    my_storage = storage_class(my_simulation_parameters)
+    my_controller = LoopTestController(my_simulation_parameters)
+    my_storage.connect_input(my_storage.HeatingPower, my_controller.component_name, my_controller.HeatingPower)
+    my_storage.connect_input(my_storage.TemperatureOutside, my_source.component_name, my_source.TemperatureOutside)
+    my_controller.connect_input(
+        my_controller.StorageTemperature, my_storage.component_name, my_storage.StorageTemperature
+    )
+    my_sim.add_component(my_source)
+    my_sim.add_component(my_storage)
+    my_sim.add_component(my_controller)
+    return my_sim
+
+
+def get_one_day_parameters() -> SimulationParameters:
+    """One day with a one minute resolution."""
+    return SimulationParameters(datetime.datetime(2021, 1, 1), datetime.datetime(2021, 1, 2), 60)
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_results_are_written_into_the_result_matrix(tmp_path):
+    """The result data frame wraps the preallocated result matrix."""
+    my_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path))
+    my_sim.run_all_timesteps()
+    assert my_sim.results_matrix.shape == (1440, 3)
+    assert my_sim.results_data_frame.shape == (1440, 3)
+    assert my_sim.results_data_frame.to_numpy()[100, 1] == my_sim.results_matrix[100, 1]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_warm_start_converges_to_the_same_results_with_fewer_iterations(tmp_path):
+    """Warm starting from the previous timesteps gives the same results with less iterations."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    for warm_start_mode in [WarmStartMode.PREVIOUS_VALUES, WarmStartMode.LINEAR_EXTRAPOLATION]:
+        my_simulation_parameters = get_one_day_parameters()
+        my_simulation_parameters.warm_start_mode = warm_start_mode
+        my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / warm_start_mode.value))
+        my_sim.run_all_timesteps()
+        assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+        assert my_sim.total_iteration_tries < reference_sim.total_iteration_tries
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_dependency_schedule_iterates_only_the_loop(tmp_path):
+    """Only the storage/controller loop is iterated, the source is calculated once per timestep."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+    assert [group.is_cyclic for group in reference_sim.schedule] == [True]
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.dependency_scheduling = True
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "dependency_scheduling"))
+    my_sim.run_all_timesteps()
+    assert [group.get_component_names() for group in my_sim.schedule] == [["Source"], ["Storage", "Controller"]]
+    assert [group.is_cyclic for group in my_sim.schedule] == [False, True]
+    assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_pure_components_are_skipped_if_their_inputs_did_not_change(tmp_path, monkeypatch):
+    """The source has no inputs, so it only needs to be calculated in the first iteration of each timestep."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+    assert reference_sim.skipped_component_calculations == 0
+
+    monkeypatch.setattr(LoopTestSource, "is_pure_within_timestep", True)
+    my_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "pure_source"))
+    my_sim.run_all_timesteps()
+    assert my_sim.skipped_component_calculations == my_sim.total_iteration_tries - 1440
+    assert (my_sim.results_matrix == reference_sim.results_matrix).all()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_precomputed_outputs_are_written_without_calculating_the_component(tmp_path, monkeypatch):
+    """The source knows its complete output series, so it is written into the results instead of simulated."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    def get_precomputed_outputs(self):
+        return {
+            self.temperature_output: np.array(
+                [5 + 5 * math.sin(timestep / 60 * math.pi / 12) for timestep in range(1440)]
+            )
+        }
+
+    def i_simulate(self, timestep, stsv, force_convergence):
+        raise AssertionError("The precomputed source must not be simulated.")
+
+    monkeypatch.setattr(LoopTestSource, "get_precomputed_outputs", get_precomputed_outputs)
+    monkeypatch.setattr(LoopTestSource, "i_simulate", i_simulate)
+    for warm_start_mode in [WarmStartMode.NONE, WarmStartMode.LINEAR_EXTRAPOLATION]:
+        my_simulation_parameters = get_one_day_parameters()
+        my_simulation_parameters.warm_start_mode = warm_start_mode
+        my_sim = build_loop_simulator(
+            my_simulation_parameters, str(tmp_path / ("precomputed_" + warm_start_mode.value))
+        )
+        my_sim.run_all_timesteps()
+        assert [group.get_component_names() for group in my_sim.schedule] == [["Storage", "Controller"]]
+        assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+    assert (my_sim.results_matrix[:, 0] == reference_sim.results_matrix[:, 0]).all()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_outputs_are_registered_and_connected_through_the_output_index(tmp_path):
+    """The inputs are connected by looking up the outputs in the index and duplicate outputs are rejected."""
+    my_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path))
+    assert my_sim.output_index.get_output("Storage", "StorageTemperature") is my_sim.all_outputs[1]
+    assert my_sim.output_index.get_output("Storage", "Missing") is None
+
+    my_sim.connect_all_components()
+    storage = my_sim.wrapped_components[1].my_component
+    assert [component_input.source_output for component_input in storage.inputs] == [
+        my_sim.all_outputs[2],
+        my_sim.all_outputs[0],
+    ]
+
+    with pytest.raises(ValueError, match="Trying to register the same key twice"):
+        my_sim.add_component(LoopTestSource(get_one_day_parameters()))
+    my_sim.add_component(LoopTestSource(get_one_day_parameters(), name="SecondSource"))
+    assert my_sim.setup_timings["adding components"] > 0
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_component_connections_are_written_once_after_connecting(tmp_path):
+    """All connections are written together into component_connections.json, unless this is disabled."""
+    my_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "with_connections"))
+    assert not os.path.exists(tmp_path / "with_connections" / "component_connections.json")
+    my_sim.run_all_timesteps()
+    with open(tmp_path / "with_connections" / "component_connections.json", mode="r", encoding="utf-8") as file:
+        connections_list = json.load(file)
+    assert connections_list == [
+        {
+            "From": {"Component": "Controller", "Field": "HeatingPower"},
+            "To": {"Component": "Storage", "Field": "HeatingPower"},
+        },
+        {
+            "From": {"Component": "Source", "Field": "TemperatureOutside"},
+            "To": {"Component": "Storage", "Field": "TemperatureOutside"},
+        },
+        {
+            "From": {"Component": "Storage", "Field": "StorageTemperature"},
+            "To": {"Component": "Controller", "Field": "StorageTemperature"},
+        },
+    ]
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.write_component_connections = False
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "without_connections"))
+    my_sim.run_all_timesteps()
+    assert not os.path.exists(tmp_path / "without_connections" / "component_connections.json")
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_chunked_result_sinks_give_the_same_results(tmp_path):
+    """The results written in chunks to disk are the same as the results kept in memory."""
+    reference_parameters = get_one_day_parameters()
+    reference_parameters.warm_start_mode = WarmStartMode.LINEAR_EXTRAPOLATION
+    reference_sim = build_loop_simulator(reference_parameters, str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    for result_sink_type, file_name in [
+        (ResultSinkType.NUMPY_MEMMAP, "results.npy"),
+        (ResultSinkType.PARQUET, "results.parquet"),
+    ]:
+        my_simulation_parameters = get_one_day_parameters()
+        my_simulation_parameters.warm_start_mode = WarmStartMode.LINEAR_EXTRAPOLATION
+        my_simulation_parameters.result_sink = result_sink_type
+        # 1440 timesteps do not fill the last chunk completely
+        my_simulation_parameters.result_sink_chunk_size = 100
+        my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / result_sink_type.value))
+        my_sim.run_all_timesteps()
+        assert os.path.isfile(tmp_path / result_sink_type.value / file_name)
+        # both sinks give the post processing a result matrix that is read from the disk when it is used
+        assert isinstance(my_sim.results_matrix, np.memmap)
+        assert (my_sim.results_matrix == reference_sim.results_matrix).all()
+        assert (my_sim.results_data_frame.to_numpy() == reference_sim.results_matrix).all()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_simulation_resumes_from_the_last_checkpoint(tmp_path, monkeypatch):
+    """A simulation that crashed continues from its last checkpoint and gives the same results."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    original_i_simulate = LoopTestStorage.i_simulate
+
+    def crashing_i_simulate(self, timestep, stsv, force_convergence):
+        if timestep == 1000:
+            raise RuntimeError("Simulated crash")
+        original_i_simulate(self, timestep, stsv, force_convergence)
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.checkpoint_interval = 300
+    monkeypatch.setattr(LoopTestStorage, "i_simulate", crashing_i_simulate)
+    crashing_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "crashing"))
+    with pytest.raises(RuntimeError, match="Simulated crash"):
+        crashing_sim.run_all_timesteps()
+    monkeypatch.setattr(LoopTestStorage, "i_simulate", original_i_simulate)
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.resume_from = str(tmp_path / "crashing" / "checkpoint")
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "resumed"))
+    my_sim.run_all_timesteps()
+    assert (my_sim.results_matrix == reference_sim.results_matrix).all()
+    assert my_sim.total_iteration_tries == reference_sim.total_iteration_tries
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_component_profiler_writes_the_profile_into_the_result_directory(tmp_path):
+    """The profiler counts the component calls and the iterations of each timestep without changing the results."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.profile_components = True
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "profiled"))
+    my_sim.run_all_timesteps()
+    assert (my_sim.results_matrix == reference_sim.results_matrix).all()
+
+    with open(tmp_path / "profiled" / "component_profile.json", mode="r", encoding="utf-8") as file:
+        profile = json.load(file)
+    assert profile["total_iterations"] == my_sim.total_iteration_tries
+    profiles_by_name = {component["component_name"]: component for component in profile["components"]}
+    assert profiles_by_name["Source"]["simulate_calls"] == my_sim.total_iteration_tries
+    assert profiles_by_name["Storage"]["save_state_calls"] == 1440
+    assert profiles_by_name["Controller"]["last_to_converge"] > 0
+    assert os.path.isfile(tmp_path / "profiled" / "component_profile.csv")
+    assert os.path.isfile(tmp_path / "profiled" / "iterations_per_timestep.csv")
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_convergence_acceleration_needs_fewer_iterations(tmp_path):
+    """Aitken and Anderson acceleration converge to the same results with fewer iterations."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    for convergence_strategy in [ConvergenceStrategy.AITKEN, ConvergenceStrategy.ANDERSON]:
+        my_simulation_parameters = get_one_day_parameters()
+        my_simulation_parameters.convergence_strategy = convergence_strategy
+        my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / convergence_strategy.value))
+        my_sim.run_all_timesteps()
+        assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+        assert my_sim.total_iteration_tries < reference_sim.total_iteration_tries
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_skipped_pure_components_keep_their_outputs_with_convergence_acceleration(tmp_path):
+    """The accelerators relax the outputs of the heating rod, which are set back when its calculation is skipped.
+
+    The storage gets hot enough that the controller stays off, so the inputs of the heating rod do not change
+    within a timestep and it is only calculated in the first iteration.
+    """
+
+    def build_heating_rod_simulator(convergence_strategy: ConvergenceStrategy) -> sim.Simulator:
+        my_simulation_parameters = get_one_day_parameters()
+        my_simulation_parameters.convergence_strategy = convergence_strategy
+        result_directory = str(tmp_path / convergence_strategy.value)
+        os.makedirs(result_directory, exist_ok=True)
+        my_simulation_parameters.result_directory = result_directory
+        my_sim: sim.Simulator = sim.Simulator(
+            module_directory=result_directory,
+            module_filename="test_simulator",
+            my_simulation_parameters=my_simulation_parameters,
+        )
+        my_source = LoopTestSource(my_simulation_parameters)
+        my_storage = LoopTestStorage(my_simulation_parameters)
+        my_controller = LoopTestController(my_simulation_parameters)
+        my_heating_rod = LoopTestHeatingRod(my_simulation_parameters)
+        my_storage.connect_input(my_storage.HeatingPower, my_heating_rod.component_name, my_heating_rod.TotalHeatingPower)
+        my_storage.connect_input(my_storage.TemperatureOutside, my_source.component_name, my_source.TemperatureOutside)
+        my_controller.connect_input(
+            my_controller.StorageTemperature, my_storage.component_name, my_storage.StorageTemperature
+        )
+        my_heating_rod.connect_input(
+            my_heating_rod.HeatingPower, my_controller.component_name, my_controller.HeatingPower
+        )
+        my_heating_rod.connect_input(
+            my_heating_rod.TemperatureOutside, my_source.component_name, my_source.TemperatureOutside
+        )
+        my_sim.add_component(my_source)
+        my_sim.add_component(my_storage)
+        my_sim.add_component(my_controller)
+        my_sim.add_component(my_heating_rod)
+        my_sim.run_all_timesteps()
+        return my_sim
+
+    reference_sim = build_heating_rod_simulator(ConvergenceStrategy.PLAIN)
+    for convergence_strategy in [
+        ConvergenceStrategy.UNDER_RELAXATION,
+        ConvergenceStrategy.AITKEN,
+        ConvergenceStrategy.ANDERSON,
+    ]:
+        my_sim = build_heating_rod_simulator(convergence_strategy)
+        assert my_sim.skipped_component_calculations > 0
+        assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_convergence_is_checked_on_the_outputs_of_the_iterated_group(tmp_path, monkeypatch):
+    """The previous iteration of a cyclic group only holds the outputs of the group, not those of the source."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    previous_output_lengths = set()
+    accelerate = convergence.UnderRelaxation.accelerate
+
+    def recording_accelerate(self, stsv, previous_outputs):
+        previous_output_lengths.add(len(previous_outputs))
+        accelerate(self, stsv, previous_outputs)
+
+    monkeypatch.setattr(convergence.UnderRelaxation, "accelerate", recording_accelerate)
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.dependency_scheduling = True
+    my_simulation_parameters.convergence_strategy = ConvergenceStrategy.UNDER_RELAXATION
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "under_relaxation"))
+    my_sim.run_all_timesteps()
+    assert previous_output_lengths == {len(my_sim.schedule[1].output_indices)} == {2}
+    assert abs(my_sim.results_matrix - reference_sim.results_matrix).max() < 0.01
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_convergence_tolerances_per_unit_and_output(tmp_path):
+    """Tolerances of single outputs take precedence over tolerances of units and the global tolerance."""
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.convergence_tolerances_per_unit = {"W": 1.0, "°C": 0.01}
+    my_simulation_parameters.convergence_tolerances_per_output = {"Source # TemperatureOutside": 0.5}
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path))
+    tolerances = convergence.get_convergence_tolerances(my_simulation_parameters, my_sim.all_outputs)
+    assert list(tolerances) == [0.5, 0.01, 1.0]
+
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+    my_sim.run_all_timesteps()
+    # the results only differ in the order of the looser tolerances
+    assert abs(my_sim.results_matrix[:, 1] - reference_sim.results_matrix[:, 1]).max() < 0.01
+    assert abs(my_sim.results_matrix[:, 2] - reference_sim.results_matrix[:, 2]).max() < 1.0
+    assert my_sim.total_iteration_tries < reference_sim.total_iteration_tries
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_components_with_a_native_timestep_hold_their_outputs(tmp_path, monkeypatch):
+    """The source is only calculated once per hour and holds its output in between."""
+    calculated_timesteps = []
+    original_i_simulate = LoopTestSource.i_simulate
+
+    def i_simulate(self, timestep, stsv, force_convergence):
+        calculated_timesteps.append(timestep)
+        original_i_simulate(self, timestep, stsv, force_convergence)
+
+    monkeypatch.setattr(LoopTestSource, "native_seconds_per_timestep", 3600)
+    monkeypatch.setattr(LoopTestSource, "i_simulate", i_simulate)
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.dependency_scheduling = True
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "hourly_source"))
+    my_sim.run_all_timesteps()
+    assert sorted(set(calculated_timesteps)) == list(range(0, 1440, 60))
+    assert my_sim.wrapped_components[0].calculation_interval == 60
+    source_values = my_sim.results_matrix[:, 0]
+    for hour in range(24):
+        assert (source_values[hour * 60 : (hour + 1) * 60] == 5 + 5 * math.sin(hour * math.pi / 12)).all()
+
+    monkeypatch.setattr(LoopTestSource, "native_seconds_per_timestep", 90)
+    my_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "invalid"))
+    with pytest.raises(ValueError, match="is not a multiple"):
+        my_sim.run_all_timesteps()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_std_results_are_the_same_as_the_aggregation_of_each_column(tmp_path):
+    """The mean and sum blocks give exactly the results of resampling every column on its own."""
+    my_simulation_parameters = SimulationParameters(datetime.datetime(2021, 1, 1), datetime.datetime(2021, 3, 1), 900)
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path))
+    my_sim.all_outputs.append(cp.ComponentOutput("Meter", "Energy", lt.LoadTypes.ELECTRICITY, lt.Units.WATT_HOUR))
+    values = np.random.default_rng(1).normal(size=(my_simulation_parameters.timesteps, 4)) * 1000
+    values[5, 3] = np.nan
+    results_data_frame = pd.DataFrame(
+        values,
+        columns=[output.get_pretty_name() for output in my_sim.all_outputs],
+        index=pd.date_range(
+            my_simulation_parameters.start_date, periods=my_simulation_parameters.timesteps, freq="900S"
+        ),
+    )
+    cumulative, monthly, daily, hourly = my_sim.get_std_results(results_data_frame)
+
+    for column_index, column_name in enumerate(results_data_frame.columns):
+        column = results_data_frame[column_name]
+        if my_sim.all_outputs[column_index].unit in [lt.Units.CELSIUS, lt.Units.WATT]:
+            pd.testing.assert_series_equal(monthly[column_name], column.resample("M").mean(), check_exact=True)
+            pd.testing.assert_series_equal(hourly[column_name], column.resample("60T").mean(), check_exact=True)
+            assert cumulative[column_name].iloc[0] == column.mean()
+        else:
+            pd.testing.assert_series_equal(daily[column_name], column.resample("D").sum(), check_exact=True)
+            assert cumulative[column_name].iloc[0] == column.sum()
+    assert list(monthly.columns) == list(results_data_frame.columns)
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_recording_policy_stores_only_the_selected_outputs(tmp_path):
+    """Unrecorded outputs are calculated, but only their hourly sums are kept. The results can be float32."""
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.recording_policy = RecordingPolicy.POSTPROCESSING_FLAGGED
+    my_simulation_parameters.recording_allow_list = ["Storage"]
+    my_simulation_parameters.aggregate_unrecorded_outputs = True
+    my_simulation_parameters.results_dtype = "float32"
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "recorded"))
+    my_sim.wrapped_components[2].my_component.heating_power_output.postprocessing_flag = [
+        lt.InandOutputType.THERMAL_PRODUCTION
+    ]
+    my_sim.run_all_timesteps()
+
+    assert [output.component_name for output in my_sim.recorded_outputs] == ["Storage", "Controller"]
+    assert my_sim.results_matrix.dtype == np.float32
+    assert my_sim.results_data_frame.shape == (1440, 2)
+    assert (my_sim.results_matrix == reference_sim.results_matrix[:, 1:].astype(np.float32)).all()
+    assert my_sim.unrecorded_hourly_sums is not None
+    assert my_sim.unrecorded_hourly_sums.shape == (24, 1)
+    np.testing.assert_allclose(
+        my_sim.unrecorded_hourly_sums.to_numpy()[:, 0], reference_sim.results_matrix[:, 0].reshape(24, 60).sum(axis=1)
+    )
+    assert os.path.isfile(tmp_path / "recorded" / "unrecorded_outputs_hourly_sums.csv")
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_array_states_are_saved_and_restored_in_one_array(tmp_path):
+    """A component with an array state gives the same results and its state lives in the state array."""
+    state = LoopTestStorageState()
+    state.temperature_in_celsius = 21.5
+    state.save()
+    state.temperature_in_celsius = 30.0
+    assert LoopTestStorageState.FIELDS == ("temperature_in_celsius",)
+    assert state.self_copy().temperature_in_celsius == 30.0
+    state.restore()
+    assert state.temperature_in_celsius == 21.5
+
+    reference_sim = build_loop_simulator(get_one_day_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+    my_simulation_parameters = get_one_day_parameters()
+    my_simulation_parameters.checkpoint_interval = 300
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "array"), ArrayStateLoopTestStorage)
+    storage = my_sim.wrapped_components[1].my_component
+    my_sim.run_all_timesteps()
+    assert (my_sim.results_matrix == reference_sim.results_matrix).all()
+    assert my_sim.total_iteration_tries == reference_sim.total_iteration_tries
+    assert my_sim.component_state_values.shape == (2, 1)
+    assert np.shares_memory(storage.state.values, my_sim.component_state_values)
+    assert storage.i_get_state()[0] == storage.state.temperature_in_celsius
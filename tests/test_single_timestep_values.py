@@ -0,0 +1,48 @@
+"""Tests for the convergence check and the difference report of the single time step values."""
+
+# clean
+import numpy as np
+import pytest
+
+from hisim import component as cp
+from hisim import loadtypes as lt
+from hisim import utils
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_convergence_check_with_tolerances_and_blocks(monkeypatch):
+    """The check gives the same result for one block and for several blocks, with global and per value tolerances."""
+    previous_values = cp.SingleTimeStepValues.from_array(np.zeros(10))
+    current_values = cp.SingleTimeStepValues.from_array(np.zeros(10))
+    current_values.values[7] = 0.001
+    tolerances = np.full(10, 0.0001)
+    for block_size in [16384, 3]:
+        monkeypatch.setattr(cp, "CONVERGENCE_CHECK_BLOCK_SIZE", block_size)
+        assert not current_values.is_close_enough_to_previous(previous_values)
+        assert not current_values.is_close_enough_to_previous(previous_values, tolerances)
+        tolerances[7] = 0.01
+        assert current_values.is_close_enough_to_previous(previous_values, tolerances)
+        assert current_values.is_close_enough_to_previous(previous_values, 0.01)
+        tolerances[7] = 0.0001
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_differences_are_reported_as_indices_and_values():
+    """The differences are collected as arrays and only formatted on request."""
+    outputs = [
+        cp.ComponentOutput("Storage", f"Temperature{index}", lt.LoadTypes.TEMPERATURE, lt.Units.CELSIUS)
+        for index in range(3)
+    ]
+    previous_values = cp.SingleTimeStepValues.from_array(np.array([1.0, 2.0, 3.0]))
+    current_values = cp.SingleTimeStepValues.from_array(np.array([1.0, 2.5, 3.00001]))
+    differences = current_values.get_differences(previous_values)
+    assert len(differences) == 1
+    assert list(differences.indices) == [1]
+    assert list(differences.previous_values) == [2.0]
+    assert list(differences.current_values) == [2.5]
+    assert differences.format(outputs) == (
+        "Storage - Temperature1 [Temperature - °C] previously: 2.00 currently: 2.50 | "
+    )
+    assert current_values.get_differences_for_error_msg(previous_values, outputs) == differences.format(outputs)
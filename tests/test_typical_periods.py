@@ -0,0 +1,136 @@
+"""Tests for the simulation of typical days."""
+
+# clean
+import datetime
+import math
+import os
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from hisim import simulator as sim
+from hisim import typical_periods
+from hisim import utils
+from hisim.components import generic_pv_system, weather
+from hisim.simulationparameters import SimulationParameters
+from tests.test_simulator import LoopTestSource, build_loop_simulator
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_periods_are_clustered_and_simulated_with_warmup():
+    """Similar periods are represented by the same typical period, which is simulated after its warm-up periods."""
+    features = np.array([[0.0, 0.0], [0.1, 0.0], [5.0, 5.0], [5.1, 5.0], [4.9, 5.0], [0.0, 0.1], [9.0, 0.0]])
+    found_typical_periods, period_assignments = typical_periods.cluster_periods(features, 3)
+    assert list(found_typical_periods) == [0, 2, 6]
+    assert list(period_assignments) == [0, 0, 2, 2, 2, 0, 6]
+
+    my_typical_periods = typical_periods.TypicalPeriods(
+        timesteps_per_period=2,
+        typical_periods=np.array([0, 5, 6]),
+        period_assignments=np.array([0, 0, 5, 5, 5, 5, 6]),
+        warmup_periods=2,
+    )
+    assert list(my_typical_periods.get_weights()) == [2, 4, 1]
+    assert my_typical_periods.get_simulated_periods() == [0, 0, 0, 3, 4, 5, 6]
+    assert my_typical_periods.get_timesteps_to_simulate()[:4] == [0, 1, 0, 1]
+    results_matrix = np.arange(14, dtype=np.float64).reshape(14, 1)
+    my_typical_periods.expand_results(results_matrix)
+    assert list(results_matrix[:, 0]) == [0, 1, 0, 1, 10, 11, 10, 11, 10, 11, 10, 11, 12, 13]
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_typical_days_estimate_the_totals_of_the_full_simulation(tmp_path, monkeypatch):
+    """Warm and cold days alternate, so two typical days represent all days."""
+
+    def get_outside_temperature(timestep: int) -> float:
+        day, timestep_of_day = divmod(timestep, 144)
+        return (10 if day % 2 == 0 else 0) + 5 * math.sin(timestep_of_day / 144 * 2 * math.pi)
+
+    def get_precomputed_outputs(self):
+        return {
+            self.temperature_output: np.array(
+                [get_outside_temperature(timestep) for timestep in range(self.my_simulation_parameters.timesteps)]
+            )
+        }
+
+    monkeypatch.setattr(LoopTestSource, "get_precomputed_outputs", get_precomputed_outputs)
+
+    def get_parameters() -> SimulationParameters:
+        return SimulationParameters(datetime.datetime(2021, 1, 1), datetime.datetime(2021, 1, 9), 600)
+
+    reference_sim = build_loop_simulator(get_parameters(), str(tmp_path / "reference"))
+    reference_sim.run_all_timesteps()
+
+    my_simulation_parameters = get_parameters()
+    my_simulation_parameters.typical_days = 2
+    my_sim = build_loop_simulator(my_simulation_parameters, str(tmp_path / "typical_days"))
+    my_sim.run_all_timesteps()
+    assert my_sim.typical_periods is not None
+    assert list(my_sim.typical_periods.get_weights()) == [4, 4]
+    assert my_sim.results_matrix.shape == reference_sim.results_matrix.shape
+    assert (my_sim.results_matrix[:, 0] == reference_sim.results_matrix[:, 0]).all()
+
+    errors = typical_periods.write_typical_period_errors(
+        my_sim.results_data_frame, reference_sim.results_data_frame, my_sim.all_outputs, str(tmp_path)
+    )
+    assert errors["relative error"].iloc[0] == 0
+    # only the first day of the reference starts from the initial storage temperature
+    assert errors["relative error"].max() < 0.05
+    assert (tmp_path / typical_periods.TYPICAL_PERIOD_ERRORS_FILE).exists()
+    assert (tmp_path / "typical_days" / typical_periods.TYPICAL_PERIODS_FILE).exists()
+
+
+@pytest.mark.base
+@utils.measure_execution_time
+def test_typical_days_do_not_write_the_caches_of_the_full_simulation(tmp_path, monkeypatch):
+    """The PV values of a full year are the same after a typical days simulation calculated only some of them."""
+
+    def get_pv_results(result_directory: str, cache_dir_path: str, typical_days: Optional[int]) -> np.ndarray:
+        my_simulation_parameters = SimulationParameters.full_year(year=2021, seconds_per_timestep=3600)
+        my_simulation_parameters.cache_dir_path = cache_dir_path
+        my_simulation_parameters.typical_days = typical_days
+        my_simulation_parameters.result_directory = result_directory
+        os.makedirs(result_directory, exist_ok=True)
+        my_sim = sim.Simulator(
+            module_directory=result_directory,
+            module_filename="test_typical_periods",
+            my_simulation_parameters=my_simulation_parameters,
+        )
+        my_weather = weather.Weather(
+            my_simulation_parameters, weather.WeatherConfig.get_default(weather.LocationEnum.AACHEN)
+        )
+        my_pvs_config = generic_pv_system.PVSystemConfig.get_default_pv_system(
+            module_name="Hanwha HSL60P6-PA-4-250T [2013]",
+            module_database=generic_pv_system.PVLibModuleAndInverterEnum.SANDIA_MODULE_DATABASE,
+            inverter_name="ABB__MICRO_0_25_I_OUTD_US_208_208V__CEC_2014_",
+            inverter_database=generic_pv_system.PVLibModuleAndInverterEnum.SANDIA_INVERTER_DATABASE,
+        )
+        my_pvs = generic_pv_system.PVSystem(my_simulation_parameters, my_pvs_config)
+        my_pvs.connect_only_predefined_connections(my_weather)
+        my_sim.add_component(my_weather)
+        my_sim.add_component(my_pvs)
+        my_sim.run_all_timesteps()
+        pv_results: np.ndarray = my_sim.results_data_frame[
+            my_pvs.electricity_output_channel.get_pretty_name()
+        ].to_numpy()
+        return pv_results
+
+    # the first and the last day are simulated, so the PV system reaches its last timestep
+    monkeypatch.setattr(
+        typical_periods,
+        "find_typical_periods",
+        lambda *args: typical_periods.TypicalPeriods(
+            timesteps_per_period=24,
+            typical_periods=np.array([0, 364]),
+            period_assignments=np.array([0] * 182 + [364] * 183),
+            warmup_periods=1,
+        ),
+    )
+    shared_cache_dir_path = str(tmp_path / "cache")
+    get_pv_results(str(tmp_path / "typical_days"), shared_cache_dir_path, typical_days=2)
+    full_year_results = get_pv_results(str(tmp_path / "full_year"), shared_cache_dir_path, typical_days=None)
+    reference_results = get_pv_results(str(tmp_path / "reference"), str(tmp_path / "reference_cache"), None)
+    assert (full_year_results == reference_results).all()